@@ -1,13 +1,22 @@
 import argparse
 import curses
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
 
 from .game_server import GameServer, SerialReader
 from .character import Squirrel
+from .log import BattleLog, file_sink, ndjson_sink
+from .roster import RosterBuilder
+from .encounter import load_encounter
+from .spectator import SpectatorFeed, SpectatorServer
+from .instrument import Instrumentation
+from .profiling import PhaseProfiler, SamplingProfiler
+from .replay import RecordingReader, ReplayReader
+from .renderers import Renderer, CursesRenderer, AnsiRenderer, NullRenderer
 from tests.helpers import FakeReader
 
-def main(stdscr):
-    curses.curs_set(0)
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
     # Set up argument parsing
     parser = argparse.ArgumentParser(description="Read from a serial port.")
     
@@ -31,13 +40,178 @@ def main(stdscr):
         help='Enter into debug mode.'
     )
 
+    parser.add_argument(
+        '--puzzle-workers', 
+        type=int, 
+        default=2, 
+        help='Worker processes that work out puzzle ability answers. '
+             '0 works them out between rounds, which stalls the game on costly puzzles.'
+    )
+
+    parser.add_argument(
+        '--log-file', 
+        type=str, 
+        default=None, 
+        help='Write the battle log as text to this file.'
+    )
+    parser.add_argument(
+        '--log-ndjson', 
+        type=str, 
+        default=None, 
+        help='Write the battle log as newline-delimited JSON to this file.'
+    )
+
+    parser.add_argument(
+        '--combatant-table', 
+        action='store_true', 
+        help='Keep combat state in columns, for very large rosters.'
+    )
+
+    parser.add_argument(
+        '--class-list', 
+        type=str, 
+        default=None, 
+        help='Register everyone in this file up front, one "username[,class]" per line.'
+    )
+
+    parser.add_argument(
+        '--encounter', 
+        type=str, 
+        default=None, 
+        help='Load the bosses from this JSON or TOML encounter file.'
+    )
+
+    parser.add_argument(
+        '--renderer', 
+        choices=['curses', 'ansi', 'null'], 
+        default='curses', 
+        help='How to draw the display: curses, raw ANSI escapes written once per frame, or nothing at all.'
+    )
+
+    parser.add_argument(
+        '--spectator-port', 
+        type=int, 
+        default=None, 
+        help='Serve a spectator page for browsers on this port.'
+    )
+    parser.add_argument(
+        '--spectator-host', 
+        type=str, 
+        default='127.0.0.1', 
+        help='Address to serve the spectator page on, 0.0.0.0 for the whole LAN.'
+    )
+
+    parser.add_argument(
+        '--instrument', 
+        type=str, 
+        default=None, 
+        help='Time each step of the game loop and write the histograms to this JSON file on exit.'
+    )
+    parser.add_argument(
+        '--debug-sender', 
+        type=str, 
+        default=None, 
+        help='Show or hide the timings on screen when this sender sends "<name>/debug".'
+    )
+
+    parser.add_argument(
+        '--profile', 
+        type=str, 
+        default=None, 
+        help='Profile the game loop and write the reports to this directory on exit.'
+    )
+    parser.add_argument(
+        '--profile-mode', 
+        choices=['cprofile', 'sampling'], 
+        default='cprofile', 
+        help='cProfile each step of the game loop (pstats files), or sample the stack (collapsed stacks for flamegraphs).'
+    )
+    parser.add_argument(
+        '--profile-interval', 
+        type=float, 
+        default=0.005, 
+        help='Seconds between stack samples in sampling mode.'
+    )
+
+    parser.add_argument(
+        '--record', 
+        type=str, 
+        default=None, 
+        help='Write every message received to this session file.'
+    )
+    parser.add_argument(
+        '--replay', 
+        type=str, 
+        default=None, 
+        help='Play back a recorded session file instead of reading the serial port.'
+    )
+    parser.add_argument(
+        '--replay-speed', 
+        type=float, 
+        default=1.0, 
+        help='How many times faster than recorded to play a session back.'
+    )
+
     # Parse arguments
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def main(args: argparse.Namespace, renderer: Renderer):
     reader = SerialReader(port=args.port, baud_rate=args.baud_rate)
     if args.debug:
         reader = FakeReader()
-    game = GameServer(bosses=[Squirrel()], reader=reader, stdscr=stdscr)
-    game.run()
+    if args.replay:
+        reader = ReplayReader(args.replay, speed=args.replay_speed)
+    if args.record:
+        reader = RecordingReader(reader, args.record)
+    bosses = load_encounter(args.encounter).new_bosses() if args.encounter else [Squirrel()]
+    # students can't take a boss's name, class list included
+    roster = RosterBuilder(reserved=(b._name for b in bosses))
+    if args.class_list:
+        roster.import_class_list(args.class_list)
+    executor = ProcessPoolExecutor(max_workers=args.puzzle_workers) if args.puzzle_workers > 0 else None
+    feed = None
+    spectator_server = None
+    if args.spectator_port is not None:
+        feed = SpectatorFeed()
+        spectator_server = SpectatorServer(feed, args.spectator_host, args.spectator_port).start()
+    instrumentation = Instrumentation() if args.instrument else None
+    sampler = None
+    if args.profile and args.profile_mode == 'cprofile':
+        instrumentation = PhaseProfiler()
+    elif args.profile:
+        sampler = SamplingProfiler(threading.get_ident(), interval=args.profile_interval).start()
+    game = GameServer(bosses=bosses, reader=reader, renderer=renderer, answer_executor=executor,
+                      combatant_table=args.combatant_table, roster=roster, spectators=feed,
+                      instrumentation=instrumentation, debug_sender=args.debug_sender)
+    sinks = []
+    if args.log_file:
+        sinks.append(file_sink(args.log_file))
+    if args.log_ndjson:
+        sinks.append(ndjson_sink(args.log_ndjson))
+    battle_log = BattleLog(sinks).start() if sinks else None
+    try:
+        game.run()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if battle_log is not None:
+            battle_log.stop()
+        if spectator_server is not None:
+            spectator_server.stop()
+        if instrumentation is not None and args.instrument:
+            instrumentation.dump(args.instrument)
+        if sampler is not None:
+            sampler.stop()
+            sampler.write(args.profile)
+        elif args.profile:
+            instrumentation.write(args.profile)
 
 if __name__ == "__main__":
-    curses.wrapper(main)
+    args = parse_args()
+    if args.renderer == 'curses':
+        curses.wrapper(lambda stdscr: main(args, CursesRenderer(stdscr)))
+    elif args.renderer == 'ansi':
+        main(args, AnsiRenderer())
+    else:
+        main(args, NullRenderer())
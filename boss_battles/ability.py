@@ -64,6 +64,7 @@ class Ability:
     effect_type: EffectType
     effect_die: Optional[tuple[int, int]] = None  # XdY - num rolls, dice size
     modifier_type: Stats.Type     # abilities use a primary stat modifier
+    heals: bool = False           # restores effect die + modifier health instead of attacking
 
 
     def __init_subclass__(cls, **kwargs):
@@ -155,7 +156,132 @@ class CureWounds(Ability):
     effect_type = EffectType.RADIANT
     effect_die = (1, 8)
     modifier_type = Stats.Type.WISDOM
+    heals = True
 
     def algorithm(self, op_token):
         return op_token
 
+
+
+class AreaAbility(Ability):
+    """
+    Hits every conscious enemy of the caster at once. Damage is rolled once
+    and each target makes a saving throw against the caster's save DC
+    (8 + proficiency bonus + ability modifier), halving the damage on a success.
+    """
+    save_type: Stats.Type = Stats.Type.DEXTERITY
+
+
+class Fireball(AreaAbility):
+    identifier = "fireball"
+    name = "Fireball"
+    effect_type = EffectType.FIRE
+    effect_die = (3, 6)
+    modifier_type = Stats.Type.INTELLIGENCE
+    save_type = Stats.Type.DEXTERITY
+
+    def algorithm(self, op_token):
+        return op_token
+
+
+class FireBreath(AreaAbility):
+    identifier = "firebreath"
+    name = "Fire Breath"
+    effect_type = EffectType.FIRE
+    effect_die = (2, 6)
+    modifier_type = Stats.Type.CONSTITUTION
+    save_type = Stats.Type.DEXTERITY
+
+
+class PuzzleAbility(Ability):
+    """
+    An ability whose solve token is the answer to a puzzle built from the
+    opportunity token. Answers can take real work to compute, so the battle
+    works them out in a worker pool when the round starts.
+
+    `difficulty` scales how much work the puzzle takes, e.g. for senior classes.
+    Subclasses must be defined at module level so a process pool can pickle them.
+    """
+    difficulty: int = 1
+
+
+class HashChainPuzzle(PuzzleAbility):
+    """
+    Hash the opportunity token 1000 * difficulty times with 32-bit FNV-1a,
+    feeding each hex digest into the next round. The answer is the final digest.
+    """
+    def algorithm(self, op_token):
+        value = op_token
+        for _ in range(1000 * self.difficulty):
+            value = HashChainPuzzle.fnv1a(value)
+        return value
+
+    @staticmethod
+    def fnv1a(text: str) -> str:
+        h = 0x811c9dc5
+        for char in text:
+            h ^= ord(char)
+            h = (h * 0x01000193) & 0xffffffff
+        return f"{h:08x}"
+
+
+class FactorPuzzle(PuzzleAbility):
+    """
+    Read the opportunity token as a base 36 number n, then find the largest
+    prime factor of n * 10^difficulty + 1.
+    """
+    def algorithm(self, op_token):
+        n = int(op_token, 36) * 10 ** self.difficulty + 1
+        largest = 1
+        factor = 2
+        while factor * factor <= n:
+            while n % factor == 0:
+                largest = factor
+                n //= factor
+            factor += 1 if factor == 2 else 2
+        if n > 1:
+            largest = n
+        return str(largest)
+
+
+class TransformPuzzle(PuzzleAbility):
+    """
+    Apply `difficulty` passes of: shift every character forward by its
+    position in the alphabet "a-z0-9", then reverse the string.
+    """
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+    def algorithm(self, op_token):
+        alphabet = TransformPuzzle.alphabet
+        value = op_token.lower()
+        for _ in range(self.difficulty):
+            value = ''.join(alphabet[(alphabet.index(c) + i) % len(alphabet)] for i, c in enumerate(value))
+            value = value[::-1]
+        return value
+
+
+class Smite(HashChainPuzzle):
+    identifier = "smite"
+    name = "Smite"
+    effect_type = EffectType.RADIANT
+    effect_die = (2, 8)
+    modifier_type = Stats.Type.WISDOM
+    difficulty = 2
+
+
+class Shatter(FactorPuzzle):
+    identifier = "shatter"
+    name = "Shatter"
+    effect_type = EffectType.THUNDER
+    effect_die = (2, 8)
+    modifier_type = Stats.Type.INTELLIGENCE
+    difficulty = 2
+
+
+class MindSpike(TransformPuzzle):
+    identifier = "mspike"
+    name = "Mind Spike"
+    effect_type = EffectType.PSYCHIC
+    effect_die = (2, 6)
+    modifier_type = Stats.Type.WISDOM
+    difficulty = 3
@@ -0,0 +1,330 @@
+"""
+Benchmarks for the game engine.
+
+    python -m boss_battles.bench
+    python -m boss_battles.bench reactions --players 30 300
+    python -m boss_battles.bench --json results.json
+    python -m boss_battles.bench --baseline results.json --threshold 0.2
+
+With --baseline the exit status is 1 when any scenario got slower than the
+baseline by more than the threshold.
+"""
+from typing import Callable, Optional
+import argparse
+import json
+import platform
+import sys
+import time
+
+from .game import BossBattle
+from .character import Player, Squirrel, Wyrmling
+from .command import Command
+from .table import CombatantTable
+from .display import draw_text, render_text
+from .game_server import GameServer
+from .renderers import NullRenderer
+from .spectator import SpectatorFeed
+
+
+# name -> setup(num_players) returning the callable to time
+SCENARIOS: dict[str, Callable[[int], Callable[[], None]]] = {}
+
+
+def scenario(name: str):
+    def register(setup: Callable[[int], Callable[[], None]]):
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+
+def measure(run: Callable[[], None], repeat: int = 5) -> float:
+    "Best time of `repeat` runs, in seconds"
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class NullScreen:
+    "Stands in for a curses window so drawing can be timed without a terminal"
+    def getmaxyx(self):
+        return (40, 120)
+
+    def addstr(self, *args):
+        pass
+
+    def addch(self, *args):
+        pass
+
+
+class QueueReader:
+    "A Reader fed by the benchmark instead of the serial port"
+    def __init__(self):
+        self.messages: list[str] = []
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self) -> list[str]:
+        messages, self.messages = self.messages, []
+        return messages
+
+
+def huge_squirrel() -> Squirrel:
+    boss = Squirrel()
+    boss._max_health = boss._health = 10 ** 9
+    return boss
+
+
+def unkillable_fighters(num_players: int) -> list[Player]:
+    players = [Player.roll_fighter(f"player{n}") for n in range(num_players)]
+    for p in players:
+        p._max_health = p._health = 10 ** 9
+    return players
+
+
+@scenario("parse")
+def parse_commands(num_players: int) -> Callable[[], None]:
+    "Parsing one action per player"
+    messages = [f"player{n}@squirrel/mspike abc{n}" for n in range(num_players)]
+
+    def run():
+        for message in messages:
+            Command(message)
+
+    return run
+
+
+@scenario("handle-action")
+def handle_actions(num_players: int) -> Callable[[], None]:
+    "A new round and every player punching the squirrel"
+    players = [Player.roll_fighter(f"player{n}") for n in range(num_players)]
+    battle = BossBattle(players=players, bosses=[huge_squirrel()])
+    commands = [Command(f"{p._name}@squirrel/punch") for p in players]
+
+    def run():
+        battle.next_round()
+        for command in commands:
+            battle.handle_action(command)
+
+    return run
+
+
+@scenario("bosses-turn")
+def bosses_turn(num_players: int) -> Callable[[], None]:
+    "A boss per ten players, each biting a random player"
+    bosses = [huge_squirrel() for _ in range(max(1, num_players // 10))]
+    for boss in bosses:
+        boss._ability_set = ("bite", )
+    battle = BossBattle(players=unkillable_fighters(num_players), bosses=bosses)
+    battle.next_round()
+
+    def run():
+        battle.bosses_turn()
+
+    return run
+
+
+@scenario("next-round")
+def next_round(num_players: int) -> Callable[[], None]:
+    "Starting a round with a boss per ten players, so new tokens and answers for each"
+    bosses = [huge_squirrel() for _ in range(max(1, num_players // 10))]
+    battle = BossBattle(players=unkillable_fighters(num_players), bosses=bosses)
+
+    def run():
+        battle.next_round()
+
+    return run
+
+
+@scenario("draw-text")
+def draw_names(num_players: int) -> Callable[[], None]:
+    "Every player's name in big text, without the render cache"
+    screen = NullScreen()
+    names = [f"player{n}" for n in range(num_players)]
+
+    def run():
+        render_text.cache_clear()
+        for name in names:
+            draw_text(screen, 0, 0, name)
+
+    return run
+
+
+@scenario("tick")
+def game_server_tick(num_players: int) -> Callable[[], None]:
+    "Ten game loop iterations in the player turn, the first with an action from every player"
+    reader = QueueReader()
+    reader.messages = [f"player{n}/register" for n in range(num_players)] + ["done"]
+    game = GameServer(bosses=[huge_squirrel()], reader=reader, player_turn_time_seconds=10 ** 9,
+                      renderer=NullRenderer(height=60))
+    game._get_messages()
+    game._current_phase()   # registration
+    game._current_phase()   # round init
+    actions = [f"player{n}@squirrel/punch" for n in range(num_players)]
+
+    def run():
+        game.battle.reset_turns()
+        reader.messages = list(actions)
+        for _ in range(10):
+            game._print_display()
+            game._get_messages()
+            game._current_phase()
+
+    return run
+
+
+@scenario("reactions")
+def everyone_readies(num_players: int) -> Callable[[], None]:
+    "A full round where every player readies a punch for the squirrel cowering"
+    players = [Player.roll_fighter(f"player{n}") for n in range(num_players)]
+    boss = Squirrel()
+    boss._ability_set = ("cower", )
+    boss._max_health = boss._health = 10 ** 9
+    battle = BossBattle(players=players, bosses=[boss])
+    commands = [Command(f"{p._name}@squirrel/readyfor cower punch") for p in players]
+
+    def run():
+        battle.next_round()
+        for command in commands:
+            battle.handle_action(command)
+        battle.bosses_turn()
+
+    return run
+
+
+@scenario("area")
+def fire_breath(num_players: int) -> Callable[[], None]:
+    "A wyrmling breathing fire on every player"
+    players = [Player.roll_fighter(f"player{n}") for n in range(num_players)]
+    boss = Wyrmling()
+    boss._ability_set = ("firebreath", )
+    battle = BossBattle(players=players, bosses=[boss])
+
+    def run():
+        for p in players:
+            p._health = p.get_max_health()
+        battle.next_round()
+        battle.bosses_turn()
+
+    return run
+
+
+@scenario("bulk-health")
+def bulk_health(num_players: int) -> Callable[[], None]:
+    "Total player health and the conscious players, read from a combatant table"
+    players = [Player.roll_fighter(f"player{n}") for n in range(num_players)]
+    table = CombatantTable(capacity=num_players + 1)
+    battle = BossBattle(players=players, bosses=[Squirrel()], combatant_table=table)
+
+    def run():
+        for _ in range(100):
+            battle.total_health(bosses=False)
+            table.conscious(bosses=False)
+
+    return run
+
+
+@scenario("timer-panel")
+def timer_panel(num_players: int) -> Callable[[], None]:
+    "Ten seconds of turn timer frames, one per tenth of a second (players don't matter)"
+    screen = NullScreen()
+    frames = [f"{t / 10:.1f}" for t in range(100, 0, -1)]
+
+    def run():
+        for text in frames:
+            draw_text(screen, 0, 0, text, align="center")
+
+    return run
+
+
+@scenario("spectators")
+def spectator_fanout(num_players: int) -> Callable[[], None]:
+    "Health deltas of a round sent to as many spectators as there are players"
+    players = [Player.roll_fighter(f"player{n}") for n in range(num_players)]
+    feed = SpectatorFeed(client_queue_size=1000)
+    clients = [feed.connect()[0] for _ in range(num_players)]
+
+    def run():
+        for turn in range(10):
+            players[turn % num_players].take_damage(1)
+            feed.publish({"timer": str(turn), "health": {p._name: p.get_health() for p in players}})
+        for client in clients:
+            while not client.empty():
+                client.get_nowait()
+
+    return run
+
+
+def run_suite(names: list[str], player_counts: list[int], repeat: int,
+              report: Callable[[str], None] = print) -> dict[str, dict[str, float]]:
+    "scenario -> number of players -> best time in seconds"
+    results: dict[str, dict[str, float]] = {}
+    for name in names:
+        results[name] = {}
+        for num_players in player_counts:
+            seconds = measure(SCENARIOS[name](num_players), repeat)
+            results[name][str(num_players)] = seconds
+            report(f"{name:<20} {num_players:>6} players {seconds * 1000:>10.3f} ms")
+    return results
+
+
+def find_regressions(results: dict[str, dict[str, float]],
+                     baseline: dict[str, dict[str, float]],
+                     threshold: float) -> list[str]:
+    "Descriptions of every result slower than its baseline by more than threshold, e.g. 0.2 for 20%"
+    regressions = []
+    for name, timings in results.items():
+        for num_players, seconds in timings.items():
+            before = baseline.get(name, {}).get(num_players)
+            if not before:
+                continue
+            change = seconds / before - 1
+            if change > threshold:
+                regressions.append(f"{name} with {num_players} players: "
+                                   f"{before * 1000:.3f} ms -> {seconds * 1000:.3f} ms ({change:+.0%})")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run game engine benchmarks.")
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS), help='Scenarios to run.')
+    parser.add_argument('--players', type=int, nargs='+', default=[10, 100, 1000], help='Player counts to run each scenario with.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, the best one is kept.')
+    parser.add_argument('--json', type=str, default=None, help='Write the results to this file.')
+    parser.add_argument('--baseline', type=str, default=None, help='Results file from an earlier run to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='How much slower than the baseline counts as a regression.')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    results = run_suite(args.scenarios, args.players, args.repeat)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
-from typing import Protocol, TYPE_CHECKING
+from typing import Protocol, Callable, TYPE_CHECKING
 from enum import Enum
 from dataclasses import dataclass
 import random
+import copy
 
 
 if TYPE_CHECKING:
@@ -12,6 +13,9 @@ if TYPE_CHECKING:
 # caster, ability identifier, target
 Action = tuple['Character', str, 'Character']
 
+# character, health before the change
+HealthListener = Callable[['Character', int], None]
+
 
 @dataclass
 class Stats:
@@ -99,6 +103,14 @@ class CharacterClass(Enum):
         }[self]
 
 
+# starting stats for each class
+PLAYER_STATS = {
+    CharacterClass.FIGHTER: Stats(strength=16, dexterity=14, constitution=14, wisdom=12, intelligence=8, charisma=10),
+    CharacterClass.WIZARD: Stats(strength=8, dexterity=14, constitution=13, wisdom=12, intelligence=15, charisma=10),
+    CharacterClass.CLERIC: Stats(strength=13, dexterity=10, constitution=14, wisdom=15, intelligence=8, charisma=12),
+}
+
+
 class Character:
     def __init__(self,
                  name: str,
@@ -115,7 +127,37 @@ class Character:
         self._resistances = resistances if resistances else []
         self._vulnerabilities = vulnerabilities if vulnerabilities else []
         self._immunities = immunities if immunities else []
+        self._health_listeners: list[HealthListener] = []
         self._calculate_hp()
+
+    @property
+    def _health(self) -> int:
+        return self._hp
+
+    @_health.setter
+    def _health(self, value: int) -> None:
+        previous = getattr(self, '_hp', value)
+        self._hp = value
+        if value != previous:
+            for listener in self._health_listeners:
+                listener(self, previous)
+
+    def add_health_listener(self, listener: HealthListener) -> None:
+        "listener(character, previous_health) is called whenever health changes"
+        self._health_listeners.append(listener)
+
+    def remove_health_listener(self, listener: HealthListener) -> None:
+        self._health_listeners.remove(listener)
+
+    def clone(self) -> 'Character':
+        "A copy in the same state with its own stats and affinities and no health listeners"
+        twin = copy.copy(self)
+        twin._base_stats = self._base_stats.copy()
+        twin._resistances = list(self._resistances)
+        twin._vulnerabilities = list(self._vulnerabilities)
+        twin._immunities = list(self._immunities)
+        twin._health_listeners = []
+        return twin
     
     def _calculate_hp(self) -> None:
         raise NotImplementedError("Character subclasses must override this method.")
@@ -184,19 +226,37 @@ class Player(Character):
             self._max_health += (die_type // 2) + 1 + Stats.calc_modifier(self._base_stats.constitution)
         self._health = self._max_health
 
+    @staticmethod
+    def roll(name: str, character_class: CharacterClass) -> 'Player':
+        return Player(name, character_class, PLAYER_STATS[character_class].copy())
+
     @staticmethod
     def roll_fighter(name: str) -> 'Player':
-        return Player(name, CharacterClass.FIGHTER, Stats(strength=16, dexterity=14, constitution=14, wisdom=12, intelligence=8, charisma=10))
+        return Player.roll(name, CharacterClass.FIGHTER)
 
     def get_proficiency_bonus(self) -> int:
         """Calculate proficiency bonus based on player level."""
         return (self._level - 1) // 4 + 2
 
 
+class BossRegistry:
+    registry = {}
+
+    @classmethod
+    def register(cls, boss_identifier: str, boss_class):
+        cls.registry[boss_identifier.lower()] = boss_class
+
+
 class Boss(Character):
     _ability_set: tuple[str]
     _opportunity_token_length: int = 4
 
+    def __init_subclass__(cls, **kwargs):
+        "Registers subclasses with an 'identifier' in the BossRegistry, e.g. for encounter files"
+        super().__init_subclass__(**kwargs)
+        if 'identifier' in cls.__dict__:
+            BossRegistry.register(cls.identifier, cls)
+
     def __init__(self,
                  name: str,
                  hit_die: tuple[int, int],
@@ -225,6 +285,8 @@ class Boss(Character):
 
 
 class Squirrel(Boss):
+    identifier = "squirrel"
+
     def __init__(self, hit_die: tuple[int, int] = (1, 4)):
         super().__init__("squirrel",
                          hit_die,
@@ -234,10 +296,29 @@ class Squirrel(Boss):
 
     def do_turn(self, battle: 'BossBattle') -> Action:
         ability = random.choice(self._ability_set)
-        random_player = random.choice(tuple(battle.players))
+        random_player = battle.random_conscious_player()
         return (self, ability, random_player)
 
+class Wyrmling(Boss):
+    identifier = "wyrmling"
+
+    def __init__(self):
+        from .ability import EffectType  # ability imports this module
+        super().__init__(name="wyrmling",
+                         hit_die=(5, 8),
+                         base_stats=Stats(strength=15, dexterity=10, constitution=13, intelligence=10, wisdom=11, charisma=13),
+                         challenge_rating=2,
+                         immunities=[EffectType.FIRE])
+        self._ability_set = ("bite", "firebreath")
+
+    def do_turn(self, battle: 'BossBattle') -> Action:
+        # fire breath hits every player, so the target only matters for bite
+        ability = random.choice(self._ability_set)
+        return (self, ability, battle.random_conscious_player())
+
+
 class GiantWolfSpider(Boss):
+    # no identifier until it can take a turn, so encounters can't use it yet
     def __init__(self):
         super().__init__(name="giant wolf spider",
                          hit_die=(2, 8),
@@ -246,6 +327,8 @@ class GiantWolfSpider(Boss):
         self._ability_set = ("wolfspiderbite", )
 
 class PracticeDummy(Boss):
+    identifier = "dummy"
+
     def __init__(self):
         super().__init__("dummy", (495,1), Stats(constitution=20))
 
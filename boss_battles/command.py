@@ -1,12 +1,27 @@
+from typing import Optional
+import time
+
+
 class InvalidActionStringError(Exception):
     pass
 
 
+class ReceivedLine(str):
+    "A line from the reader that remembers the time.monotonic() it was received at"
+    received_at: float
+
+    def __new__(cls, text: str, received_at: Optional[float] = None):
+        line = super().__new__(cls, text)
+        line.received_at = time.monotonic() if received_at is None else received_at
+        return line
+
+
 class Command:
     user: str
     target: str
     action: str
     args: list[str]
+    received_at: Optional[float]    # time.monotonic(), when s is a ReceivedLine
     
     def __init__(self, s: str):
         """
@@ -63,4 +78,5 @@ class Command:
         self.target = target
         self.action = action
         self.args = args
+        self.received_at = getattr(s, "received_at", None)
 
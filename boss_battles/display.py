@@ -1,4 +1,5 @@
-import curses
+from typing import Iterable
+from functools import lru_cache
 
 
 FONT5x7 = {
@@ -44,22 +45,37 @@ FONT5x7 = {
 
 
 
-def draw_char(screen, x, y, char):
+GLYPH_WIDTH = 5
+GLYPH_HEIGHT = 7
+PIXEL = '█'
+
+
+@lru_cache(maxsize=None)
+def glyph_rows(char: str) -> tuple[str, ...]:
+    "A character as 7 rows of pixels and spaces, top row first"
     hex_columns = FONT5x7.get(char.upper())
     if not hex_columns:
-        return  # Character not found in font
-
-    for col_index, col_value in enumerate(hex_columns):
-        for row_index in range(7):
-            pixel_on = (col_value >> row_index) & 0x01
-            if pixel_on:
-                try:
-                    screen.addch(y + (6 - row_index), x + col_index, '█')  # Use '#' or any character for the pixel
-                except curses.error:
-                    curses.start_color()
-                    curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_RED)  # Color pair 1: White text, Red background   
-                    screen.addstr(0, 0, "Error: Text outside of screen", curses.color_pair(1))
-                    pass
+        return (' ' * GLYPH_WIDTH, ) * GLYPH_HEIGHT  # Character not found in font
+    return tuple(
+        ''.join(PIXEL if (col_value >> row_index) & 0x01 else ' ' for col_value in hex_columns)
+        for row_index in reversed(range(GLYPH_HEIGHT))
+    )
+
+
+@lru_cache(maxsize=256)
+def render_text(text: str) -> tuple[str, ...]:
+    "The rows of a whole string, one space between characters"
+    glyphs = [glyph_rows(char) for char in text]
+    return tuple(' '.join(glyph[row] for glyph in glyphs) for row in range(GLYPH_HEIGHT))
+
+
+def _draw_rows(screen, x, y, rows):
+    for row_index, row in enumerate(rows):
+        screen.addstr(y + row_index, x, row)
+
+
+def draw_char(screen, x, y, char):
+    _draw_rows(screen, x, y, glyph_rows(char))
 
 def calc_text_width(text, font_size: tuple[int, int] = (5, 7)):
     """
@@ -89,6 +105,20 @@ def draw_text(screen, x, y, text, align: str = "left"):
         text_width = calc_text_width(text)
         x = (width - text_width) // 2
 
-    for i, char in enumerate(text):
-        x_offset = i * 6
-        draw_char(screen, x + x_offset, y, char)
\ No newline at end of file
+    _draw_rows(screen, x, y, render_text(text))
+
+
+def tail_lines(messages: Iterable, count: int) -> list[str]:
+    """
+    The last `count` lines of a message log. Messages can be strings or
+    events and only the ones that end up on screen are turned into text.
+    """
+    lines = []
+    if count <= 0:
+        return lines
+    for msg in reversed(messages):
+        for line in reversed(str(msg).splitlines()):
+            lines.append(line)
+            if len(lines) == count:
+                return lines[::-1]
+    return lines[::-1]
@@ -0,0 +1,156 @@
+"""
+Encounter files describe the bosses of a battle:
+
+    {
+        "name": "Squirrel swarm",
+        "bosses": [
+            {"type": "squirrel", "count": 3, "hit_die": [2, 4]},
+            {"type": "wyrmling", "stats": {"dexterity": 12}, "resistances": ["cold"],
+             "abilities": ["bite"]}
+        ]
+    }
+
+TOML files use the same keys, with [[bosses]] tables.
+"""
+from typing import Any, Optional
+import json
+import os
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10
+    tomllib = None
+
+from .character import Boss, BossRegistry, Character, Stats
+from .ability import AbilityRegistry, EffectType
+from .game import BossBattle, unique_names
+from .roster import InvalidNameError, check_name
+
+
+class EncounterError(Exception):
+    pass
+
+
+class EncounterTemplate:
+    """
+    A compiled encounter. The bosses are built, overridden and named once;
+    every battle gets clones of them.
+    """
+    def __init__(self, name: str, bosses: list[Boss]):
+        self.name = name
+        self._prototypes = bosses
+
+    def __len__(self) -> int:
+        return len(self._prototypes)
+
+    def new_bosses(self) -> list[Boss]:
+        return [b.clone() for b in self._prototypes]
+
+    def new_battle(self, players: list[Character], **kwargs) -> BossBattle:
+        return BossBattle(players=players, bosses=self.new_bosses(), **kwargs)
+
+
+def _effect_types(entry: dict, key: str) -> list[EffectType]:
+    try:
+        return [EffectType(value.lower()) for value in entry.get(key, [])]
+    except ValueError as e:
+        raise EncounterError(f"{key}: {e}")
+
+
+def _build_boss(entry: dict) -> Boss:
+    BossClass = BossRegistry.registry.get(str(entry.get("type", "")).lower())
+    if BossClass is None:
+        raise EncounterError(f"unknown boss type {entry.get('type')!r}, choose from: {', '.join(BossRegistry.registry)}")
+    if BossClass.do_turn is Boss.do_turn:
+        raise EncounterError(f"boss type {entry['type']!r} can't take a turn yet")
+    boss = BossClass()
+
+    for stat, value in entry.get("stats", {}).items():
+        try:
+            setattr(boss._base_stats, Stats.Type(stat.lower()).value, int(value))
+        except ValueError:
+            raise EncounterError(f"unknown stat {stat!r}")
+    if "challenge_rating" in entry:
+        boss._level = int(entry["challenge_rating"])
+    if "hit_die" in entry:
+        num_dice, die_size = entry["hit_die"]
+        boss._hit_die = (int(num_dice), int(die_size))
+    boss._calculate_hp()  # constitution or hit die may have changed
+
+    for key in ("resistances", "vulnerabilities", "immunities"):
+        if key in entry:
+            setattr(boss, f"_{key}", _effect_types(entry, key))
+
+    if "abilities" in entry:
+        abilities = tuple(a.lower() for a in entry["abilities"])
+        unknown = [a for a in abilities if a not in AbilityRegistry.registry]
+        if unknown:
+            raise EncounterError(f"unknown abilities: {', '.join(unknown)}")
+        boss._ability_set = abilities
+
+    if "name" in entry:
+        try:
+            boss._name = check_name(str(entry["name"]))
+        except InvalidNameError as e:
+            raise EncounterError(f"name: {e}")
+    return boss
+
+
+def compile_encounter(data: dict[str, Any]) -> EncounterTemplate:
+    entries = data.get("bosses")
+    if not entries:
+        raise EncounterError("an encounter needs at least one boss")
+
+    bosses = []
+    named, unnamed = set(), set()
+    for entry in entries:
+        count = int(entry.get("count", 1))
+        if count < 1:
+            raise EncounterError(f"count must be at least 1, got {count}")
+        prototype = _build_boss(entry)
+        if "name" not in entry:
+            unnamed.add(prototype._name)
+        elif prototype._name in named:
+            raise EncounterError(f"more than one boss entry is named {prototype._name!r}")
+        else:
+            named.add(prototype._name)
+        bosses.append(prototype)
+        bosses.extend(prototype.clone() for _ in range(count - 1))
+
+    # a name override that matches another boss would get numbered along with it
+    clashes = named & unnamed
+    if clashes:
+        raise EncounterError(f"{', '.join(sorted(clashes))} is already the name of another boss")
+
+    # named here so BossBattle has nothing left to rename
+    for boss, name in zip(bosses, unique_names([b._name for b in bosses])):
+        boss._name = name
+
+    return EncounterTemplate(str(data.get("name", "")), bosses)
+
+
+def parse_encounter_file(path: str) -> dict[str, Any]:
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise EncounterError("TOML encounters need Python 3.11 or newer, use JSON instead")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# absolute path -> (modification time, template)
+_template_cache: dict[str, tuple[int, EncounterTemplate]] = {}
+
+
+def load_encounter(path: str) -> EncounterTemplate:
+    "Compiles an encounter file, reusing the last compile until the file changes"
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached: Optional[tuple[int, EncounterTemplate]] = _template_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    template = compile_encounter(parse_encounter_file(path))
+    _template_cache[path] = (mtime, template)
+    return template
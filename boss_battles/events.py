@@ -0,0 +1,91 @@
+from typing import Optional
+from enum import Enum
+from dataclasses import dataclass
+
+
+class EventKind(Enum):
+    HIT = 'hit'
+    MISS = 'miss'
+    COWER = 'cower'
+    HEAL = 'heal'
+    READY = 'ready'
+    AREA = 'area'
+    WRONG_TOKEN = 'wrong_token'
+
+
+@dataclass(frozen=True, slots=True)
+class CombatEvent:
+    """
+    A small record of one resolved action. The engine only fills in values;
+    turning it into text is left to whoever displays or exports it.
+    """
+    kind: EventKind
+    caster: str
+    ability: str            # ability identifier
+    ability_name: str
+    target: str
+    roll: int = 0
+    damage: int = 0
+    crit: bool = False
+    affinity: Optional[str] = None  # 'immune', 'resistant' or 'vulnerable'
+    ko: bool = False
+    solve_token: str = ""
+    trigger: str = ""       # what a readied action is waiting for
+    # area abilities sum up every target in one event
+    targets: int = 0
+    saves: int = 0
+    knocked_out: tuple[str, ...] = ()
+    # time.monotonic() the command was received and resolved, when it was traced
+    received_at: Optional[float] = None
+    resolved_at: Optional[float] = None
+
+    def __str__(self) -> str:
+        return format_event(self)
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind.value,
+            "caster": self.caster,
+            "ability": self.ability,
+            "target": self.target,
+            "roll": self.roll,
+            "damage": self.damage,
+            "crit": self.crit,
+            "affinity": self.affinity,
+            "ko": self.ko,
+            "targets": self.targets,
+            "saves": self.saves,
+            "knocked_out": list(self.knocked_out),
+        }
+
+
+def format_event(event: CombatEvent) -> str:
+    if event.kind is EventKind.COWER:
+        return f"{event.caster} COWERS before {event.target}"
+
+    if event.kind is EventKind.MISS:
+        return f"{event.caster}'s {event.ability_name} MISSES {event.target}."
+
+    if event.kind is EventKind.HEAL:
+        return f"{event.caster} heals {event.target} for {event.damage} ({event.ability_name})."
+
+    if event.kind is EventKind.READY:
+        return f"{event.caster} readies {event.ability_name} on {event.target} ({event.trigger})."
+
+    if event.kind is EventKind.AREA:
+        text = (f"{event.caster}'s {event.ability_name} hits {event.targets} {event.target} for {event.damage} total damage"
+                f" ({event.saves} saved).")
+        if len(event.knocked_out) > 3:
+            text += f"\n{len(event.knocked_out)} ARE DEFETED!"
+        elif event.knocked_out:
+            text += f"\n{', '.join(event.knocked_out)} {'IS' if len(event.knocked_out) == 1 else 'ARE'} DEFETED!"
+        return text
+
+    if event.kind is EventKind.WRONG_TOKEN:
+        return f"WRONG SOLVE TOKEN - {event.caster}/{event.ability} {event.solve_token}"
+
+    affinity = f" {event.affinity.upper()}" if event.affinity else ""
+    text = f"{event.caster} inflicts {event.damage}{' (CRIT)' if event.crit else ''} on {event.target} ({event.ability_name}){affinity}."
+    if event.ko:
+        text += f"\n{event.target} IS DEFETED!"
+    return text
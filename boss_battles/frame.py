@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class FrameStats:
+    "What a frame wrote to the terminal"
+    cells: int = 0      # characters written
+    bytes: int = 0      # UTF-8 bytes of the text written, not counting cursor moves
+    writes: int = 0     # addstr calls
+
+    def __iadd__(self, other: 'FrameStats') -> 'FrameStats':
+        self.cells += other.cells
+        self.bytes += other.bytes
+        self.writes += other.writes
+        return self
+
+
+class Canvas:
+    """
+    An in-memory panel: rows of characters with an attribute per cell. Panels
+    draw into it with the same calls they would use on a curses window, and
+    only the differences from the last frame are written to the real one.
+    Text that does not fit is cut off instead of wrapping.
+    """
+    def __init__(self, height: int, width: int):
+        self._height = height
+        self._width = width
+        self.chars = [[' '] * width for _ in range(height)]
+        self.attrs = [[0] * width for _ in range(height)]
+
+    def getmaxyx(self) -> tuple[int, int]:
+        return (self._height, self._width)
+
+    def erase(self) -> None:
+        for y in range(self._height):
+            self.chars[y] = [' '] * self._width
+            self.attrs[y] = [0] * self._width
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        if not 0 <= y < self._height or x >= self._width:
+            return
+        if x < 0:
+            text = text[-x:]
+            x = 0
+        text = text[:self._width - x]
+        end = x + len(text)
+        self.chars[y][x:end] = text
+        self.attrs[y][x:end] = [attr] * len(text)
+
+    def addch(self, y: int, x: int, char: str, attr: int = 0) -> None:
+        self.addstr(y, x, char, attr)
+
+    def border(self) -> None:
+        height, width = self._height, self._width
+        if height < 2 or width < 2:
+            return
+        self.addstr(0, 0, '┌' + '─' * (width - 2) + '┐')
+        for y in range(1, height - 1):
+            self.addstr(y, 0, '│')
+            self.addstr(y, width - 1, '│')
+        self.addstr(height - 1, 0, '└' + '─' * (width - 2) + '┘')
+
+    def row_text(self, y: int) -> str:
+        return ''.join(self.chars[y])
+
+
+def _runs(chars: list[str], attrs: list[int], start: int, end: int):
+    "Splits chars[start:end] into (x, text, attr) runs of one attribute"
+    run_start = start
+    for x in range(start + 1, end + 1):
+        if x == end or attrs[x] != attrs[run_start]:
+            yield run_start, ''.join(chars[run_start:x]), attrs[run_start]
+            run_start = x
+
+
+def write_changes(window, frame: Canvas, previous: Canvas) -> FrameStats:
+    """
+    Writes the cells of frame that differ from previous, what the window shows
+    now, to window. For each changed row only the span from its first to its
+    last changed cell is written.
+    """
+    stats = FrameStats()
+    for y in range(frame.getmaxyx()[0]):
+        chars, attrs = frame.chars[y], frame.attrs[y]
+        old_chars, old_attrs = previous.chars[y], previous.attrs[y]
+        if chars == old_chars and attrs == old_attrs:
+            continue
+        first = 0
+        while chars[first] == old_chars[first] and attrs[first] == old_attrs[first]:
+            first += 1
+        last = len(chars) - 1
+        while chars[last] == old_chars[last] and attrs[last] == old_attrs[last]:
+            last -= 1
+
+        for x, text, attr in _runs(chars, attrs, first, last + 1):
+            window.addstr(y, x, text, attr)
+            stats.cells += len(text)
+            stats.bytes += len(text.encode('utf-8'))
+            stats.writes += 1
+    return stats
@@ -1,15 +1,21 @@
 from typing import Any, Optional, Type, Tuple
+from concurrent.futures import Executor, Future, wait
+from array import array
+from collections import deque, Counter
+from dataclasses import replace
 import random
 import logging
+import time
 
 
 from .command import Command
 from .character import Character, Boss, Player, Stats
-from .ability import AbilityRegistry, Ability, EffectType
-
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+from .ability import AbilityRegistry, Ability, EffectType, PuzzleAbility, AreaAbility
+from .tokens import OpportunityTokenStore
+from .table import CombatantTable
+from .events import CombatEvent, EventKind
+from .reactions import Reaction, ReactionDispatcher, HEALTH_BELOW
+from .log import logger, log_event
 
 
 class InvalidTargetError(Exception):
@@ -21,9 +27,91 @@ class InvalidAbilityError(Exception):
 class TurnAlreadyTakenError(Exception):
     pass
 
+class InvalidReactionError(Exception):
+    pass
+
+class AnswerPendingError(Exception):
+    "The puzzle answer needed to verify a command is still being worked out"
+    pass
+
+
+class ConsciousIndex:
+    """
+    Live set of conscious characters.
+    Kept up to date through Character health listeners so membership,
+    size and random picks are all O(1).
+    """
+    def __init__(self, characters: list[Character] = ()):
+        self._characters: list[Character] = []
+        self._positions: dict[Character, int] = {}
+        for c in characters:
+            self.update(c)
+
+    def __len__(self) -> int:
+        return len(self._characters)
+
+    def __contains__(self, character: Character) -> bool:
+        return character in self._positions
+
+    def __iter__(self):
+        return iter(self._characters)
+
+    def update(self, character: Character, previous_health: int = None) -> None:
+        if character.is_conscious():
+            self._add(character)
+        else:
+            self._discard(character)
+
+    def _add(self, character: Character) -> None:
+        if character in self._positions:
+            return
+        self._positions[character] = len(self._characters)
+        self._characters.append(character)
+
+    def _discard(self, character: Character) -> None:
+        position = self._positions.pop(character, None)
+        if position is None:
+            return
+        # swap the last character into the hole so removal is O(1)
+        last = self._characters.pop()
+        if last is not character:
+            self._characters[position] = last
+            self._positions[last] = position
+
+    def choice(self) -> Optional[Character]:
+        if not self._characters:
+            return None
+        return random.choice(self._characters)
+
+
+def unique_names(names: list[str]) -> list[str]:
+    """
+    Numbers every name that appears more than once, in order, skipping
+    numbers that would clash with another name, e.g. a literal squirrel1
+    """
+    counts = Counter(names)
+    used = set(names)
+    seen: dict[str, int] = {}
+    result = []
+    for name in names:
+        if counts[name] > 1:
+            number = seen.get(name, 0) + 1
+            while f"{name}{number}" in used:
+                number += 1
+            seen[name] = number
+            name = f"{name}{number}"
+            used.add(name)
+        result.append(name)
+    return result
+
 
 class BossBattle:
-    def __init__(self, players: list[Character], bosses: list[Character]):
+    def __init__(self,
+                 players: list[Character],
+                 bosses: list[Character],
+                 token_grace_rounds: int = 1,
+                 answer_executor: Optional[Executor] = None,
+                 combatant_table: Optional[CombatantTable] = None):
         # TODO: need a check to ensure all players and bosses have a unique name, or give them one like boss1, boss2.
         
         # Dictionary indexed by player name
@@ -32,39 +120,70 @@ class BossBattle:
         # self._all_player_names: set[str] = set(p._name for p in players)
 
         # Dictionary indexed by boss name
-        # Need to assign unique names to bosses of same type
-        boss_type_registry = {}
-        # dict[Type, list[Character]]
-
+        # bosses sharing a name are numbered: squirrel1, squirrel2
         self._bosses = {}
+        for b, name in zip(bosses, unique_names([b._name for b in bosses])):
+            b._name = name
+            self._bosses[name] = b
+
+        self._boss_tokens = OpportunityTokenStore(self._bosses.keys(), grace_rounds=token_grace_rounds)
+
+        # optional column store for bulk queries over big rosters
+        self._table = combatant_table
+        if self._table is not None:
+            for c in (*self._players.values(), *self._bosses.values()):
+                self._table.bind(c)
+            self._boss_rows = [self._table.row(name) for name in self._bosses]
+
+        # (boss name, ability identifier) -> accepted solve tokens, rebuilt every round
+        self._solve_answers: dict[tuple[str, str], frozenset[str]] = {}
+        # (boss name, ability identifier) -> puzzle answers still being worked out
+        self._pending_answers: dict[tuple[str, str], tuple[Future, ...]] = {}
+        # (ability identifier, opportunity token) -> answer, kept while the token is valid
+        self._answer_cache: dict[tuple[str, str], Any] = {}
+        self._answer_executor = answer_executor
+
+        self._conscious_players = ConsciousIndex(players)
+        self._conscious_bosses = ConsciousIndex(bosses)
+        for p in players:
+            p.add_health_listener(self._conscious_players.update)
         for b in bosses:
-            try:
-                boss_type_registry[type(b)].append(b)
-            except KeyError:
-                boss_type_registry[type(b)] = [b]
-            else:
-                b._name += str(len(boss_type_registry[type(b)]))
-
-                # if more than one, need to go back and change the first one's name
-                if len(boss_type_registry[type(b)]) == 2:
-                    first_boss_of_type = boss_type_registry[type(b)][0]
-                    prev_ident = first_boss_of_type._name
-                    new_ident = first_boss_of_type._name + "1"
-                    first_boss_of_type._name = new_ident
-                    self._bosses[new_ident] = first_boss_of_type
-                    del self._bosses[prev_ident]
-            
-            self._bosses[b._name] = b
+            b.add_health_listener(self._conscious_bosses.update)
 
-        self._boss_tokens = {}
-        for boss_name in self._bosses.keys():
-            self._boss_tokens[boss_name] = []
+        # readied actions, armed for the current round
+        self._reactions = ReactionDispatcher()
+        self._triggered_reactions: deque[Reaction] = deque()
+        self._reaction_events: list[CombatEvent] = []
+        self._resolving_reactions = False
+        for c in (*players, *bosses):
+            c.add_health_listener(self._on_health_changed)
 
         # self._all_character_names: set[str] = set(b._name for b in bosses) | self._all_player_names
         self._round_count = 0
 
-        self._players_who_have_acted = set()
+        # each player gets a dense slot; they have acted this turn when their
+        # slot holds the current turn number, so a reset is just a new number
+        self._player_slots = {name: i for i, name in enumerate(self._players)}
+        self._last_acted_turn = array('l', [-1]) * len(self._player_slots)
+        self._turn_number = 0
     
+    @property
+    def combatant_table(self) -> Optional[CombatantTable]:
+        return self._table
+
+    def total_health(self, bosses: bool) -> int:
+        "Remaining health of every boss or of every player"
+        if self._table is not None:
+            return self._table.total_health(bosses)
+        characters = self._bosses if bosses else self._players
+        return sum(c.get_health() for c in characters.values())
+
+    def boss_healths(self) -> tuple[int, ...]:
+        "Health of every boss, in order, read from the boss rows only"
+        if self._table is not None:
+            return self._table.health_at(self._boss_rows)
+        return tuple(b.get_health() for b in self._bosses.values())
+
     @property
     def players(self) -> tuple[Character]:
         return tuple(self._players.values())
@@ -78,13 +197,32 @@ class BossBattle:
 
     def get_boss(self, name: str) -> Character:
         return self._bosses[name]
+
+    @property
+    def conscious_players(self) -> ConsciousIndex:
+        return self._conscious_players
+
+    @property
+    def conscious_bosses(self) -> ConsciousIndex:
+        return self._conscious_bosses
+
+    def random_conscious_player(self) -> Optional[Character]:
+        return self._conscious_players.choice()
     
     def next_round(self) -> bool:
         if not self._should_continue():
             return False
         
         self._round_count += 1
+        self.reset_turns()
+        self._reactions.clear()
         self._generate_opportunity_tokens()
+        self._build_answer_table()
+        if logger.isEnabledFor(logging.INFO):
+            log_event(logging.INFO, "round_started", "Round %d", self._round_count,
+                      round=self._round_count,
+                      bosses=len(self._conscious_bosses),
+                      players=len(self._conscious_players))
         
         return True
 
@@ -93,8 +231,105 @@ class BossBattle:
             if not boss.is_conscious():
                 continue
             token = BossBattle.generate_opportunity_token(boss._opportunity_token_length)
-            self._boss_tokens[boss._name].append(token)
+            self._boss_tokens.set_token(boss._name, token)
+        self._boss_tokens.start_round()
     
+    def _build_answer_table(self):
+        """
+        Precomputes the accepted solve tokens for every (boss, ability) pair
+        so verifying a player's command is a dictionary lookup.
+        Abilities that override verify are checked when used instead.
+
+        Puzzle answers are handed to the answer executor, if there is one,
+        and picked up once they are done. Without one they are worked out here,
+        between rounds, so the player turn never waits on puzzle maths.
+        """
+        abilities = [(ident, AbilityClass()) for ident, AbilityClass in AbilityRegistry.registry.items()
+                     if AbilityClass.verify is Ability.verify]
+        cache = {}
+        answers = {}
+        pending = {}
+        for boss in self._conscious_bosses:
+            op_tokens = self._boss_tokens.valid_tokens(boss._name)
+            for ident, ability in abilities:
+                results = []
+                for op_token in op_tokens:
+                    key = (ident, op_token)
+                    result = cache.get(key)
+                    if result is None:
+                        result = self._answer_cache.get(key)
+                    if result is None:
+                        result = self._compute_answer(ability, op_token)
+                    if result is not None:
+                        cache[key] = result
+                    results.append(result)  # one per token, _collect_answers pairs them up
+
+                if any(isinstance(r, Future) for r in results):
+                    pending[(boss._name, ident)] = tuple(results)
+                else:
+                    answers[(boss._name, ident)] = frozenset(r for r in results if r is not None)
+
+        # answers for tokens that fell out of the grace window are dropped
+        self._answer_cache = cache
+        self._solve_answers = answers
+        self._pending_answers = pending
+
+    def _compute_answer(self, ability: Ability, op_token: str) -> Any:
+        "The answer, a Future for it, or None when the ability failed to work it out"
+        if self._answer_executor is not None and isinstance(ability, PuzzleAbility):
+            return self._answer_executor.submit(ability.algorithm, op_token)
+        try:
+            return ability.algorithm(op_token)
+        except Exception:
+            logger.exception("Working out the %s answer for %s failed", ability.identifier, op_token)
+            return None
+
+    @staticmethod
+    def _future_answer(future: Future, ident: str, op_token: str) -> Any:
+        try:
+            return future.result()
+        except Exception:
+            logger.exception("Working out the %s answer for %s failed", ident, op_token)
+            return None
+
+    def answers_ready(self) -> bool:
+        return all(f.done() for results in self._pending_answers.values()
+                   for f in results if isinstance(f, Future))
+
+    def wait_for_answers(self, timeout: Optional[float] = None) -> bool:
+        "Blocks until every puzzle answer for this round has been worked out, or timeout. Returns whether they were"
+        futures = [f for results in self._pending_answers.values() for f in results if isinstance(f, Future)]
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def _verify_solve_token(self, target: Boss, ability: Ability, solve_token: str) -> bool:
+        key = (target._name, ability.identifier.lower())
+        if key in self._pending_answers:
+            self._collect_answers(key)
+
+        answers = self._solve_answers.get(key)
+        if answers is not None:
+            return solve_token in answers
+
+        # abilities with their own verify, e.g. punch, are checked against every valid token
+        return any(ability.verify(op_token, solve_token) for op_token in self._boss_tokens.valid_tokens(target._name))
+
+    def _collect_answers(self, key: tuple[str, str]) -> None:
+        results = self._pending_answers[key]
+        if not all(not isinstance(r, Future) or r.done() for r in results):
+            raise AnswerPendingError(f"Still working out the answers for {key[1]} on {key[0]}.")
+
+        ident = key[1]
+        values = []
+        for op_token, result in zip(self._boss_tokens.valid_tokens(key[0]), results):
+            # a puzzle that failed has no answer, so nobody can solve it this round
+            value = self._future_answer(result, ident, op_token) if isinstance(result, Future) else result
+            if value is not None:
+                self._answer_cache[(ident, op_token)] = value
+                values.append(value)
+        self._solve_answers[key] = frozenset(values)
+        del self._pending_answers[key]
+
     @staticmethod
     def generate_opportunity_token(self, length: int = 4):
         characters = "abcedfghijkmnpqrstuvwxyz0123456789"
@@ -103,27 +338,31 @@ class BossBattle:
     
     def get_round(self) -> int:
         return self._round_count
+
+    def has_acted(self, player_name: str) -> bool:
+        return self._last_acted_turn[self._player_slots[player_name]] == self._turn_number
+
+    def reset_turns(self) -> None:
+        "Lets every player act again. Called at the start of every round."
+        self._turn_number += 1
     
     def _should_continue(self) -> bool:
-        if len(BossBattle._filter_active(self._bosses.values())) < 1:
-            return False
+        return len(self._conscious_bosses) > 0 and len(self._conscious_players) > 0
 
-        if len(BossBattle._filter_active(self._players.values())) < 1:
-            return False
-        
-        return True
-        
-    @staticmethod
-    def _filter_active(characters: list[Character]) -> list[Character]:
-        return [c for c in characters if c.is_conscious()]
-
-    def get_opportunity_tokens(self) -> list[str]:
-        return [name + ":" + tokens[-1] for name, tokens in self._boss_tokens.items()]
+    def get_opportunity_tokens(self) -> tuple[str, ...]:
+        return self._boss_tokens.formatted_tokens()
 
     def get_opportunity_token(self, boss: Boss) -> str:
-        return self._boss_tokens[boss._name][-1]
+        return self._boss_tokens.get_token(boss._name)
             
-    def handle_action(self, m: Command) -> str:
+    def handle_action(self, m: Command) -> CombatEvent:
+        "Resolves a player's command. Commands with a receive time pass it on to the event with the time it was resolved."
+        event = self._handle_action(m)
+        if m.received_at is not None:
+            event = replace(event, received_at=m.received_at, resolved_at=time.monotonic())
+        return event
+
+    def _handle_action(self, m: Command) -> CombatEvent:
         # TODO: should This be here or just raise error when we try to apply the action?
         # if not self._player_is_registered(m.user):
         #     # TODO: problem: fails silently, possible to collect all invalid and print at the end? 
@@ -134,29 +373,100 @@ class BossBattle:
         #     continue
 
         caster = self._players[m.user]
-        try:
-            target = self._bosses[m.target]
-        except KeyError:
+        if m.action in ("readyfor", "await"):
+            return self._ready_reaction(caster, m)
+
+        if m.target not in self._bosses and m.target not in self._players:
             raise InvalidTargetError(f"Character named '{m.target}' does not exist.")
         
         ability: Ability = BossBattle.get_ability(m.action)
+        target = self._resolve_target(m.target, ability)
         
         # print(ability.identifier)
         if type(caster) is Player:
-            if caster._name in self._players_who_have_acted:
+            if self.has_acted(caster._name):
                 raise TurnAlreadyTakenError(f"'{caster._name}' has already acted this round.")
             try:
                 solve_token = m.args[0]
             except IndexError:  # abilities like "Punch" don't require a solve token
                 solve_token = ""
 
-            if not ability.verify(self.get_opportunity_token(target), solve_token):
-                return f"WRONG SOLVE TOKEN - {caster._name}/{ability.identifier} {solve_token}"
+            if isinstance(target, Boss):
+                verified = self._verify_solve_token(target, ability, solve_token)
+            else:
+                # players have no opportunity token of their own
+                verified = ability.verify("", solve_token)
+            if not verified:
+                return CombatEvent(EventKind.WRONG_TOKEN, caster._name, ability.identifier, ability.name, target._name,
+                                   solve_token=solve_token)
         
-            self._players_who_have_acted.add(caster._name)
+            self._last_acted_turn[self._player_slots[caster._name]] = self._turn_number
 
         return self._apply_action(caster, ability, target)
 
+    def _resolve_target(self, name: str, ability: Ability) -> Character:
+        "Heals go to players, every other ability to bosses"
+        if ability.heals:
+            if name in self._bosses:
+                raise InvalidTargetError(f"{ability.name} can only be used on players.")
+            return self._players[name]
+        if name in self._players:
+            raise InvalidTargetError(f"{ability.name} can only be used on bosses.")
+        return self._bosses[name]
+
+    def _ready_reaction(self, caster: Character, m: Command) -> CombatEvent:
+        """
+        Arms a readied action for the rest of the round. Readying uses up the player's turn.
+            player1@squirrel/readyfor cower punch
+            player1@squirrel/readyfor cower lsword solvetoken
+            mrhealz@player1/readyfor healthbelow 5 cure
+        """
+        if m.target not in self._bosses and m.target not in self._players:
+            raise InvalidTargetError(f"Character named '{m.target}' does not exist.")
+
+        args = list(m.args)
+        try:
+            trigger = args.pop(0).lower()
+            threshold = int(args.pop(0)) if trigger == HEALTH_BELOW else 0
+            ability_ident = args.pop(0)
+        except (IndexError, ValueError):
+            raise InvalidReactionError(f"Invalid readyfor from '{caster._name}'. Try: readyfor <ability> <reaction> [token]")
+        solve_token = args[0] if args else ""
+
+        if trigger != HEALTH_BELOW:
+            BossBattle.get_ability(trigger)  # the trigger has to be a real ability
+        ability = BossBattle.get_ability(ability_ident)
+        target = self._resolve_target(m.target, ability)
+
+        if self.has_acted(caster._name):
+            raise TurnAlreadyTakenError(f"'{caster._name}' has already acted this round.")
+
+        if target._name in self._bosses:
+            verified = self._verify_solve_token(target, ability, solve_token)
+        else:
+            # players have no opportunity token of their own
+            verified = ability.verify("", solve_token)
+        if not verified:
+            return CombatEvent(EventKind.WRONG_TOKEN, caster._name, ability.identifier, ability.name, target._name,
+                               solve_token=solve_token)
+
+        self._last_acted_turn[self._player_slots[caster._name]] = self._turn_number
+        self._reactions.arm(Reaction(caster, ability, target, trigger, target._name, threshold))
+        description = f"{trigger} {threshold}" if trigger == HEALTH_BELOW else trigger
+        return CombatEvent(EventKind.READY, caster._name, ability.identifier, ability.name, target._name,
+                           trigger=description)
+
+    def _on_health_changed(self, character: Character, previous_health: int) -> None:
+        if len(self._reactions) == 0:
+            return
+        self._triggered_reactions.extend(self._reactions.health_changed(character))
+
+    def pop_reaction_events(self) -> list[CombatEvent]:
+        "Events from readied actions that fired since the last call"
+        events = self._reaction_events
+        self._reaction_events = []
+        return events
+
     @staticmethod
     def get_ability(ability_name: str) -> Ability:
         ChosenAbility = AbilityRegistry.registry.get(ability_name)
@@ -172,26 +482,52 @@ class BossBattle:
         return name in self._bosses.keys()
 
 
-    def _apply_action(self, caster: Character, chosen_ability: Ability, target: Character) -> str:
+    def _apply_action(self, caster: Character, chosen_ability: Ability, target: Character) -> CombatEvent:
+        event = self._resolve_action(caster, chosen_ability, target)
+
+        if len(self._reactions) > 0:
+            self._triggered_reactions.extend(self._reactions.ability_used(caster._name, chosen_ability.identifier))
+
+        # reactions can set off more reactions, so only the outermost action works through them
+        if self._triggered_reactions and not self._resolving_reactions:
+            self._resolving_reactions = True
+            try:
+                while self._triggered_reactions:
+                    reaction = self._triggered_reactions.popleft()
+                    if not reaction.reactor.is_conscious():
+                        continue
+                    if not reaction.ability.heals and not reaction.target.is_conscious():
+                        continue
+                    self._reaction_events.append(self._apply_action(reaction.reactor, reaction.ability, reaction.target))
+            finally:
+                self._resolving_reactions = False
+
+        return event
+
+    def _resolve_action(self, caster: Character, chosen_ability: Ability, target: Character) -> CombatEvent:
         if type(chosen_ability) is AbilityRegistry.registry.get('cower'):
             # TODO: perhaps impart a disadvantage to the caster
-            return f"{caster._name} COWERS before {target._name}"
-        
-        # TODO: implement ready state waiting for a trigger
-        """
-        await, ready, readyfor?
-        player1@squirrel/readyfor cower punch
-        player1@battlemage/await fireball shieldslam
-        mrhealz@player1/readyfor healthbelow 5 heal  # can help against multiple attacks from bosses
-        """
+            return CombatEvent(EventKind.COWER, caster._name, chosen_ability.identifier, chosen_ability.name, target._name)
+
+        if chosen_ability.heals:
+            amount = BossBattle.damage_roll(
+                effect_die=chosen_ability.effect_die,
+                ability_modifier=Stats.calc_modifier(caster.stats.get(chosen_ability.modifier_type)),
+                crit=False
+            )
+            target.heal(amount)
+            return CombatEvent(EventKind.HEAL, caster._name, chosen_ability.identifier, chosen_ability.name, target._name,
+                               damage=amount)
+
+        if isinstance(chosen_ability, AreaAbility):
+            return self._resolve_area_action(caster, chosen_ability)
 
         # hit roll
-        # print(chosen_ability)
         hit_roll, crit = BossBattle.hit_roll(caster, chosen_ability.modifier_type)
-        # logging.info(f"{caster._name} rolled {hit_roll}.{' CRIT!' if crit else ''} ")
 
         if not BossBattle.is_hit(crit, hit_roll, target):
-            return f"{caster._name}'s {chosen_ability.name} MISSES {target._name}."
+            return CombatEvent(EventKind.MISS, caster._name, chosen_ability.identifier, chosen_ability.name, target._name,
+                               roll=hit_roll)
 
         # damage roll   
         ability_modifier = Stats.calc_modifier(caster.stats.get(chosen_ability.modifier_type))
@@ -204,24 +540,67 @@ class BossBattle:
         # check resistances/immunity
         ability_effect_type = chosen_ability.effect_type
         actual_damage = BossBattle.calc_actual_damage(target, damage_roll, ability_effect_type)
-        
 
         # apply damage
         target.take_damage(actual_damage)
-        effect_reaction_string = ""
-        if target.is_immune_to(ability_effect_type):
-            effect_reaction_string = " IMMUNE"
-        elif target.is_resistant_to(ability_effect_type):
-            effect_reaction_string = " RESISTANT"
-        elif target.is_vulnerable_to(ability_effect_type):
-            effect_reaction_string = " VULNERABLE"
-
-        log_string = f"{caster._name} inflicts {actual_damage}{' (CRIT)' if crit else ''} on {target._name} ({chosen_ability.name}){effect_reaction_string}."
-
-        if not target.is_conscious():
-            log_string += f"\n{target._name} IS DEFETED!"
-        
-        return log_string
+
+        return CombatEvent(EventKind.HIT, caster._name, chosen_ability.identifier, chosen_ability.name, target._name,
+                           roll=hit_roll,
+                           damage=actual_damage,
+                           crit=crit,
+                           affinity=BossBattle.affinity(target, ability_effect_type),
+                           ko=not target.is_conscious())
+
+    def _resolve_area_action(self, caster: Character, chosen_ability: AreaAbility) -> CombatEvent:
+        "Rolls damage once and applies it to every conscious enemy of the caster in one pass"
+        enemies = self._conscious_players if isinstance(caster, Boss) else self._conscious_bosses
+        targets = list(enemies)  # taking damage changes the index
+
+        ability_modifier = Stats.calc_modifier(caster.stats.get(chosen_ability.modifier_type))
+        damage_roll = BossBattle.damage_roll(
+            effect_die=chosen_ability.effect_die,
+            ability_modifier=ability_modifier,
+            crit=False
+        )
+        save_dc = 8 + caster.get_proficiency_bonus() + ability_modifier
+        half_damage = damage_roll // 2
+        effect_type = chosen_ability.effect_type
+        save_type = chosen_ability.save_type
+
+        total_damage = 0
+        saves = 0
+        knocked_out = []
+        for target in targets:
+            save_roll = BossBattle.roll(1, 20) + Stats.calc_modifier(target.stats.get(save_type))
+            if save_roll >= save_dc:
+                saves += 1
+                damage = half_damage
+            else:
+                damage = damage_roll
+            damage = BossBattle.calc_actual_damage(target, damage, effect_type)
+            target.take_damage(damage)
+            total_damage += damage
+            if not target.is_conscious():
+                knocked_out.append(target._name)
+
+        return CombatEvent(EventKind.AREA, caster._name, chosen_ability.identifier, chosen_ability.name,
+                           "players" if isinstance(caster, Boss) else "bosses",
+                           roll=damage_roll,
+                           damage=total_damage,
+                           ko=len(knocked_out) > 0,
+                           targets=len(targets),
+                           saves=saves,
+                           knocked_out=tuple(knocked_out))
+
+    @staticmethod
+    def affinity(target: Character, effect_type: EffectType) -> Optional[str]:
+        if target.is_immune_to(effect_type):
+            return 'immune'
+        elif target.is_resistant_to(effect_type):
+            return 'resistant'
+        elif target.is_vulnerable_to(effect_type):
+            return 'vulnerable'
+        return None
 
     @staticmethod
     def is_hit(is_crit: bool, hit_roll: int, target: Character) -> bool:
@@ -231,13 +610,19 @@ class BossBattle:
     @staticmethod
     def calc_actual_damage(target: Character, damage: int, effect_type: EffectType) -> int:
         if target.is_resistant_to(effect_type):
-            logging.info(f"{target._name} is RESISTANT to {effect_type.value}! (damage halved)")
+            if logger.isEnabledFor(logging.INFO):
+                log_event(logging.INFO, "resisted", "%s is RESISTANT to %s! (damage halved)",
+                          target._name, effect_type.value, target=target._name, effect=effect_type.value, damage=damage)
             return damage // 2
         elif target.is_vulnerable_to(effect_type):
-            logging.info(f"{target._name} is VULNERABLE to {effect_type.value}! (damage doubled)")
+            if logger.isEnabledFor(logging.INFO):
+                log_event(logging.INFO, "vulnerable", "%s is VULNERABLE to %s! (damage doubled)",
+                          target._name, effect_type.value, target=target._name, effect=effect_type.value, damage=damage)
             return damage * 2
         elif target.is_immune_to(effect_type):
-            logging.info(f"{target._name} is IMMUNE to {effect_type.value}! (no damage done)")
+            if logger.isEnabledFor(logging.INFO):
+                log_event(logging.INFO, "immune", "%s is IMMUNE to %s! (no damage done)",
+                          target._name, effect_type.value, target=target._name, effect=effect_type.value, damage=damage)
             return 0
         return damage
 
@@ -258,13 +643,17 @@ class BossBattle:
 
     @staticmethod
     def hit_roll(caster: Character, ability_modifier: Stats.Type) -> Tuple[int, bool]:
-        log_string = ""
-        caster_ability_points = caster.stats.get(ability_modifier)
-        attack_modifier = Stats.calc_modifier(caster_ability_points)
         roll = BossBattle.roll(1, 20)
         crit = roll == 20
+        return (roll + BossBattle.attack_bonus(caster, ability_modifier), crit)
+
+    @staticmethod
+    def attack_bonus(caster: Character, ability_modifier: Stats.Type) -> int:
+        "The flat bonus added to a caster's d20 hit roll"
+        caster_ability_points = caster.stats.get(ability_modifier)
+        attack_modifier = Stats.calc_modifier(caster_ability_points)
         proficiency_bonus = caster.get_proficiency_bonus()  # TODO: factor in if caster is ACTUALLY proficient
-        return (roll + attack_modifier + proficiency_bonus, crit)
+        return attack_modifier + proficiency_bonus
 
     @staticmethod
     def roll(num_rolls: int, die_size: int) -> int:
@@ -284,27 +673,29 @@ class BossBattle:
         # Medium armor: AC 13 + min(Dex modifier, 2)
         # Heavy armor: AC of item, no dex modifier
     
-    def players_turn(self, actions: tuple[Player, str, Boss, str]):
-        log_string = ""
+    def players_turn(self, actions: tuple[Player, str, Boss, str]) -> list[CombatEvent]:
+        events = []
         for caster, ability_ident, target, solve_token in actions:
             chosen_ability = AbilityRegistry.registry.get(ability_ident)()
             op_token = self.get_opportunity_token(target)
-            # print(solve_token)
-            # print(chosen_ability.verify(op_token, solve_token))
             if chosen_ability.verify(op_token, solve_token):
-                log_string += self._apply_action(caster, chosen_ability, target) + "\n"
+                events.append(self._apply_action(caster, chosen_ability, target))
             else:
-                log_string += f"{caster._name.upper()}: WRONG SOLVE TOKEN!"
-        return log_string
+                events.append(CombatEvent(EventKind.WRONG_TOKEN, caster._name, chosen_ability.identifier,
+                                          chosen_ability.name, target._name, solve_token=solve_token))
+        return events
 
-    def bosses_turn(self):
-        log_string = ""
+    def bosses_turn(self) -> list[CombatEvent]:
+        events = []
         for boss in self._bosses.values():
             # caster, ability identifier, target
             if not boss.is_conscious():
                 continue
+            if not self._conscious_players:
+                break
             caster, ability_ident, target = boss.do_turn(self)
             ChosenAbility = AbilityRegistry.registry.get(ability_ident)
-            log_string += self._apply_action(caster, ChosenAbility(), target) + "\n"
+            events.append(self._apply_action(caster, ChosenAbility(), target))
+            events.extend(self.pop_reaction_events())
             
-        return log_string
+        return events
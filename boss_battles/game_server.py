@@ -1,14 +1,23 @@
 import serial
 from typing import Protocol, Optional
+from concurrent.futures import Executor
 import time
-import curses
-import itertools
+import logging
 
-from .character import Boss, Player
-from .game import BossBattle, InvalidTargetError, TurnAlreadyTakenError
+from .character import Boss
+from .table import CombatantTable
+from .roster import RosterBuilder, AlreadyRegisteredError, InvalidClassError, InvalidNameError, parse_class
+from .game import BossBattle, InvalidTargetError, InvalidAbilityError, InvalidReactionError, TurnAlreadyTakenError, AnswerPendingError, unique_names
 from .utils import print_health_list, print_health_bar
-from .command import InvalidActionStringError, Command
-from .display import draw_char, draw_text, calc_text_width
+from .command import InvalidActionStringError, Command, ReceivedLine
+from .display import draw_char, draw_text, calc_text_width, tail_lines
+from .layout import PanelLayout, Panel, MessageLog
+from .renderers import Renderer, CursesRenderer
+from .spectator import SpectatorFeed
+from .widgets import VirtualList, HealthBars
+from .instrument import Instrumentation
+from .latency import LatencyTracker
+from .log import logger, log_event
 
 
 class Reader(Protocol):
@@ -40,7 +49,9 @@ class SerialReader:
     def read(self) -> list[str]:
         messages = []
         while self.ser.in_waiting > 0:
-            message = self.ser.readline().decode('utf-8').strip()
+            line = self.ser.readline()
+            received_at = time.monotonic()
+            message = ReceivedLine(line.decode('utf-8').strip(), received_at)
             messages.append(message)
             # print(f"received: {message}")
         return messages
@@ -56,13 +67,33 @@ Phases
 """
 
 class GameServer:
-    def __init__(self, bosses: list[Boss], reader: Optional[Reader] = None, player_turn_time_seconds: int = 10, stdscr = None):
+    def __init__(self,
+                 bosses: list[Boss],
+                 reader: Optional[Reader] = None,
+                 player_turn_time_seconds: int = 10,
+                 stdscr = None,
+                 renderer: Optional[Renderer] = None,
+                 spectators: Optional[SpectatorFeed] = None,
+                 answer_executor: Optional[Executor] = None,
+                 log_size: int = 200,
+                 combatant_table: bool = False,
+                 roster: Optional[RosterBuilder] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 answer_wait_seconds: float = 2.0,
+                 debug_sender: Optional[str] = None):
         self._bosses = bosses
         if reader is None:
             reader = SerialReader()
         self._reader = reader
         self._action_strings = []
-        self._registered_usernames = set()
+        self._roster = roster if roster is not None else RosterBuilder()
+        # the bosses' names as given and as numbered when the battle starts
+        boss_names = [b._name for b in bosses]
+        self._roster.reserve([*boss_names, *unique_names(boss_names)])
+        self._registration_list = VirtualList(self._roster.names)
+        self._player_list: Optional[VirtualList] = None
+        self._player_health_version = 0
+        self._health_bars = HealthBars()
         self._battle = None
         self._current_phase = self._registration_phase
         self._battle_phases = [
@@ -74,10 +105,28 @@ class GameServer:
         self._player_turn_time = player_turn_time_seconds
         self._player_timer_start = 0.0
         
-        self._stdscr = stdscr
-        self._battle_messages = []
+        # combat events and messages, only turned into text when displayed
+        self._battle_messages = MessageLog(maxlen=log_size)
         self._battle_messages_bosses = []
-        self._error_messages = []
+        self._error_messages = MessageLog(maxlen=log_size)
+
+        # puzzle answers are worked out here so the player turn never waits on them
+        self._answer_executor = answer_executor
+        self._answer_wait_seconds = answer_wait_seconds
+        self._combatant_table = combatant_table
+        self._deferred_commands = []
+        # hot path timings, shown on screen when debug_sender sends "debug"
+        self._instrumentation = instrumentation
+        self._debug_command = f"{debug_sender}/debug".lower() if debug_sender else None
+        self._show_debug_panel = False
+        # how long commands take from the reader to the combat log
+        self._latency = LatencyTracker()
+        # panels are only created once there is a screen to draw on
+        if renderer is None and stdscr is not None:
+            renderer = CursesRenderer(stdscr)
+        self._renderer = renderer
+        self._spectators = spectators
+        self._layout = self._build_layout(renderer) if renderer is not None else None
     
     def _get_next_battle_phase(self):
         next_phase = self._battle_phases[self._battle_phase_counter % len(self._battle_phases)]
@@ -88,6 +137,7 @@ class GameServer:
         self._current_phase = self._get_next_battle_phase()
         if self._current_phase == self._battle_player_turn:
             self._player_timer_start = time.time()
+            self._latency.turn_started(time.monotonic() + self._player_turn_time)
         # print(self._current_phase.__name__)
     
     @property
@@ -96,19 +146,52 @@ class GameServer:
     
     def run(self):
         self._reader.open()
+        if self._renderer is not None:
+            self._renderer.open()
         try:
-            while True:
-                self._print_display()
-                self._get_messages()
-                self._current_phase()
+            # the battle is over once there is no next phase
+            while self._current_phase is not None:
+                if self._instrumentation is None:
+                    self._tick()
+                else:
+                    self._instrumented_tick()
 
         except KeyboardInterrupt:
             pass
+        except EOFError:
+            pass  # the reader has nothing more to give, e.g. a replay is over
 
+        if self._renderer is not None:
+            self._renderer.close()
         self._reader.close()
 
+    def _tick(self):
+        self._print_display()
+        self._get_messages()
+        self._current_phase()
+        if self._spectators is not None:
+            self._spectators.maybe_publish(self._spectator_state, self._battle_messages)
+
+    def _instrumented_tick(self):
+        "_tick, timing each step"
+        timed = self._instrumentation.timed
+        timed("_print_display", self._print_display)
+        waiting = len(self._action_strings)
+        timed("_get_messages", self._get_messages)
+        self._instrumentation.record_count("messages per tick", len(self._action_strings) - waiting)
+        phase = self._current_phase
+        timed(phase.__name__, phase)
+        if self._spectators is not None:
+            timed("spectators", lambda: self._spectators.maybe_publish(self._spectator_state, self._battle_messages))
+
     def _get_messages(self):
-        self._action_strings += self._reader.read()
+        for message in self._reader.read():
+            if not isinstance(message, ReceivedLine):
+                message = ReceivedLine(message)
+            if self._debug_command is not None and message.lower() == self._debug_command:
+                self._show_debug_panel = not self._show_debug_panel
+            else:
+                self._action_strings.append(message)
     
     def _get_action_strings(self):
         "Returns action strings and removes them from the queue"
@@ -116,11 +199,23 @@ class GameServer:
         self._action_strings = []
         return strings
 
+    @property
+    def _registered_usernames(self):
+        return self._roster.names
+
     def _wrap_up_registration_phase(self):
-        players = [Player.roll_fighter(n) for n in self._registered_usernames]
-        self._battle = BossBattle(bosses=self._bosses, players=players)
+        players = self._roster.players
+        table = CombatantTable(capacity=len(players) + len(self._bosses)) if self._combatant_table else None
+        self._battle = BossBattle(bosses=self._bosses, players=players, answer_executor=self._answer_executor,
+                                  combatant_table=table)
+        self._player_list = VirtualList(players, key=lambda p: p._name)
+        for p in players:
+            p.add_health_listener(self._on_player_health_changed)
         self._next_battle_phase()
 
+    def _on_player_health_changed(self, player, previous_health):
+        self._player_health_version += 1
+
     def _registration_phase(self):
         for message in self._get_action_strings():
             if message.lower() == "done":
@@ -131,18 +226,23 @@ class GameServer:
             except ValueError:
                 continue
 
+            # user/register [class]
+            command, _, class_name = command.partition(" ")
             if command.lower() != "register":
                 continue
 
-            user = user.lower()
-            if user in self._registered_usernames:
-                self._error_messages.append("Error: " + user + " already added.")
+            try:
+                player = self._roster.register(user, parse_class(class_name.strip()))
+            except (AlreadyRegisteredError, InvalidClassError, InvalidNameError) as e:
+                self._error_messages.append("Error: " + str(e))
                 continue
 
-            self._registered_usernames.add(user)
-            self._battle_messages.append("Welcome " + user.upper() + "!")
+            self._registration_list.add(player._name)
+            self._battle_messages.append("Welcome " + player._name.upper() + "!")
 
     def _battle_round_init(self):
+        if self._battle.get_round():
+            self._report_latency()
         if not self._battle.next_round():
             "some sort of end phase"
             self._current_phase = None
@@ -150,168 +250,192 @@ class GameServer:
 
         self._next_battle_phase()
     
+    def _report_latency(self):
+        report = self._latency.end_round(self._battle.get_round())
+        if logger.isEnabledFor(logging.INFO):
+            resolve, display = report["resolve_ms"], report["display_ms"]
+            log_event(logging.INFO, "round_latency",
+                      "Round %d: resolved in %.1f ms (p95 %.1f), shown in %.1f ms (p95 %.1f), %d late",
+                      report["round"], resolve["p50"], resolve["p95"], display["p50"], display["p95"],
+                      len(report["late"]), **report)
+
+    def _spectator_state(self) -> dict:
+        "What spectators see, diffed against what they were last sent"
+        if self._battle is None:
+            return {"phase": "registration", "registered": sorted(self._registered_usernames)}
+
+        phase = self._current_phase.__name__.removeprefix("_battle_") if self._current_phase else "ended"
+        return {
+            "phase": phase,
+            "round": self._battle.get_round(),
+            "timer": self._timer_text() if self._current_phase == self._battle_player_turn else None,
+            "tokens": list(self._battle.get_opportunity_tokens()) if self._battle.get_round() else [],
+            "bosses": [b._name for b in self._battle.bosses],
+            "health": {c._name: list(c.get_remaining_and_max_health())
+                       for c in (*self._battle.bosses, *self._battle.players)},
+        }
+
+    def _build_layout(self, renderer: Renderer) -> PanelLayout:
+        layout = PanelLayout(renderer)
+        title_height = 13
+        list_width = 50
+        mid_padding = 10
+        layout.add_screen("registration", [
+            Panel(lambda h, w: (title_height, w, 0, 0), self._draw_title),
+            Panel(lambda h, w: (h - title_height - 1 - mid_padding//2, list_width,
+                                title_height + 1, (w // 2) - list_width - mid_padding//2),
+                  self._draw_registered_users,
+                  state=lambda: (self._registration_list.version, self._registration_list.tick()),
+                  title="Welcome Players!"),
+            Panel(lambda h, w: (h - title_height - 1 - mid_padding//2, list_width,
+                                title_height + 1, (w // 2) + mid_padding//2),
+                  lambda window: self._draw_log(window, self._error_messages, 2, 3),
+                  state=lambda: self._error_messages.version,
+                  title="Log"),
+        ])
+
+        bar_height = 10
+        timer_height = 7
+        log_height = 20
+        layout.add_screen("battle", [
+            Panel(lambda h, w: (bar_height, w, 0, 0),
+                  self._draw_boss_bars,
+                  state=lambda: self._battle.boss_healths()),
+            Panel(lambda h, w: (timer_height, w, bar_height, 0),
+                  lambda window: draw_text(window, 0, 0, self._timer_text(), align="center"),
+                  state=self._timer_text),
+            Panel(lambda h, w: (log_height, list_width, bar_height + timer_height + 2, (w // 2) - list_width),
+                  lambda window: self._draw_log(window, self._battle_messages, 1, 2),
+                  state=lambda: self._battle_messages.version,
+                  title="Combat Log"),
+            Panel(lambda h, w: (log_height, list_width, bar_height + timer_height + 2, w // 2),
+                  lambda window: self._draw_log(window, self._error_messages, 1, 2),
+                  state=lambda: self._error_messages.version,
+                  title="Error Log"),
+            Panel(lambda h, w: (h - (bar_height + timer_height + 2 + log_height), 2 * list_width,
+                                bar_height + timer_height + 2 + log_height, (w // 2) - list_width),
+                  self._draw_player_list,
+                  state=lambda: (self._player_health_version, self._player_list.tick()),
+                  title="Players"),
+        ])
+
+        # the same screens with the debug panel along the bottom
+        debug_height = 12
+        debug_panel = Panel(lambda h, w: (debug_height, w, h - debug_height, 0),
+                            self._draw_debug,
+                            state=lambda: int(time.monotonic()),
+                            title="Debug")
+        for name in ("registration", "battle"):
+            panels = [p.above(debug_height) for p in layout.panels(name)]
+            layout.add_screen(name + "+debug", panels + [debug_panel])
+        return layout
+
     def _print_display(self):
-        scr = self._stdscr
-        if scr is None:
+        if self._layout is None:
             return
-        
-        height, width = scr.getmaxyx()
-        
-        scr.erase()
-        
-        # Test screen
-        # draw_text(scr, 0, 9, "abcdefghij")
-        # draw_text(scr, 0, 18, "klmnopqrst")
-        # draw_text(scr, 0, 27, "uvwxyz")
-        # draw_text(scr, 0, 36, "0123456789")
-
-        curses.curs_set(0)
-        # scr.timeout(100)
-        if self._current_phase == self._registration_phase:
-            # TITLE
-            title_panel_height = 13
-            title_panel = curses.newwin(title_panel_height, width, 0, 0)
-            draw_text(title_panel, 0, 2, "BOSS BATTLES", align="center")
-
-            text = "REGISTER NOW!"
-            title_panel.addstr(11, (width - len(text)) // 2, text)
-
-            text = "radio.send('username/register') on group 255"
-            title_panel.addstr(12, (width - len(text)) // 2, text)
-            title_panel.refresh()
-
-            # REGISTERED USERS
-            p1_y = title_panel_height + 1
-            p1_width = 50
-            mid_padding = 10
-            p1_height = height - p1_y - mid_padding//2
-            p1_x = (width // 2) - (p1_width) - mid_padding//2
-            panel1 = curses.newwin(p1_height, p1_width, p1_y, p1_x)
-            panel1.border()  # Add a border around the window
-            panel1.addstr(0, 2, "Welcome Players!")
-
-            left = []
-            right = []
-
-            for i, user in enumerate(self._registered_usernames):
-                if i % 2 == 0:
-                    left.append(user)
-                else:
-                    right.append(user)
-
-            for i, (user_a, user_b) in enumerate(itertools.zip_longest(left, right, fillvalue=None)):
-                line = f"• {user_a:<20}"
-                if user_b is not None:
-                    line += f"• {user_b}"
-
-                try:
-                    panel1.addstr(i + 2, 2, line)
-                except curses.error:
-                    pass
-
-            panel1.refresh()
-
-            # LOGGING
-            p2_y = title_panel_height + 1
-            p2_width = 50
-            mid_padding = 10
-            p2_height = height - p2_y - mid_padding//2
-            p2_x = (width // 2) + mid_padding//2
-            panel2 = curses.newwin(p2_height, p2_width, 14, p2_x)
-            panel2.border()  # Add a border around the window
-            panel2.addstr(0, 2, "Log")
-
-
-            for i, msg in enumerate(self._error_messages[-(p2_height-3):]):
-                panel2.addstr(i + 2, 2, msg)
 
-            panel2.refresh()
+        if self._current_phase == self._registration_phase:
+            screen = "registration"
         elif self._current_phase == self._battle_player_turn:
-            # DRAW BOSS HEALTH BARS
-            bar_panel_height = 10
-            bar_panel = curses.newwin(bar_panel_height, width, 0, 0)
-            bar_width = width // 2
-            for i, boss in enumerate(self._battle.bosses):
-                percent = boss.get_health() / boss.get_max_health()
-                bars_remaining = int(bar_width * percent)
-                gone = bar_width - bars_remaining
-                remaining, maximum = boss.get_remaining_and_max_health()
-                bar = f"{boss._name.upper():>10} {'█' * bars_remaining}{'░' * gone} ({remaining} / {maximum})"
-                bar_panel.addstr(i + 2, (width//2) - (len(bar)//2), bar)
-            
-            bar_panel.refresh()
-
-            # TIMER
-            timer_panel_height = 7
-            timer_panel = curses.newwin(timer_panel_height, width, bar_panel_height, 0)
-            current_time = time.time()
-            elapsed_time = current_time - self._player_timer_start
-            time_remaining = self._player_turn_time - elapsed_time
-            draw_text(timer_panel, 0, 0, f"{round(time_remaining, 1):.1f}", align="center")
-            timer_panel.refresh()
-
-            # COMBAT LOG
-            combat_log_panel_width = 50
-            combat_log_panel_height = 20
-            combat_log_panel = curses.newwin(combat_log_panel_height, combat_log_panel_width,
-                                             bar_panel_height + timer_panel_height + 2, 
-                                             (width // 2) - (combat_log_panel_width))
-            combat_log_panel.border()
-            combat_log_panel.addstr(0, 2, "Combat Log")
-            for i, msg in enumerate(self._battle_messages[-combat_log_panel_height+2:]):
-                combat_log_panel.addstr(i+1, 2, msg)
-
-            combat_log_panel.refresh()
-
-            # ERROR LOG
-            error_log_panel_width = 50
-            error_log_panel_height = 20
-            error_log_panel = curses.newwin(error_log_panel_height, error_log_panel_width,
-                                             bar_panel_height + timer_panel_height + 2, 
-                                             (width // 2))
-            error_log_panel.border()
-            error_log_panel.addstr(0, 2, "Error Log")
-            for i, msg in enumerate(self._error_messages[-error_log_panel_height+2:]):
-                error_log_panel.addstr(i+1, 2, msg)
-
-            error_log_panel.refresh()
-
-        # time.sleep(0.5)
-        # print op tokens
-        # opportunity_tokens = self._battle.get_opportunity_tokens()
-        # print(f"OPPORTUNITY TOKEN{'S' if len(opportunity_tokens) > 1 else ''}")
-        # for token in opportunity_tokens:
-        #     print(token)
-        # print()
-
-        # scr.refresh()
-        # scr.getkey()
-        
-        # print("=" * 10 + " ROUND " + str(self._battle.get_round()) + " " + "=" * 10)
-        # print_health_list("BOSSES", self._battle._bosses.values())
-        # print_health_list("PLAYERS", self._battle._players.values())
-        # print()
+            screen = "battle"
+        else:
+            return
+        if self._show_debug_panel and self._instrumentation is not None:
+            screen += "+debug"
+        redrawn = self._layout.draw(screen)
+        if screen.startswith("battle"):
+            self._latency.displayed()
+
+        if redrawn and logger.isEnabledFor(logging.DEBUG):
+            frame = self._layout.last_frame
+            log_event(logging.DEBUG, "frame", "Frame wrote %d cells (%d bytes)", frame.cells, frame.bytes,
+                      panels=redrawn, cells=frame.cells, bytes=frame.bytes, writes=frame.writes)
+
+    def _draw_title(self, window):
+        _, width = window.getmaxyx()
+        draw_text(window, 0, 2, "BOSS BATTLES", align="center")
+
+        text = "REGISTER NOW!"
+        window.addstr(11, (width - len(text)) // 2, text)
+
+        text = "radio.send('username/register') on group 255"
+        window.addstr(12, (width - len(text)) // 2, text)
+
+    def _draw_registered_users(self, window):
+        height, width = window.getmaxyx()
+        # two columns, leaving room for the border and the page footer
+        self._registration_list.draw(window, 2, 2, height - 4, 2, (width - 4) // 2,
+                                     lambda user: f"• {user}")
+
+    def _draw_player_list(self, window):
+        height, width = window.getmaxyx()
+        column_width = (width - 4) // 4
+        self._player_list.draw(window, 1, 2, height - 3, 4, column_width,
+                               lambda p: self._health_bars.cell(p, column_width - 1))
+
+    def _draw_log(self, window, messages, top: int, padding: int):
+        height, _ = window.getmaxyx()
+        for i, msg in enumerate(tail_lines(messages, height - padding)):
+            window.addstr(i + top, 2, msg)
+
+    def _draw_debug(self, window):
+        for i, line in enumerate(self._instrumentation.summary_lines()):
+            window.addstr(i + 1, 2, line)
+
+    def _draw_boss_bars(self, window):
+        _, width = window.getmaxyx()
+        for i, boss in enumerate(self._battle.bosses):
+            bar = self._health_bars.line(boss, width // 2)
+            window.addstr(i + 2, (width//2) - (len(bar)//2), bar)
+
+    def _timer_text(self) -> str:
+        elapsed_time = time.time() - self._player_timer_start
+        time_remaining = self._player_turn_time - elapsed_time
+        return f"{round(time_remaining, 1):.1f}"
 
     def _battle_player_turn(self):
-        # get actions from players
-        valid_commands = self._gather_valid_commands()
+        # commands waiting on puzzle answers go first, then new actions from players
+        commands = self._deferred_commands + self._gather_valid_commands()
+        self._deferred_commands = []
+        self._handle_commands(commands)
         
-        for command in valid_commands:
+        current_time = time.time()
+        elapsed_time = current_time - self._player_timer_start
+        time_remaining = self._player_turn_time - elapsed_time
+        if time_remaining <= 0:
+            if self._deferred_commands:
+                # they arrived in time, so they get resolved before the turn ends,
+                # unless the answers take so long they would hold up the game
+                self._battle.wait_for_answers(timeout=self._answer_wait_seconds)
+                commands = self._deferred_commands
+                self._deferred_commands = []
+                self._handle_commands(commands)
+                for command in self._deferred_commands:
+                    self._error_messages.append(f"{command.user}'s {command.action} could not be checked in time.")
+                self._deferred_commands = []
+            self._next_battle_phase()
+
+    def _handle_commands(self, commands: list[Command]):
+        for command in commands:
             try:
                 result = self._battle.handle_action(command)
             except InvalidTargetError as e:
                 self._error_messages.append(str(e))
-            except TurnAlreadyTakenError as e:
+            except (TurnAlreadyTakenError, InvalidAbilityError, InvalidReactionError) as e:
                 self._error_messages.append(str(e))
+            except AnswerPendingError:
+                self._deferred_commands.append(command)
             else:
                 self._battle_messages.append(result)
-        
-        current_time = time.time()
-        elapsed_time = current_time - self._player_timer_start
-        time_remaining = self._player_turn_time - elapsed_time
-        if time_remaining <= 0:
-            self._battle._players_who_have_acted = set()
-            self._next_battle_phase()
+                self._battle_messages.extend(self._battle.pop_reaction_events())
+                late = self._latency.resolved(result)
+                if late is not None:
+                    self._error_messages.append(str(late))
+                    if logger.isEnabledFor(logging.WARNING):
+                        log_event(logging.WARNING, "late_command",
+                                  "LATE: %s's %s arrived %.2fs before the deadline but was resolved %.2fs after it",
+                                  late.caster, late.ability, late.early, late.late, caster=late.caster,
+                                  ability=late.ability, early=late.early, late=late.late)
     
     def _gather_valid_commands(self) -> list[Command]:
         valid_commands = []
@@ -320,13 +444,13 @@ class GameServer:
                 command = Command(action)
             except InvalidActionStringError as e:
                 self._error_messages.append(f"Invalid message: '{action}'")
+                continue
 
             if not any(c.user == command.user for c in valid_commands):
                 valid_commands.append(command)
         return valid_commands
     
     def _battle_boss_turn(self):
-        result = self._battle.bosses_turn()
-        self._battle_messages.append(result)
+        self._battle_messages.extend(self._battle.bosses_turn())
         self._next_battle_phase()
     
\ No newline at end of file
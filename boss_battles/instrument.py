@@ -0,0 +1,117 @@
+"""
+Timing of the game loop's hot path, to tell whether a laggy class comes
+from reading the radio, combat or drawing:
+
+    python -m boss_battles --instrument timings.json
+
+Start it with --debug-sender teacher and send "teacher/debug" over the radio
+to show or hide the numbers on screen.
+"""
+from typing import Any, Callable
+import json
+import time
+
+
+# bucket i holds values up to 2 ** i - 1, the last one everything bigger
+BUCKETS = 32
+
+
+class Histogram:
+    """
+    Counts of non-negative whole numbers, e.g. microseconds, in power-of-two
+    buckets. Recording is a bit_length and an increment, so it can stay on in
+    the game loop; percentiles are only as precise as the bucket they fall in.
+    """
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        self.buckets[min(value.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        "Upper bound of the bucket the p-th percentile (0-100) falls in, at most the max seen"
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(2 ** i - 1, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": {str(2 ** i - 1): n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class Instrumentation:
+    """
+    Histograms of how long each named step of the game loop took, in
+    microseconds, and of how many messages arrived per tick.
+    """
+    def __init__(self, clock: Callable[[], int] = time.perf_counter_ns):
+        self._clock = clock
+        self.timings: dict[str, Histogram] = {}
+        self.counts: dict[str, Histogram] = {}
+        self.started = time.time()
+
+    def timed(self, name: str, step: Callable[[], Any]) -> Any:
+        "Calls step and records how long it took under name"
+        start = self._clock()
+        try:
+            return step()
+        finally:
+            self.record_time(name, (self._clock() - start) // 1000)
+
+    def record_time(self, name: str, microseconds: int) -> None:
+        histogram = self.timings.get(name)
+        if histogram is None:
+            histogram = self.timings[name] = Histogram()
+        histogram.record(microseconds)
+
+    def record_count(self, name: str, count: int) -> None:
+        histogram = self.counts.get(name)
+        if histogram is None:
+            histogram = self.counts[name] = Histogram()
+        histogram.record(count)
+
+    def summary_lines(self) -> list[str]:
+        "A line per histogram, as the debug panel shows them"
+        lines = [f"{'step':<22}{'calls':>8}{'mean':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>9}  (ms)"]
+        for name, h in sorted(self.timings.items()):
+            lines.append(f"{name:<22}{h.count:>8}{h.mean() / 1000:>9.2f}{h.percentile(50) / 1000:>8.2f}"
+                         f"{h.percentile(95) / 1000:>8.2f}{h.percentile(99) / 1000:>8.2f}{h.max / 1000:>9.2f}")
+        for name, h in sorted(self.counts.items()):
+            lines.append(f"{name:<22}{h.count:>8}{h.mean():>9.2f}{h.percentile(50):>8}"
+                         f"{h.percentile(95):>8}{h.percentile(99):>8}{h.max:>9}")
+        return lines
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "started": self.started,
+            "seconds": time.time() - self.started,
+            "timings_us": {name: h.as_dict() for name, h in self.timings.items()},
+            "counts": {name: h.as_dict() for name, h in self.counts.items()},
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
@@ -0,0 +1,94 @@
+"""
+How long commands take from the moment the reader got them until they are
+resolved and until the combat log shows the result, and which of them
+arrived before the turn ended but were resolved after it.
+"""
+from typing import Any, Optional
+from bisect import bisect_left
+from dataclasses import dataclass
+import time
+
+from .events import CombatEvent
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    "p50, p95 and max of values, in milliseconds"
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    def at(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+    return {"p50": at(50), "p95": at(95), "max": ordered[-1] * 1000}
+
+
+@dataclass(frozen=True)
+class LateCommand:
+    "A command that arrived before its turn's deadline and was resolved after it"
+    caster: str
+    ability: str
+    early: float    # seconds it arrived before the deadline
+    late: float     # seconds it was resolved after it
+
+    def __str__(self) -> str:
+        return (f"LATE: {self.caster}'s {self.ability} arrived {self.early:.2f}s before the deadline"
+                f" but was resolved {self.late:.2f}s after it")
+
+
+class LatencyTracker:
+    """
+    Collects receive-to-resolve and receive-to-display times of traced
+    events for the current round. end_round() reports them and starts the
+    next round.
+    """
+    def __init__(self):
+        self._deadlines: list[float] = []   # time.monotonic() each player turn ends, in order
+        self._resolve: list[float] = []
+        self._display: list[float] = []
+        self._undisplayed: list[CombatEvent] = []
+        self._late: list[LateCommand] = []
+        self.reports: list[dict[str, Any]] = []
+
+    def turn_started(self, deadline: float) -> None:
+        self._deadlines.append(deadline)
+
+    def _deadline_for(self, received_at: float) -> Optional[float]:
+        "The deadline of the turn a command received at this time was sent for"
+        i = bisect_left(self._deadlines, received_at)
+        return self._deadlines[i] if i < len(self._deadlines) else None
+
+    def resolved(self, event: CombatEvent) -> Optional[LateCommand]:
+        "Records a resolved event, returns what went wrong when it was resolved too late"
+        if event.received_at is None:
+            return None
+        self._resolve.append(event.resolved_at - event.received_at)
+        self._undisplayed.append(event)
+
+        deadline = self._deadline_for(event.received_at)
+        if deadline is None or event.resolved_at <= deadline:
+            return None
+        late = LateCommand(event.caster, event.ability_name,
+                           deadline - event.received_at, event.resolved_at - deadline)
+        self._late.append(late)
+        return late
+
+    def displayed(self, now: Optional[float] = None) -> None:
+        "Everything resolved so far is on screen"
+        if not self._undisplayed:
+            return
+        now = time.monotonic() if now is None else now
+        self._display.extend(now - e.received_at for e in self._undisplayed)
+        self._undisplayed = []
+
+    def end_round(self, round_number: int) -> dict[str, Any]:
+        report = {
+            "round": round_number,
+            "commands": len(self._resolve),
+            "resolve_ms": percentiles(self._resolve),
+            "display_ms": percentiles(self._display),
+            "late": [str(late) for late in self._late],
+        }
+        self.reports.append(report)
+        self._resolve = []
+        self._display = []
+        self._late = []
+        return report
@@ -0,0 +1,140 @@
+from typing import Callable, Hashable, Optional
+from collections import deque
+
+from .frame import Canvas, FrameStats, write_changes
+from .renderers import Renderer
+
+
+# screen (height, width) -> panel (height, width, y, x)
+Geometry = Callable[[int, int], tuple[int, int, int, int]]
+
+_NEVER_DRAWN = object()
+
+
+class MessageLog(deque):
+    "A bounded message deque that counts changes, so panels can tell when to redraw"
+    def __init__(self, maxlen: Optional[int] = None):
+        super().__init__(maxlen=maxlen)
+        self.version = 0
+
+    def append(self, message) -> None:
+        super().append(message)
+        self.version += 1
+
+    def extend(self, messages) -> None:
+        for message in messages:
+            self.append(message)
+
+
+class Panel:
+    """
+    A window that is placed once per terminal size. When the value returned
+    by `state` changes the panel is drawn into a Canvas and only the cells
+    that differ from the last frame are written to the window.
+    """
+    def __init__(self,
+                 geometry: Geometry,
+                 draw: Callable[[object], None],
+                 state: Callable[[], Hashable] = lambda: None,
+                 title: Optional[str] = None):
+        self._geometry = geometry
+        self._draw = draw
+        self._state = state
+        self._title = title
+        self.window = None
+        self._frame: Optional[Canvas] = None
+        self._drawn_state = _NEVER_DRAWN
+
+    def above(self, rows: int) -> 'Panel':
+        "A copy of this panel laid out as if the bottom rows of the screen were not there"
+        geometry = self._geometry
+        return Panel(lambda h, w: geometry(h - rows, w), self._draw, self._state, self._title)
+
+    def place(self, new_window: Callable, screen_height: int, screen_width: int) -> None:
+        "(Re)creates the window for this screen size, clipped to the screen"
+        height, width, y, x = self._geometry(screen_height, screen_width)
+        y, x = max(y, 0), max(x, 0)
+        height = min(height, screen_height - y)
+        width = min(width, screen_width - x)
+        if height > 0 and width > 0:
+            self.window = new_window(height, width, y, x)
+            self._frame = Canvas(height, width)  # a new window is blank
+        else:
+            self.window = None
+            self._frame = None
+        self._drawn_state = _NEVER_DRAWN
+
+    def redraw_if_changed(self) -> Optional[FrameStats]:
+        "Returns what was written, or None when nothing changed"
+        if self.window is None:
+            return None
+        state = self._state()
+        if state == self._drawn_state:
+            return None
+
+        height, width = self._frame.getmaxyx()
+        frame = Canvas(height, width)
+        if self._title is not None:
+            frame.border()
+            frame.addstr(0, 2, self._title)
+        self._draw(frame)  # whatever does not fit is cut off
+        stats = write_changes(self.window, frame, self._frame)
+        if stats.writes:
+            self.window.noutrefresh()
+        self._frame = frame
+        self._drawn_state = state
+        return stats
+
+
+class PanelLayout:
+    """
+    Keeps the panels of each screen (e.g. registration, battle) between
+    frames. Windows are only created when a screen is first shown or the
+    terminal is resized, and a frame only repaints panels whose state
+    changed, sent to the renderer with a single flush.
+    last_frame and total count the cells and bytes written.
+    """
+    def __init__(self, renderer: Renderer):
+        self._renderer = renderer
+        self._screens: dict[str, list[Panel]] = {}
+        self._current: Optional[str] = None
+        self._size: Optional[tuple[int, int]] = None
+        # what the last frame and every frame so far wrote to the terminal
+        self.last_frame = FrameStats()
+        self.total = FrameStats()
+
+    def add_screen(self, name: str, panels: list[Panel]) -> None:
+        self._screens[name] = panels
+
+    def panels(self, name: str) -> list[Panel]:
+        return self._screens[name]
+
+    def _check_resize(self) -> bool:
+        size = self._renderer.size()
+        if size == self._size:
+            return False
+        self._size = size
+        return True
+
+    def draw(self, screen: str) -> int:
+        "Draws a frame of the screen, returns how many panels were repainted"
+        panels = self._screens[screen]
+        placed = self._check_resize() or screen != self._current
+        if placed:
+            self._current = screen
+            self._renderer.clear()
+            height, width = self._size
+            for panel in panels:
+                panel.place(self._renderer.new_window, height, width)
+
+        self.last_frame = FrameStats()
+        redrawn = 0
+        for panel in panels:
+            stats = panel.redraw_if_changed()
+            if stats is not None:
+                redrawn += 1
+                self.last_frame += stats
+        self.total += self.last_frame
+        if self.last_frame.writes or placed:
+            self._renderer.flush()
+        return redrawn
@@ -0,0 +1,236 @@
+"""
+Pretends to be the micro:bit gateway for a whole class, over a pseudo
+terminal that SerialReader opens like the real serial port:
+
+    python -m boss_battles.loadgen --players 30 --seconds 60
+
+runs a game with nothing drawn and prints where the time went. Simulated
+students register, read the opportunity tokens when a round starts and send
+`user@boss/ability token` lines, some of them wrong. The students run in a
+thread of the same process, so the game loop shares the GIL with them.
+"""
+from typing import Callable, Optional
+from dataclasses import dataclass
+import argparse
+import heapq
+import os
+import random
+import threading
+import time
+import tty
+
+from .ability import AbilityRegistry
+from .bench import huge_squirrel
+from .encounter import load_encounter
+from .game_server import GameServer, Reader, SerialReader
+from .instrument import Instrumentation
+from .renderers import NullRenderer
+
+
+# (round, "boss:token" strings) as a student would read them off the projector
+TokenSource = Callable[[], tuple[int, tuple[str, ...]]]
+
+
+class PseudoSerialPort:
+    "A pty pair: the game opens `port`, the generator writes to the other end"
+    def __init__(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # no echo, no line editing, like a serial line
+        self.port = os.ttyname(self._slave)
+
+    def write_line(self, line: str) -> None:
+        os.write(self._master, (line + "\n").encode("utf-8"))
+
+    def close(self) -> None:
+        os.close(self._master)
+        os.close(self._slave)
+
+
+class TimedReader:
+    """
+    Passes another reader's messages on until `seconds` after it was opened,
+    then raises EOFError, which GameServer.run takes as the end of the game
+    """
+    def __init__(self, reader: Reader, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._reader = reader
+        self._seconds = seconds
+        self._clock = clock
+        self._deadline = float("inf")
+
+    @property
+    def ser(self):
+        return getattr(self._reader, "ser", None)
+
+    def open(self):
+        self._reader.open()
+        self._deadline = self._clock() + self._seconds
+
+    def close(self):
+        self._reader.close()
+
+    def read(self) -> list[str]:
+        if self._clock() >= self._deadline:
+            raise EOFError("time is up")
+        return self._reader.read()
+
+
+@dataclass
+class ClassroomProfile:
+    players: int = 30
+    rate: float = 0.5           # messages per student per second while a round runs
+    error_rate: float = 0.1     # wrong tokens, unknown bosses and garbled lines
+    burstiness: float = 0.5     # chance a student fires as soon as the tokens appear
+    abilities: tuple[str, ...] = ("punch", "lsword", "mspike", "smite")
+
+
+class Classroom:
+    """
+    Simulated students writing to a port. Between rounds each student may
+    send a message as soon as the new tokens show, then keeps sending at
+    `rate` with exponential gaps.
+    """
+    def __init__(self,
+                 write_line: Callable[[str], None],
+                 tokens: TokenSource,
+                 profile: ClassroomProfile = ClassroomProfile(),
+                 seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self._write_line = write_line
+        self._tokens = tokens
+        self._profile = profile
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._names = [f"student{n}" for n in range(profile.players)]
+        self._round = 0
+        self._op_tokens: dict[str, str] = {}
+        self._queue: list[tuple[float, str]] = []     # (send at, student)
+        self._solves: dict[tuple[str, str], str] = {}
+        self.sent: dict[str, int] = {"register": 0, "action": 0, "error": 0}
+
+    def register(self, done: bool = True) -> None:
+        for name in self._names:
+            self._write_line(f"{name}/register")
+            self.sent["register"] += 1
+        if done:
+            self._write_line("done")
+
+    def _next_gap(self) -> float:
+        rate = self._profile.rate
+        return self._random.expovariate(rate) if rate > 0 else float("inf")
+
+    def _start_round(self, now: float, round_number: int, tokens: tuple[str, ...]) -> None:
+        self._round = round_number
+        self._op_tokens = dict(t.split(":", 1) for t in tokens)
+        self._solves = {}
+        self._queue = []
+        for name in self._names:
+            if self._random.random() < self._profile.burstiness:
+                delay = self._random.uniform(0, 0.25)
+            else:
+                delay = self._next_gap()
+            self._queue.append((now + delay, name))
+        heapq.heapify(self._queue)
+
+    def _solve(self, ability: str, boss: str) -> str:
+        key = (ability, boss)
+        if key not in self._solves:
+            self._solves[key] = AbilityRegistry.registry[ability]().algorithm(self._op_tokens[boss]) or ""
+        return self._solves[key]
+
+    def message(self, name: str) -> str:
+        "What a student sends, wrong error_rate of the time"
+        ability = self._random.choice(self._profile.abilities)
+        boss = self._random.choice(sorted(self._op_tokens))
+        if self._random.random() < self._profile.error_rate:
+            self.sent["error"] += 1
+            mistake = self._random.randrange(3)
+            if mistake == 0:
+                return f"{name}@{boss}/{ability} {self._random.getrandbits(16):04x}"
+            if mistake == 1:
+                return f"{name}@nobody/{ability}"
+            return f"{name}{boss}/{ability}"
+        self.sent["action"] += 1
+        return f"{name}@{boss}/{ability} {self._solve(ability, boss)}".rstrip()
+
+    def step(self) -> int:
+        "Sends whatever is due, returns how many lines were written"
+        now = self._clock()
+        round_number, tokens = self._tokens()
+        if round_number != self._round and tokens:
+            self._start_round(now, round_number, tokens)
+
+        written = 0
+        while self._queue and self._queue[0][0] <= now:
+            _, name = heapq.heappop(self._queue)
+            self._write_line(self.message(name))
+            written += 1
+            heapq.heappush(self._queue, (now + self._next_gap(), name))
+        return written
+
+    def run(self, stop: threading.Event, interval: float = 0.005) -> None:
+        while not stop.is_set():
+            self.step()
+            stop.wait(interval)
+
+
+def game_tokens(game: GameServer) -> TokenSource:
+    def tokens():
+        battle = game.battle
+        if battle is None or not battle.get_round():
+            return (0, ())
+        return (battle.get_round(), battle.get_opportunity_tokens())
+    return tokens
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a game against a simulated class over a pseudo terminal.")
+    parser.add_argument('--players', type=int, default=30, help='Number of simulated students.')
+    parser.add_argument('--rate', type=float, default=0.5, help='Messages per student per second during a round.')
+    parser.add_argument('--error-rate', type=float, default=0.1, help='Fraction of messages that are wrong.')
+    parser.add_argument('--burstiness', type=float, default=0.5, help='Chance a student sends as soon as a round starts.')
+    parser.add_argument('--turn-seconds', type=int, default=5, help='Length of the player turn.')
+    parser.add_argument('--seconds', type=float, default=30, help='How long to run for.')
+    parser.add_argument('--encounter', type=str, default=None, help='Load the bosses from this encounter file.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the students, to repeat a run.')
+    args = parser.parse_args(argv)
+
+    port = PseudoSerialPort()
+    reader = TimedReader(SerialReader(port=port.port), args.seconds)
+    bosses = load_encounter(args.encounter).new_bosses() if args.encounter else [huge_squirrel()]
+    instrumentation = Instrumentation()
+    game = GameServer(bosses=bosses, reader=reader, renderer=NullRenderer(),
+                      player_turn_time_seconds=args.turn_seconds, instrumentation=instrumentation)
+
+    profile = ClassroomProfile(players=args.players, rate=args.rate, error_rate=args.error_rate,
+                               burstiness=args.burstiness)
+    classroom = Classroom(port.write_line, game_tokens(game), profile, seed=args.seed)
+    stop = threading.Event()
+
+    def students_arrive():
+        # opening the port throws away anything already sent
+        while reader.ser is None and not stop.wait(0.01):
+            pass
+        classroom.register()
+        classroom.run(stop)
+
+    students = threading.Thread(target=students_arrive, name="students", daemon=True)
+    students.start()
+    # the game stops when time is up or when the battle is over, whichever is first
+    try:
+        game.run()
+    finally:
+        stop.set()
+        students.join()
+        port.close()
+
+    print(f"sent {classroom.sent}")
+    for line in instrumentation.summary_lines():
+        print(line)
+    for report in game._latency.reports:
+        resolve, display = report["resolve_ms"], report["display_ms"]
+        print(f"round {report['round']:>3}: {report['commands']:>4} commands, resolved p50 {resolve['p50']:.1f} ms"
+              f" p95 {resolve['p95']:.1f} ms, shown p50 {display['p50']:.1f} ms, {len(report['late'])} late")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from typing import Optional
+import json
+import logging
+import logging.handlers
+import queue
+
+
+# The battle engine logs here. Nothing is written anywhere until a BattleLog
+# is started, and disabled levels cost a single isEnabledFor check.
+logger = logging.getLogger("boss_battles")
+logger.addHandler(logging.NullHandler())
+
+
+def log_event(level: int, event: str, msg: str, *args, **fields) -> None:
+    """
+    Logs a structured event. msg is %-formatted with args by the background
+    writer, never by the caller, and fields end up as keys in NDJSON output.
+
+    Callers on the hot path should check logger.isEnabledFor(level) first so
+    that building the fields costs nothing when logging is off.
+    """
+    logger.log(level, msg, *args, extra={"event": event, "fields": fields})
+
+
+class NDJSONFormatter(logging.Formatter):
+    "One JSON object per line"
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler formats the message before queueing it, which would put the
+    string building back on the caller's thread. Records only carry plain
+    values here, so they are queued as-is and formatted by the listener.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def file_sink(path: str) -> logging.Handler:
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s - %(message)s"))
+    return handler
+
+
+def ndjson_sink(path: str) -> logging.Handler:
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(NDJSONFormatter())
+    return handler
+
+
+class BattleLog:
+    """
+    Sends battle engine log records through a queue to a background thread
+    that writes them to the given sinks, so the game loop never waits on I/O.
+
+        with BattleLog([ndjson_sink("battle.ndjson")]):
+            game.run()
+    """
+    def __init__(self, sinks: list[logging.Handler], level: int = logging.INFO):
+        self._sinks = sinks
+        self._level = level
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._handler = _LazyQueueHandler(self._queue)
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._previous_level = logger.level
+        self._previous_propagate = logger.propagate
+
+    def start(self) -> 'BattleLog':
+        self._previous_level = logger.level
+        self._previous_propagate = logger.propagate
+        logger.addHandler(self._handler)
+        logger.setLevel(self._level)
+        # keep records away from any root handler writing to the terminal
+        logger.propagate = False
+        self._listener = logging.handlers.QueueListener(self._queue, *self._sinks, respect_handler_level=True)
+        self._listener.start()
+        return self
+
+    def stop(self) -> None:
+        if self._listener is None:
+            return
+        logger.removeHandler(self._handler)
+        logger.setLevel(self._previous_level)
+        logger.propagate = self._previous_propagate
+        self._listener.stop()  # flushes whatever is still queued
+        self._listener = None
+        for sink in self._sinks:
+            sink.close()
+
+    def __enter__(self) -> 'BattleLog':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
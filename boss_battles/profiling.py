@@ -0,0 +1,109 @@
+"""
+Finding hot spots on the machine the game actually runs on:
+
+    python -m boss_battles --profile profile/
+    python -m boss_battles --profile profile/ --profile-mode sampling --replay session.txt
+
+cProfile mode profiles each step of the game loop separately and writes a
+pstats file per step, e.g. profile/_battle_player_turn.pstats, to open with
+`python -m pstats` or snakeviz. Sampling mode costs far less: a thread
+records the game loop's stack every few milliseconds and writes
+profile/stacks.txt in the collapsed format flamegraph.pl and speedscope read.
+"""
+from typing import Any, Callable, Optional
+from collections import Counter
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+
+from .instrument import Instrumentation
+
+
+class PhaseProfiler(Instrumentation):
+    "Instrumentation that also runs each step of the game loop under its own cProfile"
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.profiles: dict[str, cProfile.Profile] = {}
+
+    def timed(self, name: str, step: Callable[[], Any]) -> Any:
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = cProfile.Profile()
+        # the timing stays outside the profile, so it does not show up in it
+        return super().timed(name, lambda: profile.runcall(step))
+
+    def write(self, directory: str, top: int = 25) -> list[str]:
+        "Writes <step>.pstats for every step and summary.txt with the top functions of each, returns the paths"
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        summary = io.StringIO()
+        for name, profile in sorted(self.profiles.items()):
+            path = os.path.join(directory, f"{name}.pstats")
+            profile.dump_stats(path)
+            paths.append(path)
+            summary.write(f"==== {name} ====\n")
+            pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(top)
+        path = os.path.join(directory, "summary.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
+        paths.append(path)
+        return paths
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread, the game loop's by default, from a
+    background thread using sys._current_frames(). The game loop runs
+    untouched; the cost is the sampler taking the GIL once per interval.
+    """
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self._thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.sample()
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        "One 'outer;...;inner count' line per distinct stack"
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, directory: str) -> list[str]:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "stacks.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return [path]
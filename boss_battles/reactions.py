@@ -0,0 +1,79 @@
+from typing import TYPE_CHECKING
+from dataclasses import dataclass
+
+if TYPE_CHECKING:
+    from .character import Character
+    from .ability import Ability
+
+
+HEALTH_BELOW = "healthbelow"
+
+
+@dataclass(slots=True)
+class Reaction:
+    """
+    A readied action: when `subject` triggers `trigger`, `reactor` uses
+    `ability` on `target`. The trigger is either an ability identifier the
+    subject has to use, or HEALTH_BELOW with a threshold.
+    """
+    reactor: 'Character'
+    ability: 'Ability'
+    target: 'Character'
+    trigger: str
+    subject: str
+    threshold: int = 0
+
+
+class ReactionDispatcher:
+    """
+    Pending reactions indexed by (trigger, subject name), so an event only
+    looks at the reactions waiting on exactly that event. Each reaction
+    fires at most once.
+    """
+    def __init__(self):
+        self._index: dict[tuple[str, str], list[Reaction]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def arm(self, reaction: Reaction) -> None:
+        key = (reaction.trigger, reaction.subject)
+        bucket = self._index.get(key)
+        if bucket is None:
+            self._index[key] = [reaction]
+        else:
+            bucket.append(reaction)
+        self._count += 1
+
+    def clear(self) -> None:
+        self._index.clear()
+        self._count = 0
+
+    def ability_used(self, caster_name: str, ability_identifier: str) -> list[Reaction]:
+        "Removes and returns every reaction waiting on this caster using this ability"
+        fired = self._index.pop((ability_identifier, caster_name), None)
+        if fired is None:
+            return []
+        self._count -= len(fired)
+        return fired
+
+    def health_changed(self, character: 'Character') -> list[Reaction]:
+        "Removes and returns every reaction whose health threshold this character is now below"
+        key = (HEALTH_BELOW, character._name)
+        bucket = self._index.get(key)
+        if bucket is None:
+            return []
+
+        health = character.get_health()
+        fired = [r for r in bucket if health < r.threshold]
+        if not fired:
+            return []
+
+        waiting = [r for r in bucket if health >= r.threshold]
+        if waiting:
+            self._index[key] = waiting
+        else:
+            del self._index[key]
+        self._count -= len(fired)
+        return fired
@@ -0,0 +1,169 @@
+from typing import Protocol, TextIO, Optional
+import curses
+import shutil
+import sys
+
+
+class Window(Protocol):
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+
+class Renderer(Protocol):
+    """
+    Where the game server's panels end up. Panels only ever write changed
+    text into windows; the renderer decides how that reaches the screen.
+    """
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def size(self) -> tuple[int, int]:
+        "(height, width) of the screen, called once per frame"
+        pass
+
+    def clear(self):
+        "Blanks the whole screen, e.g. after a resize"
+        pass
+
+    def new_window(self, height: int, width: int, y: int, x: int) -> Window:
+        pass
+
+    def flush(self):
+        "Shows everything windows were sent since the last flush"
+        pass
+
+
+class _CursesWindow:
+    def __init__(self, window):
+        self._window = window
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        try:
+            self._window.addstr(y, x, text, attr)
+        except curses.error:
+            pass  # the bottom right cell is written, the cursor just can't move past it
+
+    def noutrefresh(self):
+        self._window.noutrefresh()
+
+
+class CursesRenderer:
+    def __init__(self, stdscr):
+        self._stdscr = stdscr
+
+    def open(self):
+        curses.curs_set(0)
+        self._stdscr.nodelay(True)
+
+    def close(self):
+        pass
+
+    def size(self) -> tuple[int, int]:
+        if self._stdscr.getch() == curses.KEY_RESIZE:
+            curses.update_lines_cols()
+        return self._stdscr.getmaxyx()
+
+    def clear(self):
+        self._stdscr.erase()
+        self._stdscr.noutrefresh()
+
+    def new_window(self, height: int, width: int, y: int, x: int) -> Window:
+        return _CursesWindow(curses.newwin(height, width, y, x))
+
+    def flush(self):
+        curses.doupdate()
+
+
+class _AnsiWindow:
+    def __init__(self, renderer: 'AnsiRenderer', y: int, x: int):
+        self._renderer = renderer
+        self._y = y
+        self._x = x
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        # cursor positions are 1-based
+        move = f"\x1b[{self._y + y + 1};{self._x + x + 1}H"
+        if attr:
+            self._renderer._buffer.append(f"{move}\x1b[7m{text}\x1b[0m")
+        else:
+            self._renderer._buffer.append(move + text)
+
+    def noutrefresh(self):
+        pass
+
+
+class AnsiRenderer:
+    """
+    Writes ANSI escape sequences straight to a stream. A frame is buffered
+    and written with a single write when flushed. Text with any attribute is
+    shown in reverse video.
+    """
+    def __init__(self, stream: Optional[TextIO] = None):
+        self._stream = stream if stream is not None else sys.stdout
+        self._buffer: list[str] = []
+
+    def open(self):
+        # alternate screen, hidden cursor
+        self._stream.write("\x1b[?1049h\x1b[?25l\x1b[2J")
+        self._stream.flush()
+
+    def close(self):
+        self._stream.write("\x1b[0m\x1b[?25h\x1b[?1049l")
+        self._stream.flush()
+
+    def size(self) -> tuple[int, int]:
+        columns, lines = shutil.get_terminal_size()
+        return (lines, columns)
+
+    def clear(self):
+        self._buffer.append("\x1b[2J")
+
+    def new_window(self, height: int, width: int, y: int, x: int) -> Window:
+        return _AnsiWindow(self, y, x)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        self._stream.write(''.join(self._buffer))
+        self._stream.flush()
+        self._buffer = []
+
+
+class _NullWindow:
+    def addstr(self, y: int, x: int, text: str, attr: int = 0):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+
+class NullRenderer:
+    "Draws nothing, for benchmarks and running without a terminal"
+    def __init__(self, height: int = 40, width: int = 120):
+        self._size = (height, width)
+        self.frames = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def size(self) -> tuple[int, int]:
+        return self._size
+
+    def clear(self):
+        pass
+
+    def new_window(self, height: int, width: int, y: int, x: int) -> Window:
+        return _NullWindow()
+
+    def flush(self):
+        self.frames += 1
+
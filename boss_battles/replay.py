@@ -0,0 +1,90 @@
+"""
+Recording what the reader received and playing it back, so a lesson can be
+profiled or debugged again afterwards:
+
+    python -m boss_battles --record session.txt
+    python -m boss_battles --replay session.txt --replay-speed 2
+
+A session file has a line per message: seconds since the start, a tab, and
+the message.
+"""
+from typing import Callable, Optional, TextIO
+import time
+
+from .command import ReceivedLine
+from .game_server import Reader
+
+
+class RecordingReader:
+    "Passes another reader's messages on and writes them to a session file"
+    def __init__(self, reader: Reader, path: str, clock: Callable[[], float] = time.monotonic):
+        self._reader = reader
+        self._path = path
+        self._clock = clock
+        self._file: Optional[TextIO] = None
+        self._start = 0.0
+
+    def open(self):
+        self._reader.open()
+        self._file = open(self._path, "w", encoding="utf-8")
+        self._start = self._clock()
+
+    def close(self):
+        self._reader.close()
+        if self._file is not None:
+            self._file.close()
+
+    def read(self) -> list[str]:
+        messages = self._reader.read()
+        for message in messages:
+            received_at = getattr(message, "received_at", None)
+            offset = (received_at if received_at is not None else self._clock()) - self._start
+            self._file.write(f"{offset:.4f}\t{message}\n")
+        if messages:
+            self._file.flush()
+        return messages
+
+
+def read_session(path: str) -> list[tuple[float, str]]:
+    messages = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            offset, _, message = line.rstrip("\n").partition("\t")
+            messages.append((float(offset), message))
+    return messages
+
+
+class ReplayReader:
+    """
+    Gives back a recorded session's messages at the times they were received,
+    `speed` times faster. Once everything has been played and `linger`
+    seconds have passed, read() raises EOFError, which ends the game.
+    """
+    def __init__(self, path: str, speed: float = 1.0, linger: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._messages = read_session(path)
+        self._speed = speed
+        self._linger = linger
+        self._clock = clock
+        self._next = 0
+        self._start = 0.0
+
+    def open(self):
+        self._start = self._clock()
+
+    def close(self):
+        pass
+
+    def read(self) -> list[str]:
+        now = self._clock()
+        elapsed = (now - self._start) * self._speed
+        messages = []
+        while self._next < len(self._messages) and self._messages[self._next][0] <= elapsed:
+            offset, message = self._messages[self._next]
+            messages.append(ReceivedLine(message, self._start + offset / self._speed))
+            self._next += 1
+        if not messages and self._next == len(self._messages):
+            last = self._messages[-1][0] if self._messages else 0.0
+            if elapsed - last > self._linger * self._speed:
+                raise EOFError("the recorded session is over")
+        return messages
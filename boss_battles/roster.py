@@ -0,0 +1,114 @@
+from typing import Iterable, Iterator
+import re
+
+from .character import Player, CharacterClass
+
+
+class AlreadyRegisteredError(Exception):
+    pass
+
+
+class InvalidClassError(Exception):
+    pass
+
+
+class InvalidNameError(Exception):
+    pass
+
+
+# names end up on the projector and the spectator page, so keep them plain
+VALID_NAME = re.compile(r"[a-z0-9_]+")
+
+
+def check_name(name: str) -> str:
+    "The name lowercased, if it only has letters, digits and underscores"
+    name = name.lower()
+    if not VALID_NAME.fullmatch(name):
+        raise InvalidNameError(f"'{name}' is not a valid name, use only letters, digits and _")
+    return name
+
+
+def parse_class(name: str) -> CharacterClass:
+    "'wizard' -> CharacterClass.WIZARD, an empty name is a fighter"
+    if not name:
+        return CharacterClass.FIGHTER
+    try:
+        return CharacterClass(name.lower())
+    except ValueError:
+        raise InvalidClassError(f"{name} is not a class, choose from: {', '.join(c.value for c in CharacterClass)}")
+
+
+def read_class_list(lines: Iterable[str]) -> Iterator[tuple[str, CharacterClass]]:
+    """
+    Reads a class list, one student per line as "username" or
+    "username,class". Blank lines and lines starting with # are skipped.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, _, class_name = line.partition(",")
+        name = name.strip().lower()
+        if not name:
+            raise ValueError(f"line {line_number}: missing username")
+        try:
+            yield check_name(name), parse_class(class_name.strip())
+        except (InvalidNameError, InvalidClassError) as e:
+            raise ValueError(f"line {line_number}: {e}")
+
+
+class RosterBuilder:
+    """
+    Builds each player's character as soon as they register, so starting the
+    battle only hands over the finished roster.
+    """
+    def __init__(self, reserved: Iterable[str] = ()):
+        self._players: dict[str, Player] = {}
+        # names players can't take, e.g. the bosses', so targets stay unambiguous
+        self._reserved: set[str] = set()
+        self.reserve(reserved)
+
+    def reserve(self, names: Iterable[str]) -> None:
+        "Keeps these names, lowercased, from being registered"
+        names = {name.lower() for name in names}
+        taken = names & self._players.keys()
+        if taken:
+            raise InvalidNameError(f"{', '.join(sorted(taken))} already registered as a player")
+        self._reserved |= names
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._players
+
+    @property
+    def names(self):
+        return self._players.keys()
+
+    @property
+    def players(self) -> list[Player]:
+        return list(self._players.values())
+
+    def register(self, name: str, character_class: CharacterClass = CharacterClass.FIGHTER) -> Player:
+        name = check_name(name)
+        if name in self._reserved:
+            raise InvalidNameError(f"'{name}' is taken, choose another name")
+        if name in self._players:
+            raise AlreadyRegisteredError(f"{name} already added.")
+        player = Player.roll(name, character_class)
+        self._players[name] = player
+        return player
+
+    def import_class_list(self, path: str) -> list[str]:
+        "Registers everyone in a class list file, returns the names that were already registered"
+        with open(path, encoding="utf-8") as f:
+            entries = list(read_class_list(f))
+
+        skipped = []
+        for name, character_class in entries:
+            try:
+                self.register(name, character_class)
+            except AlreadyRegisteredError:
+                skipped.append(name)
+        return skipped
@@ -0,0 +1,438 @@
+from dataclasses import dataclass, field
+from math import comb
+
+from .character import Character, Boss, Stats
+from .ability import AbilityRegistry, Ability, AreaAbility
+from .game import BossBattle
+
+
+# damage -> probability
+DamageDistribution = tuple[tuple[int, float], ...]
+
+# player health, sorted within each group of identical players
+Party = tuple[int, ...]
+
+# (damage the bosses have taken, probability) after the players' half of a round
+PlayersHalf = tuple[tuple[int, float], ...]
+
+# (probability the party is wiped out, the ids of the other parties and their probabilities)
+BossesHalf = tuple[float, tuple[tuple[int, float], ...]]
+
+
+@dataclass
+class BattleOutcome:
+    win_probability: float
+    loss_probability: float
+    unresolved_probability: float   # still undecided after max_rounds
+    rounds: dict[int, float] = field(default_factory=dict)  # round -> probability the battle ends in it
+
+    @property
+    def expected_rounds(self) -> float:
+        "Expected length of the battle, given that it ended within max_rounds"
+        resolved = self.win_probability + self.loss_probability
+        if resolved == 0:
+            return 0.0
+        return sum(r * p for r, p in self.rounds.items()) / resolved
+
+
+class BattleSolver:
+    """
+    Computes the exact outcome of a battle by propagating a probability
+    distribution over (boss health, player health) states round by round.
+
+    The model mirrors BossBattle:
+    - every conscious player uses `player_ability` on the first conscious boss
+      and always solves the opportunity token
+    - every conscious boss uses a random ability from its ability set on a
+      random conscious player, like Squirrel.do_turn; area abilities roll
+      damage once and every conscious player saves against them for half
+    - the battle is won as soon as all bosses are down and lost as soon as
+      all players are down
+
+    Players with identical stats are interchangeable, so their health values are
+    kept sorted to collapse symmetric states. Since players always hit the
+    first conscious boss, the bosses' health is just how much damage they have
+    taken in total. A round is propagated in two halves, players then bosses,
+    so the work grows with the sum of the two phases' outcomes rather than
+    their product. The players' half only depends on the damage taken and how
+    many players are up, the bosses' half only on the party and which bosses
+    are up, and each is memoized on just that. States whose probability falls
+    below `tolerance` after either half are dropped and counted as
+    unresolved, which bounds the work for long battles.
+    Bosses with a custom do_turn (e.g. PracticeDummy healing itself) are not
+    modelled, and abilities missing from the registry raise ValueError.
+    """
+    def __init__(self,
+                 players: list[Character],
+                 bosses: list[Boss],
+                 player_ability: str = "punch",
+                 max_rounds: int = 100,
+                 tolerance: float = 1e-9):
+        self._players = list(players)
+        self._bosses = list(bosses)
+        self._player_ability = BossBattle.get_ability(player_ability)
+        self._max_rounds = max_rounds
+        self._tolerance = tolerance
+
+        # players are grouped by everything that affects combat
+        groups: dict[tuple, list[Character]] = {}
+        for p in self._players:
+            groups.setdefault(BattleSolver._combat_signature(p), []).append(p)
+        self._groups = list(groups.values())
+        self._group_slices = []
+        start = 0
+        for group in self._groups:
+            self._group_slices.append(slice(start, start + len(group)))
+            start += len(group)
+        self._group_of = [i for i, group in enumerate(self._groups) for _ in group]
+
+        self._boss_abilities = [BattleSolver._boss_ability_set(b) for b in self._bosses]
+        # players always hit the first conscious boss, so the bosses are somewhere along
+        # a single line of damage taken, from 0 to all of their health
+        self._boss_start = tuple(b.get_health() for b in self._bosses)
+        self._total_boss_health = sum(self._boss_start)
+        self._conscious_at = [self._conscious_after(taken) for taken in range(self._total_boss_health + 1)]
+
+        self._damage_cache: dict[tuple, DamageDistribution] = {}
+        self._party_ids: dict[Party, int] = {}
+        self._parties: list[Party] = []
+        self._active: list[tuple[int, ...]] = []    # conscious players per group, by party id
+        self._players_half_cache: dict[tuple, PlayersHalf] = {}
+        self._bosses_half_cache: dict[tuple, BossesHalf] = {}
+        self._attack_steps_cache: dict[int, list[tuple[tuple[int, float], ...]]] = {}
+        self._boss_phase_cache: dict[tuple, dict[tuple[int, ...], float]] = {}
+        self._boss_action_cache: dict[tuple, dict[tuple[int, ...], float]] = {}
+
+    @staticmethod
+    def _combat_signature(c: Character) -> tuple:
+        return (
+            type(c),
+            getattr(c, '_character_class', None),
+            tuple(c.stats.get(t) for t in Stats.Type),
+            c._level,
+            c.get_max_health(),
+            tuple(c._resistances),
+            tuple(c._vulnerabilities),
+            tuple(c._immunities),
+        )
+
+    @staticmethod
+    def _boss_ability_set(boss: Boss) -> list[Ability]:
+        abilities = []
+        for ident in getattr(boss, '_ability_set', ()):
+            AbilityClass = AbilityRegistry.registry.get(ident)
+            if AbilityClass is None:
+                raise ValueError(f"{boss._name} uses '{ident}', which the solver does not know")
+            abilities.append(AbilityClass())
+        return abilities
+
+    def solve(self) -> BattleOutcome:
+        outcome = BattleOutcome(0.0, 0.0, 0.0)
+        total = self._total_boss_health
+        tolerance = self._tolerance
+        # party id -> damage the bosses have taken -> probability
+        distribution = {self._party_id(self._initial_party()): {0: 1.0}}
+
+        for round_number in range(1, self._max_rounds + 1):
+            if not distribution:
+                break
+
+            won = 0.0
+            lost = 0.0
+            next_distribution: dict[int, list[float]] = {}
+            for party_id, taken_probabilities in distribution.items():
+                # the players' half only moves the bosses along the line of damage
+                after_players = [0.0] * (total + 1)
+                for taken, p in taken_probabilities.items():
+                    for new_taken, p_next in self._players_half(taken, party_id):
+                        after_players[new_taken] += p * p_next
+                won += after_players[total]
+
+                # the bosses' half only changes the party, depending on who is still up
+                for taken in range(total):
+                    p = after_players[taken]
+                    if p == 0:
+                        continue
+                    if p < tolerance:
+                        outcome.unresolved_probability += p
+                        continue
+                    p_lost, outcomes = self._bosses_half(self._conscious_at[taken], party_id)
+                    lost += p * p_lost
+                    for next_party_id, p_next in outcomes:
+                        row = next_distribution.get(next_party_id)
+                        if row is None:
+                            row = next_distribution[next_party_id] = [0.0] * total
+                        row[taken] += p * p_next
+
+            outcome.win_probability += won
+            outcome.loss_probability += lost
+            if won or lost:
+                outcome.rounds[round_number] = won + lost
+
+            # states too unlikely to matter are dropped and reported as unresolved
+            distribution = {}
+            for party_id, row in next_distribution.items():
+                kept = {}
+                for taken, p in enumerate(row):
+                    if p >= tolerance:
+                        kept[taken] = p
+                    else:
+                        outcome.unresolved_probability += p
+                if kept:
+                    distribution[party_id] = kept
+
+        outcome.unresolved_probability += sum(sum(row.values()) for row in distribution.values())
+        return outcome
+
+    def _party_id(self, party: Party) -> int:
+        "Parties are numbered so the round loop hashes ints instead of tuples"
+        party_id = self._party_ids.get(party)
+        if party_id is None:
+            party_id = self._party_ids[party] = len(self._parties)
+            self._parties.append(party)
+            self._active.append(tuple(sum(1 for hp in party[s] if hp > 0) for s in self._group_slices))
+        return party_id
+
+    def _players_half(self, taken: int, party_id: int) -> PlayersHalf:
+        key = (taken, self._active[party_id])
+        cached = self._players_half_cache.get(key)
+        if cached is None:
+            cached = self._players_half_cache[key] = tuple(self._player_phase(*key).items())
+        return cached
+
+    def _bosses_half(self, conscious: tuple[bool, ...], party_id: int) -> BossesHalf:
+        key = (conscious, party_id)
+        cached = self._bosses_half_cache.get(key)
+        if cached is not None:
+            return cached
+
+        p_lost = 0.0
+        outcomes = []
+        for new_player_hps, p in self._boss_phase(conscious, self._parties[party_id]).items():
+            if any(new_player_hps):
+                outcomes.append((self._party_id(new_player_hps), p))
+            else:
+                p_lost += p
+        result = (p_lost, tuple(outcomes))
+        self._bosses_half_cache[key] = result
+        return result
+
+    def _conscious_after(self, taken: int) -> tuple[bool, ...]:
+        "Which bosses are still up after taking this much damage in order"
+        conscious = []
+        for start in self._boss_start:
+            hp = max(start - taken, 0)
+            taken -= start - hp
+            conscious.append(hp > 0)
+        return tuple(conscious)
+
+    def _initial_party(self) -> Party:
+        player_hps = tuple(p.get_health() for group in self._groups for p in group)
+        return self._canonical(player_hps)
+
+    def _canonical(self, player_hps: tuple[int, ...]) -> tuple[int, ...]:
+        result = []
+        for s in self._group_slices:
+            result.extend(sorted(player_hps[s], reverse=True))
+        return tuple(result)
+
+    def _player_phase(self, taken: int, active_per_group: tuple[int, ...]) -> dict[int, float]:
+        "Damage taken by the bosses after every conscious player attacks once"
+        distribution = {taken: 1.0}
+        for group_index, active in enumerate(active_per_group):
+            steps = self._attack_steps(group_index)
+            for _ in range(active):
+                next_distribution: dict[int, float] = {}
+                for taken, p in distribution.items():
+                    for next_taken, p_step in steps[taken]:
+                        next_distribution[next_taken] = next_distribution.get(next_taken, 0.0) + p * p_step
+                distribution = next_distribution
+        return distribution
+
+    def _attack_steps(self, group_index: int) -> list[tuple[tuple[int, float], ...]]:
+        "For every point along the line of damage, where one attack from the group moves it to"
+        steps = self._attack_steps_cache.get(group_index)
+        if steps is not None:
+            return steps
+
+        caster = self._groups[group_index][0]
+        total = self._total_boss_health
+        steps = []
+        end = 0
+        target_index = -1
+        for taken in range(total + 1):
+            # damage past the boss being hit is wasted, the next attack goes to the next boss
+            while taken >= end and target_index + 1 < len(self._bosses):
+                target_index += 1
+                end += self._boss_start[target_index]
+            if taken >= total:
+                steps.append(((taken, 1.0), ))
+                continue
+            moves: dict[int, float] = {}
+            target = self._bosses[target_index]
+            for damage, p_damage in self._damage_distribution(caster, self._player_ability, target):
+                next_taken = min(taken + damage, end)
+                moves[next_taken] = moves.get(next_taken, 0.0) + p_damage
+            steps.append(tuple(moves.items()))
+        self._attack_steps_cache[group_index] = steps
+        return steps
+
+    def _boss_phase(self, conscious: tuple[bool, ...], player_hps: Party) -> dict[Party, float]:
+        # only which bosses are still up matters, not how hurt they are
+        key = (conscious, player_hps)
+        cached = self._boss_phase_cache.get(key)
+        if cached is not None:
+            return cached
+
+        distribution = {player_hps: 1.0}
+        for boss_index, up in enumerate(conscious):
+            if not up:
+                continue
+            next_distribution: dict[tuple[int, ...], float] = {}
+            for hps, p in distribution.items():
+                for new_hps, p_action in self._boss_action(boss_index, hps).items():
+                    next_distribution[new_hps] = next_distribution.get(new_hps, 0.0) + p * p_action
+            distribution = next_distribution
+
+        self._boss_phase_cache[key] = distribution
+        return distribution
+
+    def _boss_action(self, boss_index: int, player_hps: tuple[int, ...]) -> dict[tuple[int, ...], float]:
+        key = (boss_index, player_hps)
+        cached = self._boss_action_cache.get(key)
+        if cached is not None:
+            return cached
+
+        boss = self._bosses[boss_index]
+        abilities = self._boss_abilities[boss_index]
+        targets = [i for i, hp in enumerate(player_hps) if hp > 0]
+        if not abilities or not targets:
+            return {player_hps: 1.0}
+
+        # players in the same group with the same health are the same target
+        distinct_targets: dict[tuple[int, int], list[int]] = {}
+        for i in targets:
+            key_target = (self._group_of[i], player_hps[i])
+            if key_target in distinct_targets:
+                distinct_targets[key_target][1] += 1
+            else:
+                distinct_targets[key_target] = [i, 1]
+
+        p_ability = 1 / len(abilities)
+        p_choice = p_ability / len(targets)
+        result: dict[tuple[int, ...], float] = {}
+        for ability in abilities:
+            if isinstance(ability, AreaAbility):
+                for new_hps, p in self._area_action(boss, ability, player_hps).items():
+                    result[new_hps] = result.get(new_hps, 0.0) + p_ability * p
+                continue
+            for (group_index, hp), (target_index, count) in distinct_targets.items():
+                target = self._groups[group_index][0]
+                for damage, p_damage in self._damage_distribution(boss, ability, target):
+                    p = p_choice * count * p_damage
+                    if damage == 0:
+                        result[player_hps] = result.get(player_hps, 0.0) + p
+                        continue
+                    new_hps = list(player_hps)
+                    new_hps[target_index] = max(hp - damage, 0)
+                    new_hps = self._canonical(tuple(new_hps))
+                    result[new_hps] = result.get(new_hps, 0.0) + p
+
+        self._boss_action_cache[key] = result
+        return result
+
+    def _area_action(self, boss: Boss, ability: AreaAbility, player_hps: tuple[int, ...]) -> dict[tuple[int, ...], float]:
+        "Like BossBattle._resolve_area_action: one damage roll, every conscious player saves for half"
+        ability_modifier = Stats.calc_modifier(boss.stats.get(ability.modifier_type))
+        save_dc = 8 + boss.get_proficiency_bonus() + ability_modifier
+
+        # identical players at the same health only differ in how many of them save
+        alike: dict[tuple[int, int], list[int]] = {}
+        for i, hp in enumerate(player_hps):
+            if hp > 0:
+                alike.setdefault((self._group_of[i], hp), []).append(i)
+
+        result: dict[tuple[int, ...], float] = {}
+        for damage_roll, p_roll in BattleSolver._roll_distribution(ability.effect_die, ability_modifier, False).items():
+            distribution = {player_hps: p_roll}
+            for (group_index, hp), indices in alike.items():
+                target = self._groups[group_index][0]
+                save_modifier = Stats.calc_modifier(target.stats.get(ability.save_type))
+                p_save = sum(1 for roll in range(1, 21) if roll + save_modifier >= save_dc) / 20
+                full = max(hp - BossBattle.calc_actual_damage(target, damage_roll, ability.effect_type), 0)
+                half = max(hp - BossBattle.calc_actual_damage(target, damage_roll // 2, ability.effect_type), 0)
+                count = len(indices)
+
+                next_distribution: dict[tuple[int, ...], float] = {}
+                for saves in range(count + 1):
+                    p_saves = comb(count, saves) * p_save ** saves * (1 - p_save) ** (count - saves)
+                    if p_saves == 0:
+                        continue
+                    for hps, p in distribution.items():
+                        new_hps = list(hps)
+                        for n, i in enumerate(indices):
+                            new_hps[i] = half if n < saves else full
+                        new_hps = tuple(new_hps)
+                        next_distribution[new_hps] = next_distribution.get(new_hps, 0.0) + p * p_saves
+                distribution = next_distribution
+
+            for new_hps, p in distribution.items():
+                new_hps = self._canonical(new_hps)
+                result[new_hps] = result.get(new_hps, 0.0) + p
+        return result
+
+    def _damage_distribution(self, caster: Character, ability: Ability, target: Character) -> DamageDistribution:
+        "Probability of each amount of damage a single use of ability does, misses included as 0"
+        key = (id(caster), type(ability), id(target))
+        cached = self._damage_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if type(ability) is AbilityRegistry.registry.get('cower'):
+            self._damage_cache[key] = ((0, 1.0),)
+            return self._damage_cache[key]
+
+        attack_bonus = BossBattle.attack_bonus(caster, ability.modifier_type)
+        target_ac = BossBattle.calc_ac(target)
+        ability_modifier = Stats.calc_modifier(caster.stats.get(ability.modifier_type))
+
+        outcomes: dict[int, float] = {}
+        for natural_roll in range(1, 21):
+            crit = natural_roll == 20
+            if not BossBattle.is_hit(crit, natural_roll + attack_bonus, target):
+                outcomes[0] = outcomes.get(0, 0.0) + 1 / 20
+                continue
+            for rolled, p in BattleSolver._roll_distribution(ability.effect_die, ability_modifier, crit).items():
+                actual = BossBattle.calc_actual_damage(target, rolled, ability.effect_type)
+                outcomes[actual] = outcomes.get(actual, 0.0) + p / 20
+
+        self._damage_cache[key] = tuple(outcomes.items())
+        return self._damage_cache[key]
+
+    @staticmethod
+    def _roll_distribution(effect_die: tuple[int, int], ability_modifier: int, crit: bool) -> dict[int, float]:
+        "Exact distribution of BossBattle.damage_roll"
+        num_rolls, die_size = effect_die
+        if crit:
+            num_rolls *= 2
+
+        totals = {0: 1.0}
+        for _ in range(num_rolls):
+            next_totals: dict[int, float] = {}
+            for total, p in totals.items():
+                for face in range(1, die_size + 1):
+                    next_totals[total + face] = next_totals.get(total + face, 0.0) + p / die_size
+            totals = next_totals
+
+        result: dict[int, float] = {}
+        for total, p in totals.items():
+            damage = max(total + ability_modifier, 1)
+            result[damage] = result.get(damage, 0.0) + p
+        return result
+
+
+def solve_battle(players: list[Character],
+                 bosses: list[Boss],
+                 player_ability: str = "punch",
+                 max_rounds: int = 100) -> BattleOutcome:
+    return BattleSolver(players, bosses, player_ability, max_rounds).solve()
@@ -0,0 +1,296 @@
+"""
+A read-only view of the battle for browsers, e.g. the projector or students'
+Chromebooks. The game loop publishes what changed and every connected page
+gets it over Server-Sent Events:
+
+    python -m boss_battles --spectator-port 8000
+    open http://<server>:8000/
+"""
+from typing import Any, Callable, Iterable, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import queue
+import threading
+import time
+
+from .events import CombatEvent
+
+
+# recent events a newly connected page starts with
+SNAPSHOT_EVENTS = 20
+
+
+def _event_entry(message) -> dict:
+    if isinstance(message, CombatEvent):
+        entry = message.as_dict()
+        entry["text"] = str(message)
+        return entry
+    return {"text": str(message)}
+
+
+def diff_state(previous: dict[str, Any], current: dict[str, Any]) -> dict[str, Any]:
+    "The keys of current that changed, nested dicts (e.g. health) are diffed a level down"
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if value == old:
+            continue
+        if isinstance(value, dict) and isinstance(old, dict):
+            delta[key] = {k: v for k, v in value.items() if old.get(k) != v}
+        else:
+            delta[key] = value
+    return delta
+
+
+def sse_message(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class SpectatorFeed:
+    """
+    Keeps the state spectators have been sent and fans out what changed.
+    Each delta is serialised once and the same bytes are queued for every
+    client; a client whose queue fills up is dropped rather than slowing the
+    game loop down.
+    """
+    def __init__(self, interval: float = 0.1, client_queue_size: int = 256):
+        self._interval = interval
+        self._client_queue_size = client_queue_size
+        self._lock = threading.Lock()
+        self._clients: set[queue.Queue] = set()
+        self._state: dict[str, Any] = {}
+        self._recent_events: list[dict] = []
+        self._snapshot: Optional[bytes] = None
+        self._last_publish = float("-inf")
+        self._seen_version = 0
+
+        # fan-out cost
+        self.deltas = 0
+        self.delta_bytes = 0
+        self.deliveries = 0
+        self.fanout_seconds = 0.0
+        self.dropped_clients = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def connect(self) -> tuple[queue.Queue, bytes]:
+        "A queue for a new client and the snapshot it starts from"
+        client: queue.Queue = queue.Queue(maxsize=self._client_queue_size)
+        with self._lock:
+            if self._snapshot is None:
+                snapshot = dict(self._state, events=self._recent_events)
+                self._snapshot = sse_message("snapshot", snapshot)
+            self._clients.add(client)
+            return client, self._snapshot
+
+    def disconnect(self, client: queue.Queue) -> None:
+        with self._lock:
+            self._clients.discard(client)
+
+    def is_connected(self, client: queue.Queue) -> bool:
+        "False once the client has been dropped for falling behind"
+        return client in self._clients
+
+    def maybe_publish(self, state: Callable[[], dict[str, Any]], log) -> bool:
+        """
+        Publishes at most once per interval. state builds the current state
+        and is only called when it is time to publish. log is a MessageLog
+        whose new messages are sent as events.
+        """
+        now = time.monotonic()
+        if now - self._last_publish < self._interval:
+            return False
+        self._last_publish = now
+
+        new_messages = min(log.version - self._seen_version, len(log))
+        self._seen_version = log.version
+        events = list(log)[len(log) - new_messages:] if new_messages else []
+        return self.publish(state(), events)
+
+    def publish(self, state: dict[str, Any], events: Iterable = ()) -> bool:
+        "Sends whatever changed since the last publish, returns False when nothing did"
+        entries = [_event_entry(e) for e in events]
+        with self._lock:
+            delta = diff_state(self._state, state)
+            if not delta and not entries:
+                return False
+            self._state = state
+            self._recent_events = (self._recent_events + entries)[-SNAPSHOT_EVENTS:]
+            self._snapshot = None
+            if entries:
+                delta["events"] = entries
+
+            message = sse_message("delta", delta)
+            self.deltas += 1
+            self.delta_bytes += len(message)
+
+            start = time.perf_counter()
+            for client in list(self._clients):
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    self._clients.discard(client)  # its connection closes at its next message
+                    self.dropped_clients += 1
+                else:
+                    self.deliveries += 1
+            self.fanout_seconds += time.perf_counter() - start
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "deltas": self.deltas,
+            "bytes_per_delta": self.delta_bytes / self.deltas if self.deltas else 0,
+            "fanout_us_per_client": self.fanout_seconds * 1e6 / self.deliveries if self.deliveries else 0,
+            "dropped_clients": self.dropped_clients,
+        }
+
+
+class _SpectatorHandler(BaseHTTPRequestHandler):
+    server: 'SpectatorServer'
+
+    def log_message(self, format, *args):
+        pass  # the game screen owns the terminal
+
+    def do_GET(self):
+        if self.path == "/":
+            self._send(200, "text/html; charset=utf-8", PAGE.encode("utf-8"))
+        elif self.path == "/stats":
+            self._send(200, "application/json", json.dumps(self.server.feed.stats()).encode("utf-8"))
+        elif self.path == "/events":
+            self._stream()
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        feed = self.server.feed
+        client, snapshot = feed.connect()
+        try:
+            self.wfile.write(snapshot)
+            self.wfile.flush()
+            while not self.server.stopping:
+                try:
+                    message = client.get(timeout=self.server.keepalive_seconds)
+                except queue.Empty:
+                    message = b": keepalive\n\n"
+                if not feed.is_connected(client):
+                    break
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            feed.disconnect(client)
+
+
+class SpectatorServer(ThreadingHTTPServer):
+    "Serves the spectator page and its event stream from a background thread"
+    daemon_threads = True
+
+    def __init__(self, feed: SpectatorFeed, host: str = "127.0.0.1", port: int = 8000,
+                 keepalive_seconds: float = 15):
+        super().__init__((host, port), _SpectatorHandler)
+        self.feed = feed
+        self.keepalive_seconds = keepalive_seconds
+        self.stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SpectatorServer':
+        self._thread = threading.Thread(target=self.serve_forever, name="spectators", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.stopping = True
+        self.shutdown()
+        self.server_close()
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Boss Battles</title>
+<style>
+  body { background: #111; color: #eee; font-family: monospace; margin: 2em; }
+  h1 { text-align: center; }
+  #timer { font-size: 4em; text-align: center; }
+  .row { display: flex; gap: 1em; align-items: center; }
+  .name { width: 12em; text-align: right; }
+  .bar { flex: 1; background: #333; height: 1em; }
+  .fill { background: #c33; height: 100%; }
+  .players .fill { background: #3a3; }
+  #columns { display: flex; gap: 2em; }
+  #columns > div { flex: 1; }
+  #log div { white-space: pre-wrap; }
+</style>
+</head>
+<body>
+<h1>BOSS BATTLES</h1>
+<div id="timer"></div>
+<div id="bosses"></div>
+<div id="tokens"></div>
+<div id="columns">
+  <div><h2>Players</h2><div id="players" class="players"></div></div>
+  <div><h2>Combat Log</h2><div id="log"></div></div>
+</div>
+<script>
+const state = {health: {}, bosses: []};
+function bars(element, names) {
+  // names come from students, so they only ever go in as text
+  element.replaceChildren(...names.map(name => {
+    const [hp, max] = state.health[name] || [0, 1];
+    const row = document.createElement("div");
+    row.className = "row";
+    const label = document.createElement("span");
+    label.className = "name";
+    label.textContent = name;
+    const bar = document.createElement("div");
+    bar.className = "bar";
+    const fill = document.createElement("div");
+    fill.className = "fill";
+    fill.style.width = `${Math.max(0, 100 * hp / max)}%`;
+    bar.append(fill);
+    const numbers = document.createElement("span");
+    numbers.textContent = `${hp} / ${max}`;
+    row.append(label, bar, numbers);
+    return row;
+  }));
+}
+function apply(delta) {
+  for (const [key, value] of Object.entries(delta)) {
+    if (key === "health") Object.assign(state.health, value);
+    else if (key !== "events") state[key] = value;
+  }
+  document.getElementById("timer").textContent = state.timer || "";
+  document.getElementById("tokens").textContent = (state.tokens || []).join("   ");
+  bars(document.getElementById("bosses"), state.bosses || []);
+  bars(document.getElementById("players"), Object.keys(state.health).filter(n => !(state.bosses || []).includes(n)));
+  const log = document.getElementById("log");
+  for (const event of delta.events || []) {
+    const line = document.createElement("div");
+    line.textContent = event.text;
+    log.prepend(line);
+  }
+  while (log.childElementCount > 50) log.lastChild.remove();
+}
+const source = new EventSource("/events");
+source.addEventListener("snapshot", e => apply(JSON.parse(e.data)));
+source.addEventListener("delta", e => apply(JSON.parse(e.data)));
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,152 @@
+from typing import Iterable, Optional
+from array import array
+
+from .character import Character, Boss, Stats
+from .ability import EffectType
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, the array columns do the same job
+    numpy = None
+
+
+STAT_TYPES = tuple(Stats.Type)
+EFFECT_BITS = {effect_type: 1 << i for i, effect_type in enumerate(EffectType)}
+
+# column name -> array typecode, stats are kept separately per Stats.Type
+COLUMNS = (('health', 'l'), ('max_health', 'l'), ('level', 'l'), ('is_boss', 'b'),
+           ('resistances', 'L'), ('vulnerabilities', 'L'), ('immunities', 'L'))
+
+
+def affinity_mask(effect_types: Iterable[EffectType]) -> int:
+    mask = 0
+    for effect_type in effect_types:
+        mask |= EFFECT_BITS[effect_type]
+    return mask
+
+
+class CombatantTable:
+    """
+    Combat state for a large roster kept in parallel columns, one row per
+    character, so bulk queries (total boss health, who is still conscious)
+    are a pass over a column instead of an attribute lookup per object.
+
+    Characters stay the source of truth for the rest of the engine. Binding
+    one copies its stats, level and affinities into a row and keeps the
+    health column in step through a health listener, so the character acts
+    as a view onto its row. Stats are copied when bound.
+
+    Columns are NumPy arrays when numpy is installed and use_numpy is set,
+    otherwise `array` columns.
+    """
+    def __init__(self, capacity: int = 64, use_numpy: bool = True):
+        self._numpy = numpy if use_numpy else None
+        self._capacity = max(capacity, 1)
+        self._size = 0
+        self._characters: list[Character] = []
+        self._rows: dict[str, int] = {}
+
+        self.health = self._column('l')
+        self.max_health = self._column('l')
+        self.level = self._column('l')
+        self.is_boss = self._column('b')
+        self.stats = {stat_type: self._column('l') for stat_type in STAT_TYPES}
+        self.resistances = self._column('L')
+        self.vulnerabilities = self._column('L')
+        self.immunities = self._column('L')
+
+    @property
+    def uses_numpy(self) -> bool:
+        return self._numpy is not None
+
+    def _column(self, typecode: str, capacity: Optional[int] = None):
+        capacity = self._capacity if capacity is None else capacity
+        if self._numpy is not None:
+            dtype = {'l': self._numpy.int64, 'b': self._numpy.bool_, 'L': self._numpy.uint64}[typecode]
+            return self._numpy.zeros(capacity, dtype=dtype)
+        return array(typecode, bytes(array(typecode).itemsize * capacity))
+
+    def _grow(self) -> None:
+        capacity = self._capacity * 2
+        for name, typecode in COLUMNS:
+            setattr(self, name, self._grown(getattr(self, name), typecode, capacity))
+        self.stats = {t: self._grown(column, 'l', capacity) for t, column in self.stats.items()}
+        self._capacity = capacity
+
+    def _grown(self, column, typecode: str, capacity: int):
+        grown = self._column(typecode, capacity)
+        grown[:self._size] = column[:self._size]
+        return grown
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def row(self, name: str) -> int:
+        return self._rows[name]
+
+    def bind(self, character: Character) -> int:
+        "Adds the character as a new row and returns the row index"
+        if character._name in self._rows:
+            raise ValueError(f"{character._name} is already in the table")
+        if self._size == self._capacity:
+            self._grow()
+
+        row = self._size
+        self._size += 1
+        self._rows[character._name] = row
+        self._characters.append(character)
+
+        self.health[row] = character.get_health()
+        self.max_health[row] = character.get_max_health()
+        self.level[row] = character._level
+        self.is_boss[row] = isinstance(character, Boss)
+        stats = character.stats
+        for stat_type, column in self.stats.items():
+            column[row] = stats.get(stat_type)
+        self.resistances[row] = affinity_mask(character._resistances)
+        self.vulnerabilities[row] = affinity_mask(character._vulnerabilities)
+        self.immunities[row] = affinity_mask(character._immunities)
+
+        character.add_health_listener(self._on_health_changed)
+        return row
+
+    def _on_health_changed(self, character: Character, previous_health: int) -> None:
+        self.health[self._rows[character._name]] = character.get_health()
+
+    def total_health(self, bosses: bool) -> int:
+        n = self._size
+        if self._numpy is not None:
+            mask = self.is_boss[:n] if bosses else ~self.is_boss[:n]
+            return int(self.health[:n][mask].sum())
+        return sum(hp for hp, boss in zip(self.health[:n], self.is_boss[:n]) if bool(boss) == bosses)
+
+    def health_at(self, rows: list[int]) -> tuple[int, ...]:
+        "Health of the given rows, in that order"
+        if self._numpy is not None:
+            return tuple(self.health[rows].tolist())
+        return tuple(self.health[row] for row in rows)
+
+    def conscious_count(self, bosses: bool) -> int:
+        n = self._size
+        if self._numpy is not None:
+            mask = self.is_boss[:n] if bosses else ~self.is_boss[:n]
+            return int((self.health[:n][mask] > 0).sum())
+        return sum(1 for hp, boss in zip(self.health[:n], self.is_boss[:n]) if hp > 0 and bool(boss) == bosses)
+
+    def conscious(self, bosses: bool) -> list[Character]:
+        "Conscious characters in row order"
+        n = self._size
+        if self._numpy is not None:
+            mask = self.health[:n] > 0
+            mask &= self.is_boss[:n] if bosses else ~self.is_boss[:n]
+            return [self._characters[i] for i in self._numpy.flatnonzero(mask)]
+        return [c for c, hp, boss in zip(self._characters, self.health[:n], self.is_boss[:n])
+                if hp > 0 and bool(boss) == bosses]
+
+    def affected(self, effect_type: EffectType, column) -> list[Character]:
+        "Characters whose affinity column (e.g. table.immunities) includes effect_type"
+        bit = EFFECT_BITS[effect_type]
+        return [self._characters[i] for i in range(self._size) if int(column[i]) & bit]
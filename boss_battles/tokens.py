@@ -0,0 +1,54 @@
+from typing import Optional, Iterable
+from collections import deque
+
+
+class OpportunityTokenStore:
+    """
+    Fixed-size opportunity token storage for a battle.
+
+    Each boss has a current token plus a grace window of its last few tokens,
+    so a solve that arrives just after the round changes is still accepted.
+    The "name:token" list shown to players is cached and only rebuilt when a
+    round starts.
+    """
+    def __init__(self, names: Iterable[str], grace_rounds: int = 1):
+        self._grace_rounds = grace_rounds
+        self._current: dict[str, Optional[str]] = {}
+        self._previous: dict[str, deque[str]] = {}
+        for name in names:
+            self._current[name] = None
+            self._previous[name] = deque(maxlen=grace_rounds)
+        self._formatted: Optional[tuple[str, ...]] = None
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._current
+
+    def set_token(self, name: str, token: str) -> None:
+        previous = self._current[name]
+        if previous is not None and self._grace_rounds > 0:
+            self._previous[name].appendleft(previous)
+        self._current[name] = token
+
+    def get_token(self, name: str) -> str:
+        token = self._current[name]
+        if token is None:
+            raise IndexError(f"No opportunity token has been generated for '{name}'.")
+        return token
+
+    def valid_tokens(self, name: str) -> tuple[str, ...]:
+        "The current token followed by the grace window, newest first"
+        token = self._current[name]
+        if token is None:
+            return ()
+        return (token, *self._previous[name])
+
+    def start_round(self) -> None:
+        self._formatted = tuple(name + ":" + token for name, token in self._current.items() if token is not None)
+
+    def formatted_tokens(self) -> tuple[str, ...]:
+        if self._formatted is None:
+            raise IndexError("Opportunity tokens are generated when a round starts.")
+        return self._formatted
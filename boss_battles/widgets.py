@@ -0,0 +1,146 @@
+from typing import Callable, Generic, Iterable, TypeVar
+from bisect import bisect_left
+from functools import lru_cache
+import time
+
+from .character import Character
+
+
+T = TypeVar("T")
+
+
+class VirtualList(Generic[T]):
+    """
+    A sorted list that is drawn a page at a time. Only the items on the page
+    that is showing get formatted, so a long list costs the same to draw as a
+    short one. Pages advance by themselves every page_seconds, or can be set.
+    """
+    def __init__(self,
+                 items: Iterable[T] = (),
+                 key: Callable[[T], str] = str,
+                 page_seconds: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._key = key
+        self._keys: list[str] = []
+        self._items: list[T] = []
+        self._page_seconds = page_seconds
+        self._clock = clock
+        self._manual_page = None
+        self.version = 0
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, item: T) -> None:
+        key = self._key(item)
+        i = bisect_left(self._keys, key)
+        self._keys.insert(i, key)
+        self._items.insert(i, item)
+        self.version += 1
+
+    def remove(self, item: T) -> None:
+        key = self._key(item)
+        i = bisect_left(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            raise ValueError(f"{key} is not in the list")
+        del self._keys[i]
+        del self._items[i]
+        self.version += 1
+
+    def set_page(self, page) -> None:
+        "Shows this page until set_page(None) goes back to turning pages by time"
+        self._manual_page = page
+
+    def tick(self) -> int:
+        "Changes whenever the page may have turned by itself"
+        if self._manual_page is not None or self._page_seconds <= 0:
+            return self._manual_page or 0
+        return int(self._clock() // self._page_seconds)
+
+    def page_count(self, page_size: int) -> int:
+        return max(1, -(-len(self._items) // max(page_size, 1)))
+
+    def page(self, page_size: int) -> int:
+        pages = self.page_count(page_size)
+        if self._manual_page is not None:
+            return min(self._manual_page, pages - 1)
+        if pages == 1 or self._page_seconds <= 0:
+            return 0
+        return int(self._clock() // self._page_seconds) % pages
+
+    def visible(self, page_size: int) -> list[T]:
+        start = self.page(page_size) * page_size
+        return self._items[start:start + page_size]
+
+    def draw(self,
+             window,
+             top: int,
+             left: int,
+             rows: int,
+             columns: int,
+             column_width: int,
+             format_item: Callable[[T], str] = str) -> None:
+        """
+        Draws the current page in columns, filled top to bottom, with a
+        'page x/y' footer on the row below when there is more than one page.
+        """
+        page_size = rows * columns
+        for i, item in enumerate(self.visible(page_size)):
+            column, row = divmod(i, rows)
+            window.addstr(top + row, left + column * column_width, format_item(item)[:column_width - 1])
+
+        pages = self.page_count(page_size)
+        if pages > 1:
+            window.addstr(top + rows, left, f"page {self.page(page_size) + 1}/{pages} ({len(self._items)})")
+
+
+@lru_cache(maxsize=1024)
+def bar(width: int, filled: int, full: str = '█', empty: str = '░') -> str:
+    "A bar of width cells with the first filled ones full, shared by every character"
+    return full * filled + empty * (width - filled)
+
+
+def filled_cells(health: int, max_health: int, width: int) -> int:
+    "Health quantized to whole cells of a bar"
+    if max_health <= 0:
+        return 0
+    return max(0, min(width, int(width * health / max_health)))
+
+
+class HealthBars:
+    """
+    Health bar lines cached per character. A line is only rebuilt when the
+    character's health or the bar width changes; the bar itself comes from a
+    cache keyed on width and quantized health that every character shares.
+    """
+    def __init__(self):
+        self._lines: dict[tuple[str, str], tuple[tuple, str]] = {}
+
+    def _cached(self, kind: str, character: Character, width: int, build: Callable[[int, int], str]) -> str:
+        remaining, maximum = character.get_remaining_and_max_health()
+        key = (remaining, maximum, width)
+        cached = self._lines.get((kind, character._name))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        line = build(remaining, maximum)
+        self._lines[(kind, character._name)] = (key, line)
+        return line
+
+    def line(self, character: Character, bar_width: int) -> str:
+        "NAME ██████░░░░ (hp / max), as the boss bars show it"
+        def build(remaining, maximum):
+            filled = filled_cells(remaining, maximum, bar_width)
+            return f"{character._name.upper():>10} {bar(bar_width, filled)} ({remaining} / {maximum})"
+        return self._cached("line", character, bar_width, build)
+
+    def cell(self, character: Character, width: int, bar_width: int = 5) -> str:
+        "A compact 'name ███░░' grid cell for large rosters"
+        def build(remaining, maximum):
+            name_width = max(width - bar_width - 2, 1)
+            return f"{character._name[:name_width]:<{name_width}} {bar(bar_width, filled_cells(remaining, maximum, bar_width))}"
+        return self._cached("cell", character, width, build)
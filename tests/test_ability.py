@@ -1,5 +1,6 @@
 import pytest
 from boss_battles.ability import AbilityRegistry, Punch, CureWounds, Longsword, FireBolt, Cower
+from boss_battles.ability import HashChainPuzzle, TransformPuzzle, Smite, Shatter, MindSpike
 from boss_battles.character import Stats, Boss, Player
 
 
@@ -62,3 +63,45 @@ def test_swift_longsword_algorithm():
     assert lsword.algorithm(op_token="abcd") == "abcd"
 
 
+
+
+def test_puzzle_abilities_are_registered():
+    assert AbilityRegistry.registry["smite"] is Smite
+    assert AbilityRegistry.registry["shatter"] is Shatter
+    assert AbilityRegistry.registry["mspike"] is MindSpike
+
+
+def test_hash_chain_puzzle():
+    smite = Smite()
+    answer = smite.algorithm("abcd")
+    assert len(answer) == 8
+    assert smite.verify("abcd", answer)
+    assert not smite.verify("abce", answer)
+    assert HashChainPuzzle.fnv1a("a") == "e40c292c"
+
+
+def test_factor_puzzle():
+    shatter = Shatter()
+    n = int("abcd", 36) * 100 + 1
+    answer = int(shatter.algorithm("abcd"))
+    assert n % answer == 0
+    assert all(answer % d != 0 for d in range(2, int(answer ** 0.5) + 1))
+
+
+def test_transform_puzzle_difficulty_adds_passes():
+    class OnePass(TransformPuzzle):
+        difficulty = 1
+
+    # shift by position: a+0, b+1, c+2, d+3, then reverse
+    assert OnePass().algorithm("abcd") == "geca"
+
+
+def test_harder_puzzles_take_more_work():
+    class Easy(HashChainPuzzle):
+        difficulty = 1
+
+    class Hard(HashChainPuzzle):
+        difficulty = 2
+
+    assert Easy().algorithm("abcd") != Hard().algorithm("abcd")
+    assert Hard().algorithm("abcd") == Easy().algorithm(Easy().algorithm("abcd"))
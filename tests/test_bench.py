@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from boss_battles.bench import SCENARIOS, measure, find_regressions, main
+
+
+def test_reactions_scenario_runs():
+    run = SCENARIOS["reactions"](5)
+    assert measure(run, repeat=1) > 0
+
+
+@pytest.mark.parametrize("name", ["parse", "handle-action", "bosses-turn", "next-round", "draw-text", "tick"])
+def test_scenario_runs_repeatedly(name):
+    run = SCENARIOS[name](10)
+    run()
+    run()
+
+
+def test_find_regressions_uses_threshold():
+    baseline = {"parse": {"10": 1.0, "100": 1.0}}
+    results = {"parse": {"10": 1.1, "100": 1.5}, "tick": {"10": 9.0}}
+    regressions = find_regressions(results, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("parse with 100 players")
+
+
+def test_main_writes_json_and_compares(tmp_path, capsys):
+    results = tmp_path / "results.json"
+    assert main(["parse", "--players", "5", "--repeat", "1", "--json", str(results)]) == 0
+    written = json.loads(results.read_text())
+    assert set(written["results"]["parse"]) == {"5"}
+
+    # a baseline nothing can beat
+    written["results"]["parse"]["5"] = 1e-12
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(written))
+    assert main(["parse", "--players", "5", "--repeat", "1", "--baseline", str(baseline)]) == 1
+    assert "REGRESSION parse" in capsys.readouterr().out
@@ -0,0 +1,59 @@
+from boss_battles.display import FONT5x7, PIXEL, glyph_rows, render_text, draw_text, draw_char
+
+
+class RecordingScreen:
+    def __init__(self, height: int = 40, width: int = 120):
+        self.height = height
+        self.width = width
+        self.calls = 0
+        self.cells = {}
+
+    def getmaxyx(self):
+        return (self.height, self.width)
+
+    def addstr(self, y, x, text, *args):
+        self.calls += 1
+        for i, char in enumerate(text):
+            self.cells[(y, x + i)] = char
+
+    def lit(self):
+        return {pos for pos, char in self.cells.items() if char == PIXEL}
+
+
+def lit_pixels(x, y, text):
+    "Where the old per-pixel loop put its pixels"
+    pixels = set()
+    for i, char in enumerate(text):
+        for col_index, col_value in enumerate(FONT5x7.get(char.upper(), [])):
+            for row_index in range(7):
+                if (col_value >> row_index) & 0x01:
+                    pixels.add((y + (6 - row_index), x + i * 6 + col_index))
+    return pixels
+
+
+def test_glyph_rows_match_the_font():
+    screen = RecordingScreen()
+    draw_char(screen, 3, 2, "b")
+    assert screen.lit() == lit_pixels(3, 2, "B")
+    assert len(glyph_rows("B")) == 7
+
+
+def test_draw_text_uses_one_call_per_row():
+    screen = RecordingScreen()
+    draw_text(screen, 4, 1, "BOSS 9.5")
+    assert screen.calls == 7
+    assert screen.lit() == lit_pixels(4, 1, "BOSS 9.5")
+
+
+def test_draw_text_centers():
+    screen = RecordingScreen(width=100)
+    draw_text(screen, 0, 0, "AB", align="center")
+    assert min(x for _, x in screen.lit()) >= (100 - 11) // 2
+
+
+def test_rendered_text_is_cached():
+    render_text.cache_clear()
+    render_text("1.0")
+    render_text("1.0")
+    assert render_text.cache_info().hits == 1
+    assert all(len(row) == 3 * 5 + 2 for row in render_text("1.0"))
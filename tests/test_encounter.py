@@ -0,0 +1,117 @@
+import json
+import os
+import pytest
+
+from boss_battles.encounter import compile_encounter, load_encounter, EncounterError
+from boss_battles.game import BossBattle, unique_names
+from boss_battles.character import Boss, Player, Squirrel, Stats, Wyrmling, BossRegistry
+from boss_battles.ability import EffectType
+
+
+SWARM = {
+    "name": "Swarm",
+    "bosses": [
+        {"type": "squirrel", "count": 2, "hit_die": [2, 4], "stats": {"constitution": 10}},
+        {"type": "wyrmling", "resistances": ["cold"], "abilities": ["bite"]},
+    ]
+}
+
+
+def test_unique_names_only_numbers_repeats():
+    assert unique_names(["squirrel", "wyrmling", "squirrel"]) == ["squirrel1", "wyrmling", "squirrel2"]
+
+
+def test_unique_names_skips_names_already_taken():
+    assert unique_names(["squirrel1", "squirrel", "squirrel"]) == ["squirrel1", "squirrel2", "squirrel3"]
+    assert unique_names(["squirrel", "squirrel", "squirrel2"]) == ["squirrel1", "squirrel3", "squirrel2"]
+    names = unique_names(["a", "a", "a1", "a1", "a11"])
+    assert len(set(names)) == len(names)
+
+
+def test_boss_battle_numbers_bosses_sharing_a_name():
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[Squirrel(), Wyrmling(), Squirrel()])
+    assert [b._name for b in battle.bosses] == ["squirrel1", "wyrmling", "squirrel2"]
+
+
+def test_bosses_register_by_identifier():
+    assert BossRegistry.registry["squirrel"] is Squirrel
+
+
+def test_every_registered_boss_can_take_a_turn():
+    for BossClass in BossRegistry.registry.values():
+        assert BossClass.do_turn is not Boss.do_turn, BossClass
+
+
+def test_compile_refuses_bosses_that_cant_take_a_turn(monkeypatch):
+    class Statue(Boss):
+        def __init__(self):
+            super().__init__("statue", (1, 4), Stats())
+    monkeypatch.setitem(BossRegistry.registry, "statue", Statue)
+    with pytest.raises(EncounterError):
+        compile_encounter({"bosses": [{"type": "statue"}]})
+
+
+def test_compile_checks_boss_names():
+    squirrel, = compile_encounter({"bosses": [{"type": "squirrel", "name": "Nutty"}]}).new_bosses()
+    assert squirrel._name == "nutty"
+
+
+def test_compile_applies_overrides():
+    template = compile_encounter(SWARM)
+    assert template.name == "Swarm"
+    assert len(template) == 3
+
+    squirrel, _, wyrmling = template.new_bosses()
+    assert squirrel._name == "squirrel1"
+    assert squirrel.get_max_health() == 2 * 3
+    assert wyrmling.is_resistant_to(EffectType.COLD)
+    assert wyrmling._ability_set == ("bite", )
+
+
+def test_template_bosses_are_fresh_every_battle():
+    template = compile_encounter(SWARM)
+    first = template.new_battle([Player.roll_fighter("player")])
+    first.get_boss("squirrel1").take_damage(100)
+    first.get_boss("squirrel2")._base_stats.strength = 30
+
+    second = template.new_battle([Player.roll_fighter("player")])
+    assert [b._name for b in second.bosses] == ["squirrel1", "squirrel2", "wyrmling"]
+    assert second.get_boss("squirrel1").is_conscious()
+    assert second.get_boss("squirrel2").stats.strength == 2
+    assert len(second.conscious_bosses) == 3
+
+
+@pytest.mark.parametrize("data", [
+    {"bosses": []},
+    {"bosses": [{"type": "dragon"}]},
+    {"bosses": [{"type": "squirrel", "abilities": ["nope"]}]},
+    {"bosses": [{"type": "squirrel", "immunities": ["nope"]}]},
+    {"bosses": [{"type": "squirrel", "stats": {"luck": 3}}]},
+    {"bosses": [{"type": "squirrel", "name": "big squirrel"}]},
+    {"bosses": [{"type": "squirrel", "name": "Nutty"}, {"type": "wyrmling", "name": "nutty"}]},
+    {"bosses": [{"type": "squirrel"}, {"type": "wyrmling", "name": "squirrel"}]},
+])
+def test_compile_rejects_bad_encounters(data):
+    with pytest.raises(EncounterError):
+        compile_encounter(data)
+
+
+def test_load_encounter_is_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "swarm.json"
+    path.write_text(json.dumps(SWARM))
+    template = load_encounter(str(path))
+    assert load_encounter(str(path)) is template
+
+    path.write_text(json.dumps({"bosses": [{"type": "wyrmling"}]}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = load_encounter(str(path))
+    assert reloaded is not template
+    assert len(reloaded) == 1
+
+
+def test_load_toml_encounter(tmp_path):
+    pytest.importorskip("tomllib")
+    path = tmp_path / "swarm.toml"
+    path.write_text('name = "Swarm"\n\n[[bosses]]\ntype = "squirrel"\ncount = 2\n')
+    assert [b._name for b in load_encounter(str(path)).new_bosses()] == ["squirrel1", "squirrel2"]
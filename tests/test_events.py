@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from boss_battles.events import CombatEvent, EventKind
+from boss_battles.display import tail_lines
+from boss_battles.game import BossBattle
+from boss_battles.character import Player, Squirrel
+from boss_battles.ability import Punch
+
+from helpers import FakeReader, FakeGameServer
+
+
+def test_hit_event_text():
+    event = CombatEvent(EventKind.HIT, "player", "punch", "Punch", "squirrel", roll=22, damage=7, crit=True)
+    assert str(event) == "player inflicts 7 (CRIT) on squirrel (Punch)."
+
+
+def test_hit_event_with_affinity_and_ko():
+    event = CombatEvent(EventKind.HIT, "player", "fbolt", "Fire Bolt", "squirrel",
+                        damage=3, affinity="resistant", ko=True)
+    assert str(event) == "player inflicts 3 on squirrel (Fire Bolt) RESISTANT.\nsquirrel IS DEFETED!"
+
+
+def test_other_event_text():
+    assert str(CombatEvent(EventKind.MISS, "player", "punch", "Punch", "squirrel")) == "player's Punch MISSES squirrel."
+    assert str(CombatEvent(EventKind.COWER, "squirrel", "cower", "Cower", "player")) == "squirrel COWERS before player"
+    assert str(CombatEvent(EventKind.WRONG_TOKEN, "player", "lsword", "Longsword", "squirrel", solve_token="abcd")) \
+        == "WRONG SOLVE TOKEN - player/lsword abcd"
+
+
+@patch("random.randint", side_effect=[20, 2, 2])
+def test_apply_action_records_the_details(mock_randint):
+    player = Player.roll_fighter("player")
+    boss = Squirrel()
+    battle = BossBattle(players=[player], bosses=[boss])
+
+    event = battle._apply_action(player, Punch(), boss)
+    assert event.kind is EventKind.HIT
+    assert event.caster == "player"
+    assert event.target == "squirrel"
+    assert event.roll == 25
+    assert event.damage == 7
+    assert event.crit is True
+    assert event.ko is True
+
+
+def test_tail_lines_only_takes_what_fits():
+    class Counting:
+        formatted = 0
+
+        def __str__(self):
+            Counting.formatted += 1
+            return "line"
+
+    messages = [Counting() for _ in range(100)]
+    assert tail_lines(messages, 5) == ["line"] * 5
+    assert Counting.formatted == 5
+
+
+def test_tail_lines_splits_multi_line_messages():
+    assert tail_lines(["a", "b\nc", "d"], 3) == ["b", "c", "d"]
+
+
+def test_game_server_logs_are_bounded():
+    reader = FakeReader()
+    reader.add_messages([f"user{n}/register" for n in range(50)] + [f"user{n}/register" for n in range(50)])
+    game = FakeGameServer(bosses=[], reader=reader, log_size=10)
+    game.run()
+    assert len(game._battle_messages) == 10
+    assert len(game._error_messages) == 10
+
+
+def test_area_event_text():
+    event = CombatEvent(EventKind.AREA, "wyrmling", "firebreath", "Fire Breath", "players",
+                        damage=25, targets=3, saves=2, knocked_out=("a", ))
+    assert str(event) == "wyrmling's Fire Breath hits 3 players for 25 total damage (2 saved).\na IS DEFETED!"
+
+    event = CombatEvent(EventKind.AREA, "wyrmling", "firebreath", "Fire Breath", "players",
+                        damage=60, targets=5, knocked_out=("a", "b", "c", "d"))
+    assert str(event).endswith("\n4 ARE DEFETED!")
@@ -0,0 +1,51 @@
+from boss_battles.frame import Canvas, FrameStats, write_changes
+
+
+class RecordingWindow:
+    def __init__(self):
+        self.writes = []
+
+    def addstr(self, y, x, text, attr=0):
+        self.writes.append((y, x, text, attr))
+
+
+def test_canvas_clips_instead_of_wrapping():
+    canvas = Canvas(2, 5)
+    canvas.addstr(0, 3, "abcdef")
+    canvas.addstr(5, 0, "off screen")
+    canvas.addstr(1, -2, "xyz")
+    assert canvas.row_text(0) == "   ab"
+    assert canvas.row_text(1) == "z    "
+
+
+def test_canvas_border():
+    canvas = Canvas(3, 4)
+    canvas.border()
+    assert [canvas.row_text(y) for y in range(3)] == ["┌──┐", "│  │", "└──┘"]
+
+
+def test_only_changed_spans_are_written():
+    before = Canvas(3, 10)
+    before.addstr(0, 0, "HP 10 / 10")
+    before.addstr(1, 0, "unchanged")
+    after = Canvas(3, 10)
+    after.addstr(0, 0, "HP  9 / 10")
+    after.addstr(1, 0, "unchanged")
+
+    window = RecordingWindow()
+    stats = write_changes(window, after, before)
+    assert window.writes == [(0, 3, " 9", 0)]
+    assert stats == FrameStats(cells=2, bytes=2, writes=1)
+
+
+def test_attributes_are_written_in_runs():
+    before = Canvas(1, 6)
+    after = Canvas(1, 6)
+    after.addstr(0, 0, "ab")
+    after.addstr(0, 2, "██", 7)
+
+    window = RecordingWindow()
+    stats = write_changes(window, after, before)
+    assert window.writes == [(0, 0, "ab", 0), (0, 2, "██", 7)]
+    assert stats.cells == 4
+    assert stats.bytes == 2 + 6
@@ -1,10 +1,12 @@
 import pytest
 from unittest.mock import patch
+from concurrent.futures import Future, ThreadPoolExecutor
 
 
-from boss_battles.game import BossBattle, InvalidTargetError, InvalidAbilityError
-from boss_battles.character import Squirrel, Player, Stats, Boss
-from boss_battles.ability import EffectType, AbilityRegistry, Ability
+from boss_battles.game import BossBattle, InvalidTargetError, InvalidAbilityError, AnswerPendingError, TurnAlreadyTakenError
+from boss_battles.events import EventKind
+from boss_battles.character import Squirrel, Player, Stats, Boss, Wyrmling
+from boss_battles.ability import EffectType, AbilityRegistry, Ability, MindSpike
 from boss_battles.command import Command
 
 
@@ -251,7 +253,7 @@ def test_boss_battle_apply_action(mock_randint):
     ability = AbilityRegistry.registry.get('punch')  # has die of (1, 2)
     # hit roll: 20
 
-    result_string = battle._apply_action(player, ability, boss)
+    result_string = str(battle._apply_action(player, ability, boss))
     assert Stats.calc_modifier(player.stats.get(ability.modifier_type)) == 3
     # damage roll: 2, 2 + 3 (strength modifier) = 7
     assert "test inflicts 7 (CRIT)" in result_string
@@ -269,7 +271,7 @@ def test_boss_battle_apply_action_misses_squirrel(mock_randint):
 
     assert BossBattle.calc_ac(boss) == 30
 
-    result_string = battle._apply_action(player, ability, boss)
+    result_string = str(battle._apply_action(player, ability, boss))
     assert "test's Punch MISSES squirrel" in result_string
 
 
@@ -299,3 +301,262 @@ def test_minimum_damage_roll_is_1():
     assert BossBattle.damage_roll(effect_die=(1, 1),
                                   ability_modifier=-5,
                                   crit=False) == 1    
+
+
+def test_conscious_indexes_follow_health_changes():
+    p1 = Player.roll_fighter("player1")
+    p2 = Player.roll_fighter("player2")
+    b = Squirrel()
+    battle = BossBattle(players=[p1, p2], bosses=[b])
+    assert len(battle.conscious_players) == 2
+    assert len(battle.conscious_bosses) == 1
+
+    p1.take_damage(1000)
+    assert p1 not in battle.conscious_players
+    assert len(battle.conscious_players) == 1
+
+    p1.heal(1)
+    assert p1 in battle.conscious_players
+
+    b._health = 0
+    assert len(battle.conscious_bosses) == 0
+
+
+def test_squirrel_only_targets_conscious_players():
+    players = [Player.roll_fighter(f"player{n}") for n in range(10)]
+    boss = Squirrel()
+    battle = BossBattle(players=players, bosses=[boss])
+    for p in players[1:]:
+        p.take_damage(1000)
+
+    for _ in range(20):
+        _, _, target = boss.do_turn(battle)
+        assert target is players[0]
+
+
+def test_bosses_stop_when_every_player_is_down():
+    player = Player.roll_fighter("player")
+    battle = BossBattle(players=[player], bosses=[Squirrel(), Squirrel()])
+    player.take_damage(1000)
+    assert battle.bosses_turn() == []
+
+
+def test_next_round_precomputes_solve_answers(monkeypatch):
+    with monkeypatch.context() as m:
+        # registers into a copy, so other tests never see it
+        m.setattr(AbilityRegistry, "registry", dict(AbilityRegistry.registry))
+
+        class CountingAbility(Ability):
+            identifier = "countingability"
+            name = "Counting Ability"
+            effect_type = EffectType.FORCE
+            effect_die = (1, 1)
+            modifier_type = Stats.Type.STRENGTH
+            calls = 0
+
+            def algorithm(self, op_token):
+                CountingAbility.calls += 1
+                return op_token[::-1]
+
+        boss = Squirrel()
+        players = [Player.roll_fighter(f"player{n}") for n in range(5)]
+        battle = BossBattle(players=players, bosses=[boss], token_grace_rounds=0)
+        battle.next_round()
+        token = battle.get_opportunity_token(boss)
+        assert battle._solve_answers[("squirrel", "countingability")] == {token[::-1]}
+
+        calls_before = CountingAbility.calls
+        for p in players:
+            assert battle.handle_action(Command(f"{p._name}@squirrel/countingability {token[::-1]}")).kind is not EventKind.WRONG_TOKEN
+        assert CountingAbility.calls == calls_before, "verification should not run the algorithm"
+
+    assert "countingability" not in AbilityRegistry.registry
+
+
+def test_abilities_with_custom_verify_are_checked_directly():
+    boss = Squirrel()
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[boss])
+    battle.next_round()
+    assert ("squirrel", "punch") not in battle._solve_answers
+    assert battle.handle_action(Command("player@squirrel/punch")).kind is not EventKind.WRONG_TOKEN
+
+
+class ManualExecutor:
+    "Hands out futures that only finish when the test says so"
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.submitted.append((future, fn, args))
+        return future
+
+    def finish_all(self):
+        for future, fn, args in self.submitted:
+            future.set_result(fn(*args))
+
+
+def test_puzzle_answers_are_worked_out_by_the_executor():
+    boss = Squirrel()
+    executor = ManualExecutor()
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[boss], answer_executor=executor)
+    battle.next_round()
+    assert len(executor.submitted) > 0
+    assert not battle.answers_ready()
+
+    token = battle.get_opportunity_token(boss)
+    answer = MindSpike().algorithm(token)
+    with pytest.raises(AnswerPendingError):
+        battle.handle_action(Command(f"player@squirrel/mspike {answer}"))
+
+    executor.finish_all()
+    assert battle.answers_ready()
+    assert battle.handle_action(Command(f"player@squirrel/mspike {answer}")).kind is not EventKind.WRONG_TOKEN
+
+
+def test_puzzle_answers_are_cached_per_token():
+    boss = Squirrel()
+    boss._max_health = boss._health = 1000
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[boss],
+                            token_grace_rounds=1, answer_executor=executor)
+        battle.next_round()
+        first_token = battle.get_opportunity_token(boss)
+        battle.wait_for_answers()
+        cached = battle._answer_cache[("smite", first_token)]
+
+        battle.next_round()
+        # the previous token is still in the grace window, so its answer is reused
+        assert battle._answer_cache[("smite", first_token)] is cached
+
+        battle.next_round()
+        assert ("smite", first_token) not in battle._answer_cache
+
+
+def test_players_can_act_once_per_round():
+    boss = Squirrel()
+    boss._max_health = boss._health = 1000
+    battle = BossBattle(players=[Player.roll_fighter("player1"), Player.roll_fighter("player2")], bosses=[boss])
+    battle.next_round()
+    assert not battle.has_acted("player1")
+
+    battle.handle_action(Command("player1@squirrel/punch"))
+    assert battle.has_acted("player1")
+    assert not battle.has_acted("player2")
+    with pytest.raises(TurnAlreadyTakenError):
+        battle.handle_action(Command("player1@squirrel/punch"))
+
+    battle.next_round()
+    assert not battle.has_acted("player1")
+    battle.handle_action(Command("player1@squirrel/punch"))
+
+    battle.reset_turns()
+    assert not battle.has_acted("player1")
+
+
+# damage roll of 6 and 6 (+1 con), then dex saves of 1, 9 and 20 (+2) against DC 11
+@patch("random.randint", side_effect=[6, 6, 1, 9, 20])
+def test_area_ability_rolls_once_and_hits_every_player(mock_randint):
+    players = [Player.roll_fighter(name) for name in ("a", "b", "c")]
+    boss = Wyrmling()
+    battle = BossBattle(players=players, bosses=[boss])
+
+    event = battle._apply_action(boss, AbilityRegistry.registry["firebreath"](), players[1])
+    assert event.kind is EventKind.AREA
+    assert event.roll == 13
+    assert event.targets == 3
+    assert event.saves == 2
+    assert event.damage == 13 + 6 + 6
+    assert event.knocked_out == ("a", )
+    assert [p.get_health() for p in players] == [0, 6, 6]
+    assert len(battle.conscious_players) == 2
+
+
+# damage roll of 1, 1 and 1, then saves of 1, the squirrel's dexterity still saves it
+@patch("random.randint", side_effect=[1, 1, 1, 1, 1])
+def test_area_ability_applies_affinities_per_target(mock_randint):
+    player = Player.roll_fighter("player")
+    player._base_stats.intelligence = 10
+    squirrel = Squirrel(hit_die=(5, 4))
+    wyrmling = Wyrmling()
+    battle = BossBattle(players=[player], bosses=[squirrel, wyrmling])
+
+    event = battle._apply_action(player, AbilityRegistry.registry["fireball"](), squirrel)
+    assert event.targets == 2
+    assert event.saves == 1
+    assert event.damage == 1  # half of 3 for the squirrel
+    assert wyrmling.get_health() == wyrmling.get_max_health()  # immune to fire
+
+
+def test_puzzle_answers_are_worked_out_between_rounds_without_an_executor(monkeypatch):
+    boss = Squirrel()
+    boss._max_health = boss._health = 1000
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[boss])
+    battle.next_round()
+    assert ("squirrel", "mspike") in battle._solve_answers
+
+    token = battle.get_opportunity_token(boss)
+    solve_token = MindSpike().algorithm(token)
+    calls = []
+    algorithm = MindSpike.algorithm
+    monkeypatch.setattr(MindSpike, "algorithm", lambda self, op_token: calls.append(op_token) or algorithm(self, op_token))
+    result = battle.handle_action(Command(f"player@squirrel/mspike {solve_token}"))
+    assert result.kind is not EventKind.WRONG_TOKEN
+    assert calls == []  # the player turn only looks the answer up
+
+
+def test_a_failing_puzzle_has_no_answer(monkeypatch):
+    def broken(self, op_token):
+        raise ValueError("broken puzzle")
+    monkeypatch.setattr(MindSpike, "algorithm", broken)
+
+    boss = Squirrel()
+    executor = ManualExecutor()
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[boss], answer_executor=executor)
+    battle.next_round()
+    for future, fn, args in executor.submitted:
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    assert battle.handle_action(Command("player@squirrel/mspike abcd")).kind is EventKind.WRONG_TOKEN
+
+
+def test_a_failing_puzzle_without_an_executor_has_no_answer(monkeypatch):
+    def broken(self, op_token):
+        raise ValueError("broken puzzle")
+    monkeypatch.setattr(MindSpike, "algorithm", broken)
+
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[Squirrel()])
+    battle.next_round()
+    assert battle.handle_action(Command("player@squirrel/mspike abcd")).kind is EventKind.WRONG_TOKEN
+
+
+def test_cure_heals_players_not_bosses():
+    boss = Squirrel()
+    boss._max_health = 100
+    boss._health = 50
+    healer = Player.roll_fighter("healer")
+    hurt = Player.roll_fighter("hurt")
+    battle = BossBattle(players=[healer, hurt], bosses=[boss])
+    battle.next_round()
+
+    token = battle.get_opportunity_token(boss)
+    with pytest.raises(InvalidTargetError):
+        battle.handle_action(Command(f"healer@squirrel/cure {token}"))
+    assert boss.get_health() == 50
+    assert not battle.has_acted("healer")
+
+    hurt.take_damage(5)
+    result = battle.handle_action(Command("healer@hurt/cure"))
+    assert result.kind is EventKind.HEAL
+    assert result.target == "hurt"
+    assert hurt.get_health() > hurt.get_max_health() - 5
+
+
+def test_attacks_cannot_target_players():
+    battle = BossBattle(players=[Player.roll_fighter("p1"), Player.roll_fighter("p2")], bosses=[Squirrel()])
+    battle.next_round()
+    with pytest.raises(InvalidTargetError):
+        battle.handle_action(Command("p1@p2/punch"))
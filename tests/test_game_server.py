@@ -1,9 +1,12 @@
 import pytest
 from unittest.mock import patch
+from concurrent.futures import Future
 
 from boss_battles.game_server import GameServer
-from boss_battles.character import Squirrel, Stats
-from boss_battles.ability import Ability, EffectType, AbilityRegistry
+from boss_battles.character import Squirrel, Stats, CharacterClass
+from boss_battles.roster import RosterBuilder
+from boss_battles.ability import Ability, EffectType, AbilityRegistry, MindSpike
+from boss_battles.instrument import Instrumentation
 
 from helpers import FakeReader, FakeGameServer
 
@@ -72,6 +75,35 @@ def test_game_server_registers_only_unique_names_case_insensitive():
     assert len(game_server._registered_usernames) == 2
 
 
+def test_game_server_refuses_names_that_are_not_plain():
+    reader = FakeReader()
+    reader.add_messages([
+        "user1/register",
+        "user<2>/register",
+    ])
+    game_server = FakeGameServer(bosses=[], reader=reader)
+    game_server.run()
+    assert list(game_server._registered_usernames) == ["user1"]
+    assert any("not a valid name" in m for m in game_server._error_messages)
+
+
+def test_game_server_refuses_boss_names():
+    reader = FakeReader()
+    reader.add_messages([
+        "squirrel/register",
+        "Squirrel2/register",
+        "user1/register",
+        "done",
+    ])
+    game_server = GameServer(bosses=[Squirrel(), Squirrel()], reader=reader, combatant_table=True)
+    game_server._get_messages()
+    game_server._registration_phase()
+    assert list(game_server._registered_usernames) == ["user1"]
+    assert sum("is taken" in m for m in game_server._error_messages) == 2
+    # the battle starts and both bosses can still be targeted
+    assert {b._name for b in game_server.battle.bosses} == {"squirrel1", "squirrel2"}
+
+
 def test_game_server_changes_to_battle_phase_when_registering_done():
     reader = FakeReader()
     reader.add_messages([
@@ -83,6 +115,33 @@ def test_game_server_changes_to_battle_phase_when_registering_done():
     assert game_server._current_phase == game_server._battle_round_init
 
 
+def test_game_server_registers_with_a_class():
+    reader = FakeReader()
+    reader.add_messages([
+        "user1/register wizard",
+        "user2/register",
+        "user3/register bard",
+        "done"
+    ])
+    game_server = FakeGameServer(bosses=[], reader=reader)
+    game_server.run()
+    players = game_server.battle.players
+    assert [p._character_class for p in players] == [CharacterClass.WIZARD, CharacterClass.FIGHTER]
+    assert len(game_server._error_messages) == 1
+
+
+def test_game_server_starts_with_an_imported_roster():
+    roster = RosterBuilder()
+    roster.register("student1", CharacterClass.CLERIC)
+    reader = FakeReader()
+    reader.add_messages(["student1/register", "student2/register", "done"])
+    game_server = FakeGameServer(bosses=[], reader=reader, roster=roster)
+    game_server.run()
+    assert [p._name for p in game_server.battle.players] == ["student1", "student2"]
+    assert game_server.battle.get_player("student1")._character_class is CharacterClass.CLERIC
+    assert game_server._error_messages[-1] == "Error: student1 already added."
+
+
 def test_gather_valid_commands():
     game_server = GameServer(bosses=[], reader=FakeReader())
     game_server._action_strings = [
@@ -104,6 +163,17 @@ def test_gather_valid_commands_rejects_invalid_with_error_message():
     assert len(game_server._error_messages) == 1
 
 
+def test_gather_valid_commands_skips_invalid_first_message():
+    game_server = GameServer(bosses=[], reader=FakeReader())
+    game_server._action_strings = [
+        "dee#doo invalid",
+        "player@blah/something valid",
+    ]
+    valid_commands = game_server._gather_valid_commands()
+    assert [c.user for c in valid_commands] == ["player"]
+    assert len(game_server._error_messages) == 1
+
+
 # Player: hit roll 20 (Crit) so double roll for damage
 # boss: 
 @patch("random.randint", side_effect=[20, 1, 1])
@@ -183,3 +253,83 @@ def test_game_should_clear_actions_after_processed():
     assert len(game._reader.messages) == 0
 
 
+
+
+def test_commands_waiting_on_puzzle_answers_are_deferred():
+    class ManualExecutor:
+        def __init__(self):
+            self.submitted = []
+
+        def submit(self, fn, *args):
+            future = Future()
+            self.submitted.append((future, fn, args))
+            return future
+
+    executor = ManualExecutor()
+    reader = FakeReader()
+    reader.add_messages(["player1/register", "done"])
+    squirrel = Squirrel()
+    game = FakeGameServer(bosses=[squirrel], reader=reader, answer_executor=executor)
+    game.run()  # registration
+    game.run()  # battle init
+
+    token = game.battle.get_opportunity_token(squirrel)
+    reader.add_message(f"player1@squirrel/mspike {MindSpike().algorithm(token)}")
+    game.run()  # player turn, answer not ready
+    assert len(game._deferred_commands) == 1
+    assert len(game._battle_messages) == 1  # only the welcome message
+
+    for future, fn, args in executor.submitted:
+        future.set_result(fn(*args))
+    game.run()
+    assert len(game._deferred_commands) == 0
+    assert len(game._battle_messages) == 2
+
+
+def test_answers_that_take_too_long_are_given_up_on_at_the_end_of_the_turn():
+    class NeverExecutor:
+        def submit(self, fn, *args):
+            return Future()
+
+    reader = FakeReader()
+    reader.add_messages(["player1/register", "done"])
+    squirrel = Squirrel()
+    game = FakeGameServer(bosses=[squirrel], reader=reader, answer_executor=NeverExecutor(),
+                          player_turn_time_seconds=0, answer_wait_seconds=0.01)
+    game.run()  # registration
+    game.run()  # battle init
+
+    reader.add_message("player1@squirrel/mspike abcd")
+    game.run()  # player turn, runs out of time
+    assert game._deferred_commands == []
+    assert "player1's mspike could not be checked in time." in game._error_messages
+    assert game._current_phase == game._battle_boss_turn
+
+
+class EndlessReader(FakeReader):
+    "Gives up after many reads, so a game that never ends fails instead of hanging"
+    def __init__(self, reads: int = 10_000):
+        super().__init__()
+        self._reads = reads
+
+    def read(self):
+        self._reads -= 1
+        if self._reads < 0:
+            raise EOFError("the game never ended")
+        return super().read()
+
+
+@pytest.mark.parametrize("instrumentation", [None, Instrumentation()])
+def test_run_returns_when_the_battle_is_over(instrumentation):
+    roster = RosterBuilder()
+    roster.register("player")._health = 1
+    reader = EndlessReader()
+    reader.add_message("done")
+    game = GameServer(bosses=[Squirrel()], reader=reader, roster=roster, player_turn_time_seconds=0,
+                      instrumentation=instrumentation)
+    game.run()
+
+    assert game._current_phase is None
+    assert not game.battle.players[0].is_conscious()
+    if instrumentation is not None:
+        assert instrumentation.timings
@@ -0,0 +1,80 @@
+import json
+
+from boss_battles.instrument import Histogram, Instrumentation
+from boss_battles.game_server import GameServer
+from boss_battles.character import Squirrel
+
+from helpers import FakeReader
+
+
+def test_histogram_buckets_by_powers_of_two():
+    h = Histogram()
+    for value in [0, 1, 2, 3, 4, 1000]:
+        h.record(value)
+    assert h.count == 6
+    assert h.max == 1000
+    assert h.buckets[:4] == [1, 1, 2, 1]
+    assert h.percentile(50) == 3
+    assert h.percentile(100) == 1000
+
+
+def test_empty_histogram():
+    h = Histogram()
+    assert h.mean() == 0
+    assert h.percentile(99) == 0
+
+
+def test_timed_records_microseconds():
+    ticks = iter([0, 2_500_000])
+    instrumentation = Instrumentation(clock=lambda: next(ticks))
+    assert instrumentation.timed("step", lambda: 42) == 42
+    assert instrumentation.timings["step"].max == 2500
+
+
+def test_instrumented_tick_times_each_step(tmp_path):
+    reader = FakeReader()
+    reader.add_messages(["player1/register", "player2/register"])
+    instrumentation = Instrumentation()
+    game = GameServer(bosses=[Squirrel()], reader=reader, instrumentation=instrumentation)
+    game._instrumented_tick()
+    reader.add_message("done")
+    game._instrumented_tick()
+
+    assert instrumentation.timings["_registration_phase"].count == 2
+    assert instrumentation.timings["_get_messages"].count == 2
+    assert instrumentation.timings["_print_display"].count == 2
+    assert instrumentation.counts["messages per tick"].max == 2
+
+    game._instrumented_tick()
+    assert instrumentation.timings["_battle_round_init"].count == 1
+
+    path = tmp_path / "timings.json"
+    instrumentation.dump(str(path))
+    dumped = json.loads(path.read_text())
+    assert dumped["timings_us"]["_registration_phase"]["count"] == 2
+    assert dumped["counts"]["messages per tick"]["max"] == 2
+
+
+def test_debug_message_from_the_debug_sender_toggles_the_panel():
+    reader = FakeReader()
+    reader.add_messages(["teacher/debug", "player1/register"])
+    game = GameServer(bosses=[Squirrel()], reader=reader, debug_sender="teacher")
+    game._get_messages()
+    assert game._show_debug_panel
+    assert game._action_strings == ["player1/register"]
+    reader.add_message("TEACHER/DEBUG")
+    game._get_messages()
+    assert not game._show_debug_panel
+
+
+def test_debug_messages_from_anyone_else_do_nothing():
+    reader = FakeReader()
+    reader.add_messages(["debug", "player1/debug"])
+    game = GameServer(bosses=[Squirrel()], reader=reader, debug_sender="teacher")
+    game._get_messages()
+    assert not game._show_debug_panel
+
+    game = GameServer(bosses=[Squirrel()], reader=FakeReader())
+    game._reader.add_messages(["debug", "teacher/debug"])
+    game._get_messages()
+    assert not game._show_debug_panel
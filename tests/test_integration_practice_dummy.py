@@ -15,7 +15,7 @@ def test_practice_dummy_battle(mock_randint):
     battle = BossBattle(players=[player], bosses=[boss])
     battle._generate_opportunity_tokens()
     assert len(battle._boss_tokens) == 1
-    assert type(battle._boss_tokens['dummy']) is list
+    assert type(battle.get_opportunity_token(boss)) is str
 
     assert boss.get_health() == 500
 
@@ -0,0 +1,83 @@
+import time
+
+from boss_battles.command import Command, ReceivedLine
+from boss_battles.events import CombatEvent, EventKind
+from boss_battles.latency import LatencyTracker, percentiles
+from boss_battles.game import BossBattle
+from boss_battles.game_server import GameServer
+from boss_battles.character import Player, Squirrel
+
+from helpers import FakeReader
+
+
+def event(received_at, resolved_at):
+    return CombatEvent(EventKind.HIT, "player1", "punch", "Punch", "squirrel",
+                       received_at=received_at, resolved_at=resolved_at)
+
+
+def test_received_line_is_a_string_with_a_receive_time():
+    line = ReceivedLine("player1@squirrel/punch", 12.5)
+    assert line == "player1@squirrel/punch"
+    assert Command(line).received_at == 12.5
+    assert Command("player1@squirrel/punch").received_at is None
+
+
+def test_handle_action_passes_the_receive_time_on():
+    player = Player.roll_fighter("player1")
+    battle = BossBattle(players=[player], bosses=[Squirrel()])
+    battle.next_round()
+    result = battle.handle_action(Command(ReceivedLine("player1@squirrel/punch", 1.0)))
+    assert result.received_at == 1.0
+    assert result.resolved_at >= 1.0
+
+
+def test_percentiles_in_milliseconds():
+    assert percentiles([]) == {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    result = percentiles([0.001 * n for n in range(1, 101)])
+    assert round(result["p50"]) == 51
+    assert round(result["max"]) == 100
+
+
+def test_tracker_flags_commands_resolved_after_their_deadline():
+    tracker = LatencyTracker()
+    tracker.turn_started(10.0)
+    assert tracker.resolved(event(9.0, 9.5)) is None
+    late = tracker.resolved(event(9.8, 10.3))
+    assert (round(late.early, 2), round(late.late, 2)) == (0.2, 0.3)
+    assert "arrived 0.20s before the deadline" in str(late)
+
+    tracker.displayed(now=11.0)
+    report = tracker.end_round(1)
+    assert report["commands"] == 2
+    assert report["resolve_ms"]["max"] == 500
+    assert report["display_ms"]["max"] == 2000
+    assert len(report["late"]) == 1
+    assert tracker.end_round(2)["commands"] == 0
+
+
+def test_commands_after_the_last_deadline_are_not_late():
+    tracker = LatencyTracker()
+    tracker.turn_started(10.0)
+    # sent during the boss turn, so for the next player turn
+    assert tracker.resolved(event(10.5, 12.0)) is None
+
+
+def test_game_server_reports_late_commands(caplog):
+    reader = FakeReader()
+    reader.add_messages(["player1/register", "done"])
+    game = GameServer(bosses=[Squirrel()], reader=reader, player_turn_time_seconds=0)
+    game._get_messages()
+    game._current_phase()
+    game._current_phase()  # round init, the player turn is over as soon as it starts
+
+    reader.add_message(ReceivedLine("player1@squirrel/punch", time.monotonic() - 1))
+    game._get_messages()
+    game._current_phase()
+    assert any(str(message).startswith("LATE: player1's Punch") for message in game._error_messages)
+    late, = [r for r in caplog.records if getattr(r, "event", None) == "late_command"]
+    assert late.getMessage().startswith("LATE: player1's Punch arrived")
+
+    game._current_phase()  # boss turn
+    game._current_phase()  # next round reports the last one
+    assert game._latency.reports[0]["round"] == 1
+    assert len(game._latency.reports[0]["late"]) == 1
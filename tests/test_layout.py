@@ -0,0 +1,162 @@
+from boss_battles.layout import PanelLayout, Panel, MessageLog
+from boss_battles.game_server import GameServer
+from boss_battles.character import Squirrel
+from boss_battles.instrument import Instrumentation
+
+from helpers import FakeReader
+
+
+class FakeWindow:
+    def __init__(self, height, width, y, x):
+        self.size = (height, width)
+        self.text = {}
+        self.refreshes = 0
+
+    def addstr(self, y, x, text, attr=0):
+        row = self.text.get(y, "")
+        row = row.ljust(x) if len(row) < x else row
+        self.text[y] = row[:x] + text + row[x + len(text):]
+
+    def noutrefresh(self):
+        self.refreshes += 1
+
+
+class FakeRenderer:
+    def __init__(self, height=40, width=120):
+        self.screen_size = (height, width)
+        self.windows = []
+        self.flushes = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def size(self):
+        return self.screen_size
+
+    def clear(self):
+        pass
+
+    def new_window(self, *geometry):
+        window = FakeWindow(*geometry)
+        self.windows.append(window)
+        return window
+
+    def flush(self):
+        self.flushes += 1
+
+
+def make_layout(panels, renderer=None):
+    renderer = renderer if renderer is not None else FakeRenderer()
+    layout = PanelLayout(renderer)
+    layout.add_screen("main", panels)
+    return layout, renderer
+
+
+def test_message_log_counts_changes():
+    log = MessageLog(maxlen=2)
+    log.append("a")
+    log.extend(["b", "c"])
+    assert list(log) == ["b", "c"]
+    assert log.version == 3
+
+
+def test_panels_are_created_once_and_redrawn_on_change():
+    value = [1]
+    draws = []
+
+    def draw(window):
+        draws.append(value[0])
+        window.addstr(0, 0, str(value[0]))
+
+    panel = Panel(lambda h, w: (5, w, 0, 0), draw, state=lambda: value[0])
+    layout, counter = make_layout([panel])
+
+    assert layout.draw("main") == 1
+    assert layout.draw("main") == 0
+    value[0] = 2
+    assert layout.draw("main") == 1
+    assert draws == [1, 2]
+    assert len(counter.windows) == 1
+    assert counter.flushes == 2
+    assert counter.windows[0].text == {0: "2"}
+    assert layout.last_frame.cells == 1
+
+
+def test_resize_places_panels_again():
+    panel = Panel(lambda h, w: (5, w, 0, 0), lambda window: None)
+    layout, counter = make_layout([panel])
+    layout.draw("main")
+
+    counter.screen_size = (30, 80)
+    assert layout.draw("main") == 1
+    assert counter.windows[-1].size == (5, 80)
+
+
+def test_panels_are_clipped_to_the_screen():
+    panels = [
+        Panel(lambda h, w: (50, 50, 10, 100), lambda window: None),
+        Panel(lambda h, w: (5, 5, 50, 0), lambda window: None),  # off screen
+    ]
+    layout, counter = make_layout(panels)
+    assert layout.draw("main") == 1
+    assert counter.windows[0].size == (30, 20)
+
+
+def test_game_server_only_redraws_changed_panels():
+    reader = FakeReader()
+    renderer = FakeRenderer()
+    game = GameServer(bosses=[Squirrel()], reader=reader, renderer=renderer)
+    game._print_display()
+    windows = len(renderer.windows)
+    users_panel = game._layout._screens["registration"][1].window
+
+    game._print_display()
+    assert users_panel.refreshes == 1
+
+    reader.add_message("player1/register")
+    game._get_messages()
+    game._current_phase()
+    game._print_display()
+    assert users_panel.refreshes == 2
+    assert "player1" in users_panel.text[2]
+    assert len(renderer.windows) == windows
+
+
+def test_game_server_shows_player_health_in_battle():
+    reader = FakeReader()
+    reader.add_messages(["player2/register", "player1/register", "done"])
+    renderer = FakeRenderer(height=60)
+    game = GameServer(bosses=[Squirrel()], reader=reader, renderer=renderer)
+    game._get_messages()
+    game._current_phase()
+    game._current_phase()
+    game._print_display()
+
+    players_panel = game._layout._screens["battle"][-1]
+    assert players_panel.window.text[1].split()[1:3] == ["player1", "█████"]
+    assert players_panel.window.text[2].split()[1:3] == ["player2", "█████"]
+
+    game.battle.get_player("player2").take_damage(5)
+    game._print_display()
+    assert players_panel.window.text[2].split()[1:3] == ["player2", "██░░░"]
+
+
+def test_game_server_shows_debug_panel_below_the_screen():
+    reader = FakeReader()
+    renderer = FakeRenderer(height=40)
+    game = GameServer(bosses=[Squirrel()], reader=reader, renderer=renderer, instrumentation=Instrumentation(),
+                      debug_sender="teacher")
+    game._instrumented_tick()
+    reader.add_message("teacher/debug")
+    game._instrumented_tick()
+    game._instrumented_tick()
+
+    panels = game._layout._screens["registration+debug"]
+    debug_window = panels[-1].window
+    assert debug_window.size == (12, 120)
+    assert "_registration_phase" in "".join(debug_window.text.values())
+    # the other panels make room for it
+    assert all(p.window.size[0] <= 40 - 12 for p in panels[1:-1])
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pytest
+
+from boss_battles.loadgen import Classroom, ClassroomProfile, PseudoSerialPort, TimedReader
+from boss_battles.game_server import SerialReader
+from boss_battles.command import Command, ReceivedLine
+from boss_battles.ability import MindSpike
+
+from helpers import FakeReader
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_classroom(**profile):
+    lines = []
+    clock = FakeClock()
+    tokens = {"value": (0, ())}
+    classroom = Classroom(lines.append, lambda: tokens["value"], ClassroomProfile(**profile), seed=3, clock=clock)
+    return classroom, lines, clock, tokens
+
+
+def test_students_register_then_the_teacher_starts():
+    classroom, lines, _, _ = make_classroom(players=3)
+    classroom.register()
+    assert lines == ["student0/register", "student1/register", "student2/register", "done"]
+
+
+def test_nothing_is_sent_before_the_first_round():
+    classroom, lines, clock, _ = make_classroom(players=3)
+    clock.now = 100
+    assert classroom.step() == 0
+
+
+def test_bursty_students_send_as_soon_as_the_tokens_appear():
+    classroom, lines, clock, tokens = make_classroom(players=5, burstiness=1.0, error_rate=0.0,
+                                                     abilities=("mspike", ))
+    tokens["value"] = (1, ("squirrel:ab12", ))
+    classroom.step()
+    clock.now = 0.25
+    classroom.step()
+    assert len(lines) == 5
+    solve = MindSpike().algorithm("ab12")
+    for line in lines:
+        command = Command(line)
+        assert command.target == "squirrel"
+        assert command.args == [solve]
+
+
+def test_error_rate_sends_wrong_messages():
+    classroom, lines, clock, tokens = make_classroom(players=20, burstiness=1.0, error_rate=1.0)
+    tokens["value"] = (1, ("squirrel:ab12", ))
+    classroom.step()
+    clock.now = 0.25
+    classroom.step()
+    assert classroom.sent["error"] == 20
+    assert classroom.sent["action"] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs a pseudo terminal")
+def test_serial_reader_reads_from_the_pseudo_terminal():
+    port = PseudoSerialPort()
+    reader = SerialReader(port=port.port)
+    reader.open()
+    try:
+        port.write_line("student0/register")
+        port.write_line("done")
+        messages = []
+        deadline = time.monotonic() + 2
+        while len(messages) < 2 and time.monotonic() < deadline:
+            messages += reader.read()
+        assert messages == ["student0/register", "done"]
+        assert all(isinstance(m, ReceivedLine) for m in messages)
+    finally:
+        reader.close()
+        port.close()
+
+
+def test_timed_reader_ends_the_game_when_time_is_up():
+    clock = FakeClock()
+    inner = FakeReader()
+    reader = TimedReader(inner, seconds=5, clock=clock)
+    reader.open()
+    inner.add_message("player/register")
+    assert reader.read() == ["player/register"]
+
+    clock.now = 5
+    with pytest.raises(EOFError):
+        reader.read()
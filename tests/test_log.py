@@ -0,0 +1,55 @@
+import json
+import logging
+
+from boss_battles.log import BattleLog, ndjson_sink, file_sink, logger, _LazyQueueHandler
+from boss_battles.game import BossBattle
+from boss_battles.character import Boss, Stats
+from boss_battles.ability import EffectType
+
+
+def make_boss() -> Boss:
+    return Boss("testboss", (1, 4), Stats(), resistances=[EffectType.FIRE])
+
+
+def test_importing_the_engine_does_not_configure_logging():
+    assert all(isinstance(h, logging.NullHandler) for h in logger.handlers)
+    assert not logger.isEnabledFor(logging.INFO)
+
+
+def test_ndjson_sink_writes_structured_events(tmp_path):
+    path = tmp_path / "battle.ndjson"
+    with BattleLog([ndjson_sink(str(path))]):
+        BossBattle.calc_actual_damage(make_boss(), 10, EffectType.FIRE)
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["event"] == "resisted"
+    assert entry["message"] == "testboss is RESISTANT to fire! (damage halved)"
+    assert entry["target"] == "testboss"
+    assert entry["damage"] == 10
+
+
+def test_file_sink_writes_text(tmp_path):
+    path = tmp_path / "battle.log"
+    with BattleLog([file_sink(str(path))]):
+        BossBattle.calc_actual_damage(make_boss(), 10, EffectType.FIRE)
+    assert "testboss is RESISTANT to fire! (damage halved)" in path.read_text()
+
+
+def test_records_are_queued_without_formatting():
+    record = logging.LogRecord("boss_battles", logging.INFO, __file__, 1, "%s hits", ("player", ), None)
+    handler = _LazyQueueHandler(None)
+    prepared = handler.prepare(record)
+    assert prepared.msg == "%s hits"
+    assert prepared.args == ("player", )
+
+
+def test_stopping_restores_the_logger():
+    log = BattleLog([])
+    log.start()
+    assert logger.isEnabledFor(logging.INFO)
+    assert logger.propagate is False
+    log.stop()
+    assert not logger.isEnabledFor(logging.INFO)
+    assert logger.propagate is True
@@ -0,0 +1,67 @@
+import pstats
+import threading
+import time
+
+from boss_battles.profiling import PhaseProfiler, SamplingProfiler
+from boss_battles.game_server import GameServer
+from boss_battles.character import Squirrel
+from boss_battles.roster import RosterBuilder
+
+from helpers import FakeReader
+
+
+def test_phase_profiler_profiles_each_step(tmp_path):
+    reader = FakeReader()
+    reader.add_messages(["player1/register", "done"])
+    profiler = PhaseProfiler()
+    game = GameServer(bosses=[Squirrel()], reader=reader, instrumentation=profiler)
+    for _ in range(3):
+        game._instrumented_tick()
+
+    assert {"_registration_phase", "_battle_round_init", "_get_messages"} <= set(profiler.profiles)
+    assert profiler.timings["_battle_round_init"].count == 1
+
+    paths = profiler.write(str(tmp_path))
+    stats = pstats.Stats(str(tmp_path / "_battle_round_init.pstats"))
+    assert any(name == "next_round" for _, _, name in stats.stats)
+    assert "==== _registration_phase ====" in (tmp_path / "summary.txt").read_text()
+    assert len(paths) == len(profiler.profiles) + 1
+
+
+def test_phase_profiler_runs_until_the_battle_is_over(tmp_path):
+    roster = RosterBuilder()
+    roster.register("player1")._health = 1
+    reader = FakeReader()
+    reader.add_message("done")
+    profiler = PhaseProfiler()
+    game = GameServer(bosses=[Squirrel()], reader=reader, roster=roster, player_turn_time_seconds=0,
+                      instrumentation=profiler)
+    game.run()
+
+    assert not game.battle.players[0].is_conscious()
+    profiler.write(str(tmp_path))
+    assert (tmp_path / "_battle_boss_turn.pstats").exists()
+
+
+def busy_wait_here(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_sampling_profiler_collapses_stacks_of_a_thread(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_wait_here, args=(stop, ))
+    worker.start()
+    sampler = SamplingProfiler(worker.ident, interval=0.001).start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert sampler.samples > 0
+    assert all("test_profiling.py:busy_wait_here" in stack for stack in sampler.stacks)
+    sampler.write(str(tmp_path))
+    line = (tmp_path / "stacks.txt").read_text().splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert "test_profiling.py:busy_wait_here" in stack
+    assert int(count) > 0
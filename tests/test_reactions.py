@@ -0,0 +1,127 @@
+import pytest
+from unittest.mock import patch
+
+from boss_battles.reactions import Reaction, ReactionDispatcher, HEALTH_BELOW
+from boss_battles.game import BossBattle, InvalidReactionError, InvalidTargetError, TurnAlreadyTakenError
+from boss_battles.events import EventKind
+from boss_battles.character import Player, Squirrel
+from boss_battles.ability import Punch, CureWounds
+from boss_battles.command import Command
+
+
+def test_dispatcher_only_fires_matching_reactions():
+    player = Player.roll_fighter("player")
+    boss = Squirrel()
+    dispatcher = ReactionDispatcher()
+    dispatcher.arm(Reaction(player, Punch(), boss, "cower", "squirrel"))
+    dispatcher.arm(Reaction(player, Punch(), boss, "bite", "squirrel"))
+    assert len(dispatcher) == 2
+
+    assert dispatcher.ability_used("squirrel", "punch") == []
+    fired = dispatcher.ability_used("squirrel", "cower")
+    assert len(fired) == 1
+    assert fired[0].trigger == "cower"
+    assert len(dispatcher) == 1
+
+    assert dispatcher.ability_used("squirrel", "cower") == [], "reactions fire once"
+
+
+def test_dispatcher_health_threshold():
+    healer = Player.roll_fighter("healer")
+    player = Player.roll_fighter("player")
+    dispatcher = ReactionDispatcher()
+    dispatcher.arm(Reaction(healer, CureWounds(), player, HEALTH_BELOW, "player", threshold=5))
+    dispatcher.arm(Reaction(healer, CureWounds(), player, HEALTH_BELOW, "player", threshold=10))
+
+    player._health = 8
+    fired = dispatcher.health_changed(player)
+    assert [r.threshold for r in fired] == [10]
+
+    player._health = 4
+    assert [r.threshold for r in dispatcher.health_changed(player)] == [5]
+    assert len(dispatcher) == 0
+
+
+@patch("random.randint", side_effect=[20, 1, 1])
+def test_readied_punch_fires_when_boss_cowers(mock_randint):
+    player = Player.roll_fighter("player")
+    boss = Squirrel()
+    boss._ability_set = ("cower", )
+    boss._max_health = boss._health = 100
+    battle = BossBattle(players=[player], bosses=[boss])
+    battle.next_round()
+
+    event = battle.handle_action(Command("player@squirrel/readyfor cower punch"))
+    assert event.kind is EventKind.READY
+    assert battle.has_acted("player")
+
+    events = battle.bosses_turn()
+    assert [e.kind for e in events] == [EventKind.COWER, EventKind.HIT]
+    assert events[1].caster == "player"
+    assert boss.get_health() == 100 - 5
+
+
+# bite: roll of 20 (crit), two 1s, 1 damage minimum. cure: roll of 3
+@patch("random.randint", side_effect=[20, 1, 1, 3])
+def test_readied_heal_fires_when_health_drops(mock_randint):
+    healer = Player.roll_fighter("healer")
+    player = Player.roll_fighter("player")
+    boss = Squirrel()
+    battle = BossBattle(players=[healer, player], bosses=[boss])
+    battle.next_round()
+
+    event = battle.handle_action(Command("healer@player/readyfor healthbelow 5 cure"))
+    assert event.kind is EventKind.READY
+
+    player._health = 5
+    bite = battle._apply_action(boss, BossBattle.get_ability("bite"), player)
+    assert bite.damage == 1
+
+    # the heal fires right after the bite that dropped the player below 5
+    events = battle.pop_reaction_events()
+    assert [e.kind for e in events] == [EventKind.HEAL]
+    # roll of 3, +1 wisdom modifier
+    assert player.get_health() == 4 + 4
+
+
+def test_reactions_expire_at_the_end_of_the_round():
+    player = Player.roll_fighter("player")
+    battle = BossBattle(players=[player], bosses=[Squirrel()])
+    battle.next_round()
+    battle.handle_action(Command("player@squirrel/readyfor cower punch"))
+    assert len(battle._reactions) == 1
+    battle.next_round()
+    assert len(battle._reactions) == 0
+
+
+def test_invalid_readyfor():
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[Squirrel()])
+    battle.next_round()
+    with pytest.raises(InvalidReactionError):
+        battle.handle_action(Command("player@squirrel/readyfor"))
+    with pytest.raises(InvalidReactionError):
+        battle.handle_action(Command("player@squirrel/readyfor healthbelow lots cure"))
+
+
+def test_readying_uses_up_the_turn():
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[Squirrel()])
+    battle.next_round()
+    battle.handle_action(Command("player@squirrel/await cower punch"))
+    with pytest.raises(TurnAlreadyTakenError):
+        battle.handle_action(Command("player@squirrel/punch"))
+
+
+def test_readied_heals_cannot_target_bosses():
+    battle = BossBattle(players=[Player.roll_fighter("healer")], bosses=[Squirrel()])
+    battle.next_round()
+    with pytest.raises(InvalidTargetError):
+        battle.handle_action(Command("healer@squirrel/readyfor healthbelow 5 cure"))
+    assert not battle.has_acted("healer")
+
+
+def test_readied_attacks_cannot_target_players():
+    battle = BossBattle(players=[Player.roll_fighter("p1"), Player.roll_fighter("p2")], bosses=[Squirrel()])
+    battle.next_round()
+    with pytest.raises(InvalidTargetError):
+        battle.handle_action(Command("p1@p2/readyfor healthbelow 50 punch"))
+    assert not battle.has_acted("p1")
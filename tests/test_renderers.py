@@ -0,0 +1,33 @@
+import io
+
+from boss_battles.renderers import AnsiRenderer, NullRenderer
+from boss_battles.game_server import GameServer
+from boss_battles.character import Squirrel
+
+from helpers import FakeReader
+
+
+def test_ansi_renderer_writes_a_frame_at_once():
+    stream = io.StringIO()
+    renderer = AnsiRenderer(stream)
+    window = renderer.new_window(5, 10, 2, 3)
+    window.addstr(0, 0, "hi")
+    window.addstr(1, 4, "!", 1)
+    assert stream.getvalue() == ""
+
+    renderer.flush()
+    assert stream.getvalue() == "\x1b[3;4Hhi\x1b[4;8H\x1b[7m!\x1b[0m"
+
+
+def test_null_renderer_runs_the_display():
+    renderer = NullRenderer()
+    reader = FakeReader()
+    reader.add_messages(["player1/register", "done"])
+    game = GameServer(bosses=[Squirrel()], reader=reader, renderer=renderer)
+    for _ in range(3):
+        game._print_display()
+        game._get_messages()
+        game._current_phase()
+    game._print_display()
+    assert renderer.frames == 2  # the registration screen, then the battle screen
+    assert game._layout.total.cells > 0
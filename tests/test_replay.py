@@ -0,0 +1,58 @@
+import pytest
+
+from boss_battles.replay import RecordingReader, ReplayReader, read_session
+from boss_battles.command import ReceivedLine
+from boss_battles.game_server import GameServer
+from boss_battles.character import Squirrel
+
+from helpers import FakeReader
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_recording_reader_writes_offsets(tmp_path):
+    path = tmp_path / "session.txt"
+    clock = FakeClock()
+    inner = FakeReader()
+    reader = RecordingReader(inner, str(path), clock=clock)
+    reader.open()
+    inner.add_messages(["player1/register", ReceivedLine("done", 101.5)])
+    clock.now = 102.0
+    assert reader.read() == ["player1/register", "done"]
+    reader.close()
+    assert read_session(str(path)) == [(2.0, "player1/register"), (1.5, "done")]
+
+
+def test_replay_reader_plays_back_at_speed(tmp_path):
+    path = tmp_path / "session.txt"
+    path.write_text("0.5\tplayer1/register\n2.0\tdone\n")
+    clock = FakeClock()
+    reader = ReplayReader(str(path), speed=2, linger=1, clock=clock)
+    reader.open()
+    assert reader.read() == []
+    clock.now += 0.25
+    messages = reader.read()
+    assert messages == ["player1/register"]
+    assert messages[0].received_at == 100.25
+    clock.now += 1
+    assert reader.read() == ["done"]
+
+    clock.now += 0.5
+    assert reader.read() == []
+    clock.now += 1
+    with pytest.raises(EOFError):
+        reader.read()
+
+
+def test_game_ends_when_the_replay_is_over(tmp_path):
+    path = tmp_path / "session.txt"
+    path.write_text("0\tplayer1/register\n")
+    game = GameServer(bosses=[Squirrel()], reader=ReplayReader(str(path), speed=1000, linger=0))
+    game.run()
+    assert "player1" in game._registered_usernames
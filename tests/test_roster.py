@@ -0,0 +1,80 @@
+import pytest
+
+from boss_battles.roster import RosterBuilder, AlreadyRegisteredError, InvalidClassError, InvalidNameError, parse_class, read_class_list
+from boss_battles.character import CharacterClass, Player, Stats
+
+
+def test_player_roll_uses_the_class_hit_die():
+    wizard = Player.roll("merlin", CharacterClass.WIZARD)
+    assert wizard._hit_die == (1, 6)
+    assert wizard.stats.intelligence == 15
+    assert wizard.get_max_health() == 6 + Stats.calc_modifier(13)
+
+
+def test_rolled_players_do_not_share_stats():
+    a = Player.roll("a", CharacterClass.CLERIC)
+    b = Player.roll("b", CharacterClass.CLERIC)
+    a._base_stats.wisdom = 1
+    assert b.stats.wisdom == 15
+
+
+def test_parse_class():
+    assert parse_class("") is CharacterClass.FIGHTER
+    assert parse_class("Cleric") is CharacterClass.CLERIC
+    with pytest.raises(InvalidClassError):
+        parse_class("bard")
+
+
+def test_roster_builds_players_as_they_register():
+    roster = RosterBuilder()
+    player = roster.register("User1", CharacterClass.WIZARD)
+    assert player._name == "user1"
+    assert "USER1" in roster
+    assert roster.players == [player]
+
+    with pytest.raises(AlreadyRegisteredError):
+        roster.register("user1")
+
+
+@pytest.mark.parametrize("name", ["<img src=x onerror=alert(1)>", "bob smith", "bob-2", "", "zoë"])
+def test_roster_rejects_names_that_are_not_plain(name):
+    roster = RosterBuilder()
+    with pytest.raises(InvalidNameError):
+        roster.register(name)
+    assert len(roster) == 0
+
+
+def test_roster_refuses_reserved_names_in_any_case():
+    roster = RosterBuilder(reserved=["Squirrel"])
+    with pytest.raises(InvalidNameError):
+        roster.register("squirrel")
+    with pytest.raises(InvalidNameError):
+        roster.register("SQUIRREL")
+
+    roster.register("alice")
+    with pytest.raises(AlreadyRegisteredError):
+        roster.register("ALICE")
+    with pytest.raises(InvalidNameError):
+        roster.reserve(["Alice"])
+
+
+def test_read_class_list():
+    lines = ["# period 2", "alice, wizard", "", "bob", "carol,cleric"]
+    assert list(read_class_list(lines)) == [
+        ("alice", CharacterClass.WIZARD),
+        ("bob", CharacterClass.FIGHTER),
+        ("carol", CharacterClass.CLERIC),
+    ]
+
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_class_list(["alice", "bob,bard"]))
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_class_list(["alice", "<b>bob</b>"]))
+
+
+def test_import_class_list(tmp_path):
+    path = tmp_path / "class.txt"
+    path.write_text("alice,wizard\nbob\nalice\n")
+    roster = RosterBuilder()
+    assert roster.import_class_list(str(path)) == ["alice"]
+    assert len(roster) == 2
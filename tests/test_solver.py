@@ -0,0 +1,138 @@
+import time
+
+import pytest
+
+from boss_battles.solver import BattleSolver, solve_battle
+from boss_battles.character import Boss, Player, Stats, Squirrel, Wyrmling
+from boss_battles.ability import EffectType
+
+
+def make_boss(ability_set: tuple[str], dexterity: int = 10) -> Boss:
+    boss = Boss("testboss", (1, 1), Stats(dexterity=dexterity, constitution=10))
+    boss._ability_set = ability_set
+    return boss
+
+
+def test_cowering_boss_is_always_defeated():
+    # 1 health, AC 10. Fighter punch is +5 to hit, so 16/20 rolls hit and any hit kills
+    boss = make_boss(("cower", ))
+    outcome = solve_battle([Player.roll_fighter("player")], [boss])
+
+    assert outcome.win_probability == pytest.approx(1.0)
+    assert outcome.loss_probability == 0
+    assert outcome.rounds[1] == pytest.approx(0.8)
+    assert outcome.rounds[2] == pytest.approx(0.2 * 0.8)
+    assert outcome.expected_rounds == pytest.approx(1 / 0.8)
+
+
+def test_only_crits_hit_a_high_ac_boss():
+    boss = make_boss(("cower", ), dexterity=60)  # AC 35
+    outcome = solve_battle([Player.roll_fighter("player")], [boss])
+    assert outcome.rounds[1] == pytest.approx(1 / 20)
+
+
+def test_unresolved_when_no_one_can_win():
+    boss = make_boss(("cower", ))
+    boss._immunities = [EffectType.BLUDGEONING]  # punches do nothing
+    outcome = solve_battle([Player.roll_fighter("player")], [boss], max_rounds=10)
+    assert outcome.win_probability == 0
+    assert outcome.unresolved_probability == pytest.approx(1.0)
+
+
+def test_wyrmling_fire_breath_hits_every_player_at_once():
+    # punches do nothing to it and fire breath does at least 1 even on a save,
+    # so a party on 1 health each always falls in the first round
+    wyrmling = Wyrmling()
+    wyrmling._ability_set = ("firebreath", )
+    wyrmling._immunities.append(EffectType.BLUDGEONING)
+    players = [Player.roll_fighter(f"player{n}") for n in range(3)]
+    for p in players:
+        p._health = 1
+
+    outcome = solve_battle(players, [wyrmling])
+    assert outcome.loss_probability == pytest.approx(1.0)
+    assert outcome.rounds == {1: pytest.approx(1.0)}
+
+
+def test_area_damage_is_halved_on_a_save():
+    # fire breath is 2d6 + 1 against DC 8 + 2 + 1 = 11, a fighter (+2 dexterity) saves on 9 or more
+    wyrmling = Wyrmling()
+    wyrmling._ability_set = ("firebreath", )
+    player = Player.roll_fighter("player")
+    player._health = 4
+
+    outcomes = BattleSolver([player], [wyrmling])._boss_action(0, (4, ))
+    # 4 or more knocks them out on a failed save, 8 or more on a successful one
+    p_save = 12 / 20
+    p_fail_ko = 35 / 36     # 2d6 of 3 or more
+    p_save_ko = 21 / 36     # 2d6 of 7 or more
+    assert outcomes[(0, )] == pytest.approx((1 - p_save) * p_fail_ko + p_save * p_save_ko)
+
+
+def test_abilities_the_solver_does_not_know_are_an_error():
+    boss = make_boss(("nosuchability", ))
+    with pytest.raises(ValueError):
+        BattleSolver([Player.roll_fighter("player")], [boss])
+
+
+def test_probabilities_add_up():
+    players = [Player.roll_fighter(f"player{n}") for n in range(5)]
+    outcome = solve_battle(players, [Squirrel(), Squirrel()])
+    total = outcome.win_probability + outcome.loss_probability + outcome.unresolved_probability
+    assert total == pytest.approx(1.0)
+    assert sum(outcome.rounds.values()) == pytest.approx(outcome.win_probability + outcome.loss_probability)
+
+
+def test_identical_players_share_states():
+    players = [Player.roll_fighter(f"player{n}") for n in range(4)]
+    solver = BattleSolver(players, [Squirrel()])
+    assert len(solver._groups) == 1
+    assert solver._canonical((3, 12, 5, 12)) == (12, 12, 5, 3)
+
+
+def test_two_bosses_against_a_party_solves_quickly():
+    bosses = []
+    for n in range(2):
+        boss = Boss(f"ogre{n}", (6, 8), Stats(16, 10, 14))
+        boss._ability_set = ("lsword", )
+        bosses.append(boss)
+    players = [Player.roll_fighter(f"player{n}") for n in range(3)]
+    solver = BattleSolver(players, bosses)
+
+    calls = 0
+    boss_phase = solver._boss_phase
+    def counting_boss_phase(*args):
+        nonlocal calls
+        calls += 1
+        return boss_phase(*args)
+    solver._boss_phase = counting_boss_phase
+
+    start = time.perf_counter()
+    outcome = solver.solve()
+    elapsed = time.perf_counter() - start
+
+    total = outcome.win_probability + outcome.loss_probability + outcome.unresolved_probability
+    assert total == pytest.approx(1.0)
+    # once per state the bosses act from, not once per way of getting there
+    assert calls == len(solver._bosses_half_cache)
+    assert len(solver._boss_phase_cache) <= calls
+    assert elapsed < 3
+
+
+def test_a_classroom_against_three_squirrels_solves_well_under_a_second():
+    bosses = [Squirrel(hit_die=(10, 4)) for _ in range(3)]
+    for n, boss in enumerate(bosses):
+        boss._name = f"squirrel{n}"
+    players = [Player.roll_fighter(f"player{n}") for n in range(30)]
+    solver = BattleSolver(players, bosses, player_ability="lsword")
+
+    start = time.perf_counter()
+    outcome = solver.solve()
+    elapsed = time.perf_counter() - start
+
+    total = outcome.win_probability + outcome.loss_probability + outcome.unresolved_probability
+    assert total == pytest.approx(1.0)
+    assert outcome.unresolved_probability < 1e-4
+    # the players' half is worked out per (damage taken, players up), not per party
+    assert len(solver._players_half_cache) < 200
+    assert elapsed < 1
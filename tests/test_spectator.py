@@ -0,0 +1,124 @@
+import http.client
+import json
+
+from boss_battles.spectator import PAGE, SpectatorFeed, SpectatorServer, diff_state
+from boss_battles.layout import MessageLog
+from boss_battles.events import CombatEvent, EventKind
+from boss_battles.game_server import GameServer
+from boss_battles.character import Squirrel
+
+from helpers import FakeReader
+
+
+def parse(message: bytes) -> tuple[str, dict]:
+    event, data = message.decode().strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_diff_state_goes_one_level_into_dicts():
+    previous = {"timer": "9.9", "health": {"a": [5, 10], "b": [10, 10]}}
+    current = {"timer": "9.8", "health": {"a": [4, 10], "b": [10, 10]}}
+    assert diff_state(previous, current) == {"timer": "9.8", "health": {"a": [4, 10]}}
+    assert diff_state(current, current) == {}
+
+
+def test_deltas_are_serialised_once_for_every_client():
+    feed = SpectatorFeed()
+    clients = [feed.connect()[0] for _ in range(3)]
+    event = CombatEvent(EventKind.HIT, "player", "punch", "Punch", "squirrel", damage=2)
+    assert feed.publish({"timer": "9.9"}, [event])
+    assert not feed.publish({"timer": "9.9"})
+
+    messages = [c.get_nowait() for c in clients]
+    assert messages[0] is messages[1] is messages[2]
+    kind, delta = parse(messages[0])
+    assert kind == "delta"
+    assert delta["timer"] == "9.9"
+    assert delta["events"][0]["text"] == "player inflicts 2 on squirrel (Punch)."
+    assert feed.stats()["clients"] == 3
+    assert feed.deliveries == 3
+
+
+def test_new_clients_start_from_a_snapshot():
+    feed = SpectatorFeed()
+    feed.publish({"timer": "5.0", "health": {"a": [1, 2]}}, ["Welcome A!"])
+    _, snapshot = feed.connect()
+    kind, state = parse(snapshot)
+    assert kind == "snapshot"
+    assert state == {"timer": "5.0", "health": {"a": [1, 2]}, "events": [{"text": "Welcome A!"}]}
+
+
+def test_slow_clients_are_dropped():
+    feed = SpectatorFeed(client_queue_size=1)
+    client, _ = feed.connect()
+    feed.publish({"timer": "1"})
+    feed.publish({"timer": "2"})
+    assert not feed.is_connected(client)
+    assert feed.stats()["dropped_clients"] == 1
+
+
+def test_maybe_publish_only_sends_new_messages():
+    feed = SpectatorFeed(interval=0)
+    client, _ = feed.connect()
+    log = MessageLog(maxlen=5)
+    log.extend(["one", "two"])
+    feed.maybe_publish(lambda: {}, log)
+    log.append("three")
+    feed.maybe_publish(lambda: {}, log)
+
+    _, first = parse(client.get_nowait())
+    _, second = parse(client.get_nowait())
+    assert [e["text"] for e in first["events"]] == ["one", "two"]
+    assert [e["text"] for e in second["events"]] == ["three"]
+
+
+def test_game_server_state_for_spectators():
+    reader = FakeReader()
+    reader.add_messages(["player1/register"])
+    game = GameServer(bosses=[Squirrel()], reader=reader)
+    game._get_messages()
+    game._current_phase()
+    assert game._spectator_state() == {"phase": "registration", "registered": ["player1"]}
+
+    reader.add_message("done")
+    game._get_messages()
+    game._current_phase()
+    game._current_phase()
+    state = game._spectator_state()
+    assert state["phase"] == "player_turn"
+    assert state["round"] == 1
+    assert state["bosses"] == ["squirrel"]
+    assert set(state["health"]) == {"squirrel", "player1"}
+    assert len(state["tokens"]) == 1
+
+
+def test_server_streams_snapshot_then_deltas():
+    feed = SpectatorFeed()
+    feed.publish({"timer": "3.0"})
+    server = SpectatorServer(feed, port=0).start()
+    try:
+        connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+        connection.request("GET", "/events")
+        response = connection.getresponse()
+        assert response.getheader("Content-Type") == "text/event-stream"
+
+        def read_message():
+            lines = [response.readline(), response.readline(), response.readline()]
+            return parse(b"".join(lines))
+
+        assert read_message() == ("snapshot", {"timer": "3.0", "events": []})
+        feed.publish({"timer": "2.9"})
+        assert read_message() == ("delta", {"timer": "2.9"})
+        connection.close()
+
+        connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+        connection.request("GET", "/")
+        assert b"EventSource" in connection.getresponse().read()
+        connection.close()
+    finally:
+        server.stop()
+
+
+def test_page_never_puts_names_into_html():
+    assert "innerHTML" not in PAGE
+    assert "textContent = name" in PAGE
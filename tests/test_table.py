@@ -0,0 +1,83 @@
+import pytest
+
+from boss_battles.table import CombatantTable, EFFECT_BITS
+from boss_battles.game import BossBattle
+from boss_battles.character import Player, Squirrel, Wyrmling, Stats
+from boss_battles.ability import EffectType
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "array"])
+def table(request):
+    if request.param:
+        pytest.importorskip("numpy")
+    return CombatantTable(capacity=2, use_numpy=request.param)
+
+
+def test_bind_copies_the_character_into_a_row(table):
+    wyrmling = Wyrmling()
+    row = table.bind(wyrmling)
+
+    assert table.row("wyrmling") == row
+    assert "wyrmling" in table
+    assert table.health[row] == wyrmling.get_health()
+    assert table.max_health[row] == wyrmling.get_max_health()
+    assert table.stats[Stats.Type.STRENGTH][row] == 15
+    assert table.is_boss[row]
+    assert int(table.immunities[row]) == EFFECT_BITS[EffectType.FIRE]
+    assert table.affected(EffectType.FIRE, table.immunities) == [wyrmling]
+
+
+def test_health_column_follows_the_character(table):
+    player = Player.roll_fighter("player")
+    table.bind(player)
+    player.take_damage(5)
+    assert table.health[table.row("player")] == player.get_max_health() - 5
+
+
+def test_table_grows(table):
+    players = [Player.roll_fighter(f"player{n}") for n in range(5)]
+    for p in players:
+        table.bind(p)
+    players[3].take_damage(100)
+
+    assert len(table) == 5
+    assert table.conscious(bosses=False) == [players[0], players[1], players[2], players[4]]
+    assert table.conscious_count(bosses=False) == 4
+
+
+def test_bulk_queries_split_players_and_bosses(table):
+    players = [Player.roll_fighter("a"), Player.roll_fighter("b")]
+    boss = Squirrel()
+    battle = BossBattle(players=players, bosses=[boss], combatant_table=table)
+
+    assert battle.combatant_table is table
+    assert battle.total_health(bosses=False) == 2 * players[0].get_max_health()
+    assert battle.total_health(bosses=True) == boss.get_health()
+
+    boss.take_damage(100)
+    assert table.conscious_count(bosses=True) == 0
+    assert table.conscious(bosses=False) == players
+
+
+def test_boss_health_is_read_from_the_boss_rows(table):
+    players = [Player.roll_fighter("a"), Player.roll_fighter("b")]
+    bosses = [Squirrel(), Wyrmling()]
+    battle = BossBattle(players=players, bosses=bosses, combatant_table=table)
+
+    bosses[1].take_damage(1)
+    assert battle.boss_healths() == tuple(b.get_health() for b in bosses)
+
+
+def test_binding_twice_is_an_error(table):
+    player = Player.roll_fighter("player")
+    table.bind(player)
+    with pytest.raises(ValueError):
+        table.bind(player)
+
+
+def test_total_health_without_a_table():
+    players = [Player.roll_fighter("a"), Player.roll_fighter("b")]
+    battle = BossBattle(players=players, bosses=[Squirrel()])
+    assert battle.combatant_table is None
+    assert battle.total_health(bosses=False) == sum(p.get_max_health() for p in players)
+    assert battle.boss_healths() == (battle.bosses[0].get_health(),)
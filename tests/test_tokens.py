@@ -0,0 +1,65 @@
+import pytest
+
+from boss_battles.tokens import OpportunityTokenStore
+from boss_battles.game import BossBattle
+from boss_battles.events import EventKind
+from boss_battles.character import Player, Squirrel
+from boss_battles.command import Command
+
+
+def test_store_keeps_current_token_and_grace_window():
+    store = OpportunityTokenStore(["squirrel"], grace_rounds=2)
+    for token in ["aaaa", "bbbb", "cccc", "dddd"]:
+        store.set_token("squirrel", token)
+
+    assert store.get_token("squirrel") == "dddd"
+    assert store.valid_tokens("squirrel") == ("dddd", "cccc", "bbbb")
+
+
+def test_store_without_grace_window():
+    store = OpportunityTokenStore(["squirrel"], grace_rounds=0)
+    store.set_token("squirrel", "aaaa")
+    store.set_token("squirrel", "bbbb")
+    assert store.valid_tokens("squirrel") == ("bbbb", )
+
+
+def test_store_raises_before_tokens_are_generated():
+    store = OpportunityTokenStore(["squirrel"])
+    with pytest.raises(IndexError):
+        store.get_token("squirrel")
+    with pytest.raises(IndexError):
+        store.formatted_tokens()
+
+
+def test_formatted_tokens_only_change_when_a_round_starts():
+    store = OpportunityTokenStore(["squirrel"])
+    store.set_token("squirrel", "aaaa")
+    store.start_round()
+    formatted = store.formatted_tokens()
+    assert formatted == ("squirrel:aaaa", )
+
+    store.set_token("squirrel", "bbbb")
+    assert store.formatted_tokens() is formatted
+
+    store.start_round()
+    assert store.formatted_tokens() == ("squirrel:bbbb", )
+
+
+def test_battle_token_storage_does_not_grow():
+    battle = BossBattle(players=[Player.roll_fighter("player")], bosses=[Squirrel()], token_grace_rounds=1)
+    for _ in range(100):
+        battle.next_round()
+    assert len(battle._boss_tokens.valid_tokens("squirrel")) == 2
+
+
+def test_late_solve_is_accepted_within_grace_window():
+    player = Player.roll_fighter("player")
+    boss = Squirrel()
+    boss._max_health = boss._health = 1000
+    battle = BossBattle(players=[player], bosses=[boss], token_grace_rounds=1)
+    battle.next_round()
+    old_token = battle.get_opportunity_token(boss)
+    battle.next_round()
+
+    result = battle.handle_action(Command(f"player@squirrel/lsword {old_token}"))
+    assert result.kind is not EventKind.WRONG_TOKEN
@@ -0,0 +1,94 @@
+import pytest
+
+from boss_battles.widgets import VirtualList, HealthBars, bar, filled_cells
+from boss_battles.character import Squirrel, Player
+from boss_battles.frame import Canvas
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_items_stay_sorted_as_they_arrive():
+    names = VirtualList(["mia", "al"])
+    names.add("zed")
+    names.add("bo")
+    names.remove("mia")
+    assert list(names) == ["al", "bo", "zed"]
+    assert names.version == 5
+    with pytest.raises(ValueError):
+        names.remove("mia")
+
+
+def test_only_the_page_showing_is_formatted():
+    formatted = []
+
+    def format_name(name):
+        formatted.append(name)
+        return name
+
+    names = VirtualList(f"player{n:03}" for n in range(500))
+    names.set_page(0)
+    canvas = Canvas(12, 40)
+    names.draw(canvas, 0, 0, rows=10, columns=2, column_width=20, format_item=format_name)
+    assert formatted == [f"player{n:03}" for n in range(20)]
+    assert canvas.row_text(0).split() == ["player000", "player010"]
+    assert canvas.row_text(10).startswith("page 1/25 (500)")
+
+
+def test_pages_turn_by_themselves():
+    clock = FakeClock()
+    names = VirtualList(range(25), key=lambda n: f"{n:02}", page_seconds=5, clock=clock)
+    assert names.visible(10) == list(range(10))
+    tick = names.tick()
+
+    clock.now = 5.0
+    assert names.tick() != tick
+    assert names.visible(10) == list(range(10, 20))
+    clock.now = 10.0
+    assert names.visible(10) == [20, 21, 22, 23, 24]
+    clock.now = 15.0
+    assert names.page(10) == 0
+
+
+def test_set_page_is_clamped():
+    names = VirtualList(range(5), key=lambda n: str(n))
+    names.set_page(3)
+    assert names.page(2) == 2
+    assert names.page_count(0) == 5
+
+
+def test_health_bar_lines_match_the_boss_panel():
+    boss = Squirrel(hit_die=(4, 4))  # 11 health
+    bars = HealthBars()
+    assert bars.line(boss, 12) == f"  SQUIRREL {'█' * 12} (11 / 11)"
+    boss.take_damage(5)
+    assert bars.line(boss, 12) == f"  SQUIRREL {'█' * 6}{'░' * 6} (6 / 11)"
+
+
+def test_health_bar_lines_are_only_rebuilt_on_change():
+    boss = Squirrel()
+    bars = HealthBars()
+    line = bars.line(boss, 20)
+    assert bars.line(boss, 20) is line
+    assert bars.line(boss, 30) is not line
+
+
+def test_bars_are_shared_by_quantized_health():
+    bar.cache_clear()
+    assert filled_cells(99, 100, 10) == filled_cells(95, 100, 10) == 9
+    bar(10, 9)
+    bar(10, 9)
+    assert bar.cache_info().hits == 1
+    assert filled_cells(5, 0, 10) == 0
+
+
+def test_grid_cells_fit_their_width():
+    player = Player.roll_fighter("averyveryverylongname")
+    cell = HealthBars().cell(player, 15)
+    assert cell == "averyver █████"
+    assert len(cell) == 14